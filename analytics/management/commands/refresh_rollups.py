@@ -0,0 +1,32 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from analytics import rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula os agregados diários de submissões e certificações"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde', default=None,
+            help="Recalcula só os dias a partir desta data (AAAA-MM-DD); padrão: tudo"
+        )
+
+    def handle(self, *args, **options):
+        days = None
+        if options['desde']:
+            start = parse_date(options['desde'])
+            if start is None:
+                raise CommandError("Data inválida (use AAAA-MM-DD)")
+            today = timezone.localdate()
+            days = [start + datetime.timedelta(days=offset) for offset in range((today - start).days + 1)]
+
+        submissions = rollups.refresh_submission_days(days)
+        certifications = rollups.refresh_certification_days(days)
+        self.stdout.write(self.style.SUCCESS(
+            f"Agregados recalculados: {submissions} linhas de submissões, {certifications} de certificações"
+        ))
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:15
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def populate_rollups(apps, schema_editor):
+    Submission = apps.get_model('submissions', 'Submission')
+    Certification = apps.get_model('certifications', 'Certification')
+    SubmissionDailyStat = apps.get_model('analytics', 'SubmissionDailyStat')
+    CertificationDailyStat = apps.get_model('analytics', 'CertificationDailyStat')
+
+    submissions = (
+        Submission.objects.order_by().annotate(day=TruncDate('created_at'))
+        .values('day', 'service')
+        .annotate(total=Count('pk'), consented=Count('pk', filter=Q(consent=True)))
+    )
+    SubmissionDailyStat.objects.bulk_create([
+        SubmissionDailyStat(date=row['day'], service=row['service'], total=row['total'], consented=row['consented'])
+        for row in submissions
+    ])
+
+    certifications = (
+        Certification.objects.order_by().values('data_conclusao', 'curso', 'ano', 'status')
+        .annotate(total=Count('pk'))
+    )
+    CertificationDailyStat.objects.bulk_create([
+        CertificationDailyStat(
+            date=row['data_conclusao'], curso=row['curso'], ano=row['ano'], status=row['status'], total=row['total']
+        )
+        for row in certifications
+    ])
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('certifications', '0017_certification_search_index'),
+        ('submissions', '0005_submission_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificationDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data de conclusão')),
+                ('curso', models.CharField(max_length=200, verbose_name='Curso')),
+                ('ano', models.CharField(max_length=10, verbose_name='Ano')),
+                ('status', models.CharField(max_length=20, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+            ],
+            options={
+                'verbose_name': 'Certificações por dia',
+                'verbose_name_plural': 'Certificações por dia',
+                'ordering': ['-date', 'curso'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'curso', 'ano', 'status'), name='analytics_certification_day_group')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubmissionDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('service', models.CharField(max_length=120, verbose_name='Serviço')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('consented', models.PositiveIntegerField(default=0, verbose_name='Com consentimento')),
+            ],
+            options={
+                'verbose_name': 'Submissões por dia',
+                'verbose_name_plural': 'Submissões por dia',
+                'ordering': ['-date', 'service'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'service'), name='analytics_submission_day_service')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+from django.db import models
+
+
+class SubmissionDailyStat(models.Model):
+    """Submissões recebidas por dia (fuso local) e serviço"""
+    date = models.DateField(
+        verbose_name="Data"
+    )
+    service = models.CharField(
+        max_length=120,
+        verbose_name="Serviço"
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Total"
+    )
+    consented = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Com consentimento"
+    )
+
+    def __str__(self):
+        return f"{self.date} - {self.service}: {self.total}"
+
+    class Meta:
+        verbose_name = "Submissões por dia"
+        verbose_name_plural = "Submissões por dia"
+        ordering = ['-date', 'service']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'service'], name='analytics_submission_day_service'),
+        ]
+
+
+class CertificationDailyStat(models.Model):
+    """Certificações por data de conclusão, curso, ano e status"""
+    date = models.DateField(
+        verbose_name="Data de conclusão"
+    )
+    curso = models.CharField(
+        max_length=200,
+        verbose_name="Curso"
+    )
+    ano = models.CharField(
+        max_length=10,
+        verbose_name="Ano"
+    )
+    status = models.CharField(
+        max_length=20,
+        verbose_name="Status"
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Total"
+    )
+
+    def __str__(self):
+        return f"{self.date} - {self.curso} ({self.status}): {self.total}"
+
+    class Meta:
+        verbose_name = "Certificações por dia"
+        verbose_name_plural = "Certificações por dia"
+        ordering = ['-date', 'curso']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'curso', 'ano', 'status'], name='analytics_certification_day_group'
+            ),
+        ]
@@ -0,0 +1,196 @@
+"""
+Agregados diários (rollups) das submissões e das certificações.
+
+``SubmissionDailyStat`` guarda, por dia (fuso local) e serviço, o total de
+submissões e quantas deram consentimento; ``CertificationDailyStat`` guarda as
+certificações por data de conclusão, curso, ano e status. Os signals
+recalculam só os dias afetados por cada gravação (um ``GROUP BY`` limitado a um
+dia, pelo índice), e as estatísticas e o painel do admin leem apenas estas
+tabelas, nunca as linhas originais.
+
+O comando ``refresh_rollups`` recalcula tudo (ou a partir de uma data).
+"""
+import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from backend import caching
+from certifications.models import Certification
+from submissions.models import Submission
+
+from .models import CertificationDailyStat, SubmissionDailyStat
+
+
+def _day_range(days):
+    """Início do primeiro e fim do último dia, no fuso local"""
+    start = timezone.make_aware(datetime.datetime.combine(min(days), datetime.time.min))
+    end = timezone.make_aware(datetime.datetime.combine(max(days), datetime.time.min))
+    return start, end + datetime.timedelta(days=1)
+
+
+def _replace(model, days, rows):
+    """Troca as linhas dos ``days`` (todas, se ``None``) pelas recalculadas"""
+    stale = model.objects.all() if days is None else model.objects.filter(date__in=days)
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                stale.delete()
+                model.objects.bulk_create(rows)
+            break
+        except IntegrityError:
+            # Outro processo recalculou os mesmos dias ao mesmo tempo
+            if attempt:
+                raise
+    caching.bump_namespace(model)
+    return len(rows)
+
+
+def refresh_submission_days(days=None):
+    """Recalcula os agregados de submissões dos ``days`` (``None`` = todos)"""
+    queryset = Submission.objects.all()
+    if days is not None:
+        days = set(days)
+        if not days:
+            return 0
+        start, end = _day_range(days)
+        queryset = queryset.filter(created_at__gte=start, created_at__lt=end)
+
+    groups = (
+        queryset.order_by().annotate(day=TruncDate('created_at'))
+        .values('day', 'service')
+        .annotate(total=Count('pk'), consented=Count('pk', filter=Q(consent=True)))
+    )
+    rows = [
+        SubmissionDailyStat(
+            date=group['day'], service=group['service'],
+            total=group['total'], consented=group['consented']
+        )
+        for group in groups
+        if days is None or group['day'] in days
+    ]
+    return _replace(SubmissionDailyStat, days, rows)
+
+
+def refresh_certification_days(days=None):
+    """Recalcula os agregados de certificações dos ``days`` (``None`` = todos)"""
+    queryset = Certification.objects.all()
+    if days is not None:
+        days = {day for day in days if day}
+        if not days:
+            return 0
+        queryset = queryset.filter(data_conclusao__in=days)
+
+    groups = (
+        queryset.order_by().values('data_conclusao', 'curso', 'ano', 'status')
+        .annotate(total=Count('pk'))
+    )
+    rows = [
+        CertificationDailyStat(
+            date=group['data_conclusao'], curso=group['curso'], ano=group['ano'],
+            status=group['status'], total=group['total']
+        )
+        for group in groups
+    ]
+    return _replace(CertificationDailyStat, days, rows)
+
+
+def _cached(model, parts, build):
+    cache = caching.get_cache()
+    key = caching.versioned_key((model,), 'stats', *parts)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.LIST_CACHE_TIMEOUT)
+    return data
+
+
+def _between(queryset, start, end):
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+    return queryset
+
+
+def _rate(part, total):
+    return round(part / total, 4) if total else None
+
+
+def submission_stats(start=None, end=None):
+    """Totais por serviço e por dia entre ``start`` e ``end`` (inclusivos)"""
+    def build():
+        rows = _between(SubmissionDailyStat.objects.all(), start, end)
+        by_service = list(
+            rows.values('service').annotate(total=Sum('total'), consented=Sum('consented'))
+            .order_by('-total', 'service')
+        )
+        by_day = rows.values('date').annotate(total=Sum('total'), consented=Sum('consented')).order_by('date')
+        total = sum(row['total'] for row in by_service)
+        consented = sum(row['consented'] for row in by_service)
+        return {
+            "total": total,
+            "com_consentimento": consented,
+            "taxa_consentimento": _rate(consented, total),
+            "por_servico": [
+                {
+                    "servico": row['service'],
+                    "total": row['total'],
+                    "com_consentimento": row['consented'],
+                    "taxa_consentimento": _rate(row['consented'], row['total']),
+                }
+                for row in by_service
+            ],
+            "por_dia": [
+                {"data": row['date'].isoformat(), "total": row['total'], "com_consentimento": row['consented']}
+                for row in by_day
+            ],
+        }
+    return _cached(SubmissionDailyStat, ('submissions', start, end), build)
+
+
+def certification_stats(start=None, end=None):
+    """Totais por curso, ano, status e dia de conclusão entre ``start`` e ``end``"""
+    def build():
+        rows = _between(CertificationDailyStat.objects.all(), start, end)
+
+        def grouped(field, order):
+            return [
+                {field: row[field], "total": row['total']}
+                for row in rows.values(field).annotate(total=Sum('total')).order_by(*order)
+            ]
+
+        by_status = grouped('status', ('status',))
+        return {
+            "total": sum(row['total'] for row in by_status),
+            "por_status": by_status,
+            "por_curso": grouped('curso', ('-total', 'curso')),
+            "por_ano": grouped('ano', ('ano',)),
+            "por_dia": [
+                {"data": row['date'].isoformat(), "total": row['total']}
+                for row in rows.values('date').annotate(total=Sum('total')).order_by('date')
+            ],
+        }
+    return _cached(CertificationDailyStat, ('certifications', start, end), build)
+
+
+def submission_dashboard():
+    """Contexto do painel da changelist de submissões no admin"""
+    def build():
+        stats = submission_stats()
+        today = timezone.localdate()
+        today_total = SubmissionDailyStat.objects.filter(date=today).aggregate(total=Sum('total'))['total']
+        daily = stats['por_dia'][-14:]
+        return {
+            'total_submissions': stats['total'],
+            'today_submissions': today_total or 0,
+            'services_stats': [
+                {'service': row['servico'], 'count': row['total']} for row in stats['por_servico']
+            ],
+            'daily_stats': daily,
+            'daily_max': max((day['total'] for day in daily), default=0),
+        }
+    return _cached(SubmissionDailyStat, ('dashboard', timezone.localdate()), build)
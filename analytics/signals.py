@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from backend import snapshots
+from certifications.models import Certification
+from certifications.signals import certifications_bulk_created
+from submissions.models import Submission
+from submissions.signals import submissions_bulk_created
+
+from . import rollups
+
+
+def _refresh_after_commit(refresh, days):
+    transaction.on_commit(lambda: refresh(days))
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_delete, sender=Submission)
+def refresh_submission_day(sender, instance, **kwargs):
+    """Recalcula o dia da submissão gravada ou removida"""
+    _refresh_after_commit(rollups.refresh_submission_days, [timezone.localdate(instance.created_at)])
+
+
+@receiver(submissions_bulk_created)
+def refresh_bulk_submission_days(sender, instances, **kwargs):
+    days = {timezone.localdate(instance.created_at) for instance in instances}
+    _refresh_after_commit(rollups.refresh_submission_days, days)
+
+
+@receiver(post_save, sender=Certification)
+@receiver(post_delete, sender=Certification)
+def refresh_certification_day(sender, instance, **kwargs):
+    """Recalcula o dia de conclusão atual e o anterior (a certificação pode mudar de dia)"""
+    previous = snapshots.previous(instance) or {}
+    days = {instance.data_conclusao, previous.get('data_conclusao')}
+    _refresh_after_commit(rollups.refresh_certification_days, days)
+
+
+@receiver(certifications_bulk_created)
+def refresh_bulk_certification_days(sender, instances, **kwargs):
+    days = {instance.data_conclusao for instance in instances}
+    _refresh_after_commit(rollups.refresh_certification_days, days)
+
+
+snapshots.track(Certification, ('data_conclusao',))
@@ -0,0 +1,237 @@
+import datetime
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from certifications.importers import CertificationImporter
+from certifications.models import Certification
+from submissions import queue
+from submissions.models import Submission
+
+from . import rollups
+from .models import CertificationDailyStat, SubmissionDailyStat
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'analytics-tests'},
+    'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'analytics-throttle'},
+}
+
+# 23:30 em UTC já é o dia seguinte em Maputo (UTC+2)
+LATE_NIGHT = datetime.datetime(2025, 3, 10, 23, 30, tzinfo=datetime.timezone.utc)
+
+
+def submission_data(index=1, **kwargs):
+    data = {
+        'name': f"Cliente {index}",
+        'email': f"cliente{index}@exemplo.co.mz",
+        'phone': '+258840000000',
+        'service': 'Consultoria',
+        'message': 'Gostaria de receber mais informações.',
+        'consent': True,
+    }
+    data.update(kwargs)
+    return data
+
+
+def certification_data(index=1, **kwargs):
+    data = {
+        'nome_completo': f"Estudante {index}",
+        'documento': f"{index:012d}B",
+        'curso': 'Gestão da Qualidade ISO 9001',
+        'duracao': '40 horas',
+        'carga_horaria': '40h',
+        'data_conclusao': datetime.date(2025, 3, 1),
+        'ano': '2025',
+        'codigo': f"STAT-{index:05d}",
+        'unique_link': f"stat-{index:05d}",
+    }
+    data.update(kwargs)
+    return data
+
+
+def submission_rows():
+    return list(SubmissionDailyStat.objects.order_by('date', 'service').values_list(
+        'date', 'service', 'total', 'consented'
+    ))
+
+
+def certification_rows():
+    return list(CertificationDailyStat.objects.order_by('date', 'status').values_list(
+        'date', 'status', 'total'
+    ))
+
+
+class RollupTestCase(TestCase):
+    """
+    Cache em memória, mídias e fila num diretório temporário e tarefas em
+    segundo plano no próprio thread. Os agregados são recalculados depois do
+    commit: os testes usam ``captureOnCommitCallbacks``.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(
+            CACHES=TEST_CACHES,
+            MEDIA_ROOT=os.path.join(root, 'media'),
+            DECLARATIONS_PUBLISH_ROOT=os.path.join(root, 'published'),
+            SUBMISSION_QUEUE_PATH=os.path.join(root, 'queue.sqlite3'),
+            CERTIFICATION_PDF_BACKGROUND=False,
+            DECLARATIONS_PUBLISH_ON_SAVE=False,
+            BACKGROUND_JOBS_INLINE=True,
+        ))
+        super().setUpClass()
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+    def create_submission(self, index=1, created_at=LATE_NIGHT, **kwargs):
+        with mock.patch('django.utils.timezone.now', return_value=created_at), \
+                self.captureOnCommitCallbacks(execute=True):
+            return Submission.objects.create(**submission_data(index, **kwargs))
+
+    def create_certification(self, index=1, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Certification.objects.create(**certification_data(index, **kwargs))
+
+
+class RollupSignalTests(RollupTestCase):
+    """Só os dias afetados são recalculados depois de cada gravação"""
+
+    def test_submission_day_uses_local_time(self):
+        first = self.create_submission(1)
+        self.create_submission(2, consent=False)
+        self.create_submission(3, service='Auditoria')
+        day = datetime.date(2025, 3, 11)
+        self.assertEqual(submission_rows(), [(day, 'Auditoria', 1, 1), (day, 'Consultoria', 2, 1)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(submission_rows(), [(day, 'Auditoria', 1, 1), (day, 'Consultoria', 1, 0)])
+
+    def test_other_days_are_not_recalculated(self):
+        self.create_submission(1)
+        other_day = LATE_NIGHT - datetime.timedelta(days=5)
+        with mock.patch.object(rollups, 'refresh_submission_days', wraps=rollups.refresh_submission_days) as refresh:
+            self.create_submission(2, created_at=other_day)
+        refresh.assert_called_once_with([datetime.date(2025, 3, 6)])
+        self.assertEqual(len(submission_rows()), 2)
+
+    def test_drained_queue_updates_rollups(self):
+        with mock.patch('django.utils.timezone.now', return_value=LATE_NIGHT):
+            for index in range(3):
+                queue.enqueue(submission_data(index))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(queue.drain(), 3)
+        self.assertEqual(submission_rows(), [(datetime.date(2025, 3, 11), 'Consultoria', 3, 3)])
+
+    def test_certification_moving_day_updates_both_days(self):
+        certification = self.create_certification(1)
+        self.create_certification(2, status='Em Andamento')
+        march_1 = datetime.date(2025, 3, 1)
+        self.assertEqual(certification_rows(), [(march_1, 'Aprovado', 1), (march_1, 'Em Andamento', 1)])
+
+        certification.data_conclusao = datetime.date(2025, 3, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.save()
+        self.assertEqual(certification_rows(), [
+            (march_1, 'Em Andamento', 1), (datetime.date(2025, 3, 2), 'Aprovado', 1),
+        ])
+
+    def test_bulk_import_updates_rollups(self):
+        rows = [(index, certification_data(index)) for index in range(1, 4)]
+        with self.captureOnCommitCallbacks(execute=True):
+            CertificationImporter().run(rows)
+        self.assertEqual(certification_rows(), [(datetime.date(2025, 3, 1), 'Aprovado', 3)])
+
+    def test_refresh_command_rebuilds_tables(self):
+        self.create_submission(1)
+        self.create_certification(1)
+        # Gravações que não disparam signals deixam os agregados para trás
+        Submission.objects.update(service='Auditoria')
+        Certification.objects.update(status='Reprovado')
+
+        call_command('refresh_rollups', stdout=io.StringIO())
+        self.assertEqual(submission_rows(), [(datetime.date(2025, 3, 11), 'Auditoria', 1, 1)])
+        self.assertEqual(certification_rows(), [(datetime.date(2025, 3, 1), 'Reprovado', 1)])
+
+
+class StatsApiTests(RollupTestCase):
+    """Estatísticas lidas só dos agregados (somente staff)"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_submission(1)
+        self.create_submission(2, consent=False)
+        self.create_submission(3, service='Auditoria', created_at=LATE_NIGHT - datetime.timedelta(days=30))
+        self.create_certification(1)
+        self.create_certification(2, curso='Auditoria Interna', data_conclusao=datetime.date(2024, 12, 1), ano='2024')
+        staff = get_user_model().objects.create_user('equipe', password='senha', is_staff=True)
+        self.client.force_login(staff)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('submissions_submission', sql)
+        self.assertNotIn('certifications_certification', sql)
+        return response
+
+    def test_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/stats/submissions/').status_code, 403)
+        self.assertEqual(self.client.get('/api/stats/certifications/').status_code, 403)
+
+    def test_invalid_period_returns_400(self):
+        response = self.client.get('/api/stats/submissions/', {'data_inicio': '11/03/2025'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('data_inicio', response.json()['message'])
+
+    def test_submission_stats(self):
+        data = self.get('/api/stats/submissions/').json()
+        self.assertEqual((data['total'], data['com_consentimento'], data['taxa_consentimento']), (3, 2, 0.6667))
+        self.assertEqual(data['por_servico'][0], {
+            'servico': 'Consultoria', 'total': 2, 'com_consentimento': 1, 'taxa_consentimento': 0.5,
+        })
+        self.assertEqual([day['data'] for day in data['por_dia']], ['2025-02-09', '2025-03-11'])
+
+        data = self.get('/api/stats/submissions/', data_inicio='2025-03-01', data_fim='2025-03-31').json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual([row['servico'] for row in data['por_servico']], ['Consultoria'])
+
+    def test_certification_stats(self):
+        data = self.get('/api/stats/certifications/').json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['por_ano'], [{'ano': '2024', 'total': 1}, {'ano': '2025', 'total': 1}])
+
+        data = self.get('/api/stats/certifications/', data_inicio='2025-01-01').json()
+        self.assertEqual(data['por_curso'], [{'curso': 'Gestão da Qualidade ISO 9001', 'total': 1}])
+
+    def test_cached_until_rollup_changes(self):
+        self.assertEqual(self.get('/api/stats/submissions/').json()['total'], 3)
+        with self.assertNumQueries(0):
+            rollups.submission_stats()
+
+        self.create_submission(4)
+        self.assertEqual(self.get('/api/stats/submissions/').json()['total'], 4)
+
+    def test_admin_dashboard(self):
+        admin = get_user_model().objects.create_superuser('admin', 'admin@exemplo.co.mz', 'senha')
+        self.client.force_login(admin)
+        # A changelist lista as submissões; o painel vem dos agregados
+        response = self.client.get('/admin/submissions/submission/')
+        self.assertEqual(response.context['total_submissions'], 3)
+        self.assertEqual(
+            response.context['services_stats'],
+            [{'service': 'Consultoria', 'count': 2}, {'service': 'Auditoria', 'count': 1}],
+        )
+        self.assertEqual(response.context['daily_max'], 2)
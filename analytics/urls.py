@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import CertificationStatsView, SubmissionStatsView
+
+urlpatterns = [
+    path('submissions/', SubmissionStatsView.as_view(), name="stats-submissions"),
+    path('certifications/', CertificationStatsView.as_view(), name="stats-certifications"),
+]
@@ -0,0 +1,53 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.utils.dateparse import parse_date
+import logging
+
+from . import rollups
+
+logger = logging.getLogger(__name__)
+
+
+def parse_period(params):
+    """``data_inicio``/``data_fim`` (AAAA-MM-DD, inclusivos); levanta ``ValueError``"""
+    period = []
+    for name in ('data_inicio', 'data_fim'):
+        value = params.get(name)
+        day = parse_date(value) if value else None
+        if value and day is None:
+            raise ValueError(f"{name} inválida (use AAAA-MM-DD)")
+        period.append(day)
+    return period
+
+
+class StatsView(APIView):
+    """Estatísticas lidas das tabelas de agregados diários (somente staff)"""
+    permission_classes = [IsAdminUser]
+    stats = None
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start, end = parse_period(request.query_params)
+        except ValueError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response(self.stats(start, end))
+        except Exception as e:
+            logger.error(f"Erro ao calcular estatísticas: {str(e)}")
+            return Response(
+                {"error": "Erro ao calcular estatísticas"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class SubmissionStatsView(StatsView):
+    """Submissões por serviço e por dia, com taxa de consentimento"""
+    stats = staticmethod(rollups.submission_stats)
+
+
+class CertificationStatsView(StatsView):
+    """Certificações por curso, ano, status e dia de conclusão"""
+    stats = staticmethod(rollups.certification_stats)
@@ -0,0 +1,87 @@
+"""
+Paginação do admin com número constante de consultas.
+
+``EstimatedCountPaginator`` usa, em tabelas grandes sem filtros, a estimativa
+do PostgreSQL (``pg_class.reltuples``) em vez de ``COUNT(*)``; nos restantes
+casos guarda a contagem exata no cache, sob as versões dos modelos envolvidos.
+
+Depende dos namespaces de ``backend/caching.py``: só guarda no cache contagens
+de modelos registados, cujas gravações invalidam as chaves. As opções dos
+filtros vêm da tabela de facetas (``facets.filters.FacetFieldListFilter``).
+"""
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from . import caching
+
+
+def query_models(queryset):
+    """
+    Modelos das tabelas usadas pela consulta, ou ``None`` se alguma não for de
+    um modelo registado (a contagem não seria invalidada).
+    """
+    tables = {model._meta.db_table: model for model in caching.registered_models}
+    # ``alias_map`` só tem a tabela base depois de a consulta ser compilada
+    names = [queryset.model._meta.db_table, *(alias.table_name for alias in queryset.query.alias_map.values())]
+    models = []
+    for name in names:
+        model = tables.get(name)
+        if model is None:
+            return None
+        if model not in models:
+            models.append(model)
+    return models
+
+
+def estimated_count(queryset):
+    """Estimativa do número de linhas da tabela (PostgreSQL), ou ``None``"""
+    if queryset.query.where or queryset.query.distinct:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1 enquanto a tabela nunca foi analisada (ANALYZE/autovacuum)
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginador do admin sem ``COUNT(*)`` exato a cada página"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+
+        estimate = estimated_count(queryset)
+        if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+
+        models = query_models(queryset)
+        if models is None:
+            return super().count
+        try:
+            sql = str(queryset.query)
+        except EmptyResultSet:
+            return 0
+
+        cache = caching.get_cache()
+        key = caching.versioned_key(models, 'admin-count', sql)
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return count
+
@@ -0,0 +1,72 @@
+"""
+Apoio às views assíncronas (modo ASGI, ``ASYNC_VIEWS = True``).
+
+O DRF não tem views assíncronas; as views ``async def`` dos caminhos críticos
+reutilizam daqui o que as views do DRF fariam: parsers, throttling e o mesmo
+renderer JSON, para que as respostas sejam iguais às do modo síncrono.
+"""
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+
+from .renderers import FastJSONRenderer
+from .throttling import EndpointRateThrottle
+
+_renderer = FastJSONRenderer()
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    """``HttpResponse`` com o mesmo corpo e tipo que uma ``Response`` do DRF"""
+    response = HttpResponse(
+        _renderer.render(data), status=status, content_type=_renderer.media_type, headers=headers
+    )
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def drf_request(request, view_class):
+    """Envolve o pedido do Django num ``Request`` do DRF com os parsers da view"""
+    view = view_class()
+    return Request(
+        request,
+        parsers=view.get_parsers(),
+        authenticators=view.get_authenticators(),
+        negotiator=view.get_content_negotiator(),
+    )
+
+
+def _check_throttles(request, view_class, action):
+    view = view_class()
+    view.action = action
+    view.request = request
+    view.format_kwarg = None
+    view.args, view.kwargs = (), {}
+    # Como EarlyThrottleMixin: o limite do endpoint antes dos que usam request.user
+    throttle = EndpointRateThrottle()
+    if not throttle.allow_request(request, view):
+        view.throttled(request, throttle.wait())
+    view.check_throttles(request)
+
+
+async def throttled_response(request, view_class, action=None):
+    """
+    Aplica os throttles da view DRF equivalente.
+
+    Retorna ``None`` quando o pedido pode seguir, ou a resposta 429.
+    """
+    try:
+        await sync_to_async(_check_throttles)(request, view_class, action)
+    except Throttled as exc:
+        headers = {'Retry-After': str(math.ceil(exc.wait))} if exc.wait is not None else None
+        return json_response({'detail': exc.detail}, status=exc.status_code, headers=headers)
+    return None
+
+
+def parse_error_response(exc):
+    """Resposta a um ``ParseError`` (ex.: JSON inválido), igual à do DRF"""
+    return json_response({'detail': exc.detail}, status=exc.status_code)
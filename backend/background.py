@@ -0,0 +1,122 @@
+"""
+Tarefas em segundo plano, agrupadas por lote e executadas depois do commit.
+
+Uma função decorada com ``@job('nome')`` recebe uma lista de ids.
+``tarefa.defer(ids)`` acrescenta os ids (sem repetições) ao lote pendente
+depois do commit da transação atual, e um thread daemon por tarefa chama a
+função com tudo o que se acumulou entretanto: gravar uma certificação com N
+módulos, ou importar uma turma inteira, resulta numa só execução e não numa
+por linha, e o pedido não espera por ela.
+
+Os threads são daemon e não atrasam o fim do processo; o que ainda estiver
+pendente nesse momento só é executado com ``flush()`` (chamado no
+``worker_exit`` do gunicorn). Por isso as tarefas devem ser refazíveis: os
+comandos de backfill recuperam o que se perder num reinício abrupto.
+
+Com ``BACKGROUND_JOBS_INLINE`` (testes, depuração) a função corre logo no
+thread que fez o commit.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Espera antes de processar um lote: junta os ids dos callbacks do mesmo commit
+SETTLE_DELAY = 0.05
+
+# Tarefas definidas com ``@job``
+registry = []
+
+
+class Job:
+    """Função de ids executada em lotes por um thread próprio"""
+
+    def __init__(self, name, function):
+        self.name = name
+        self.function = function
+        self.pending = {}
+        self.condition = threading.Condition()
+        # Ocupado enquanto um lote corre (``flush`` espera por ele)
+        self.running = threading.Lock()
+        self.thread = None
+
+    def __call__(self, ids):
+        return self.function(ids)
+
+    def defer(self, ids):
+        """Agenda a tarefa para ``ids`` depois do commit da transação atual"""
+        ids = list(ids)
+        if ids:
+            transaction.on_commit(lambda: self.submit(ids))
+
+    def submit(self, ids):
+        """Acrescenta ``ids`` ao lote pendente (ou executa já, em modo inline)"""
+        if settings.BACKGROUND_JOBS_INLINE:
+            self.run(list(dict.fromkeys(ids)))
+            return
+        with self.condition:
+            self.pending.update(dict.fromkeys(ids))
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.loop, name=f"tarefa-{self.name}", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def take(self):
+        with self.condition:
+            ids = list(self.pending)
+            self.pending.clear()
+        return ids
+
+    def run(self, ids):
+        with self.running:
+            try:
+                self.function(ids)
+            except Exception as e:
+                # Uma falha não para o thread; os comandos de backfill corrigem depois
+                logger.error(f"Erro na tarefa {self.name} ({len(ids)} ids): {str(e)}")
+
+    def loop(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+            time.sleep(SETTLE_DELAY)
+            ids = self.take()
+            if not ids:
+                continue
+            try:
+                self.run(ids)
+            finally:
+                # A conexão deste thread não é fechada pelo ciclo de pedidos do Django
+                connection.close()
+
+    def flush(self):
+        """Espera pelo lote em curso e executa neste thread o que estiver pendente"""
+        with self.running:
+            pass
+        ids = self.take()
+        if ids:
+            self.run(ids)
+        return len(ids)
+
+
+def job(name):
+    """Decorador: transforma uma função de ids numa ``Job``"""
+    def decorator(function):
+        instance = Job(name, function)
+        registry.append(instance)
+        return instance
+    return decorator
+
+
+def flush_all():
+    """Executa o que estiver pendente em todas as tarefas (ex.: ao terminar o worker)"""
+    for instance in registry:
+        try:
+            instance.flush()
+        except Exception as e:
+            logger.error(f"Erro ao concluir a tarefa {instance.name}: {str(e)}")
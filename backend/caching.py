@@ -0,0 +1,120 @@
+"""
+Namespaces versionados de cache por modelo.
+
+Cada modelo registado (``Certification``, ``Modulo``, ``Submission``) tem um
+número de versão guardado no cache compartilhado. As chaves de dados derivados
+(listagens, agregados) incluem as versões dos modelos de que dependem; os
+sinais de gravação/remoção incrementam a versão e todas as chaves antigas
+deixam de ser lidas, em todos os workers, sem precisar apagá-las uma a uma.
+
+As versões começam num valor baseado no relógio: se a chave de versão for
+perdida (reinício do Redis, limpeza do cache), a nova versão nunca coincide
+com uma antiga e dados velhos não reaparecem.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+
+# Modelos cujas gravações/remoções incrementam a versão do namespace
+registered_models = set()
+
+
+def get_cache():
+    return caches[settings.CACHE_NAMESPACE_ALIAS]
+
+
+def namespace_key(model):
+    return f"namespace:{model._meta.label_lower}"
+
+
+def _initial_version():
+    return time.time_ns() // 1000
+
+
+def namespace_versions(*models):
+    """Versões atuais dos namespaces dos modelos (cria as que faltarem)"""
+    cache = get_cache()
+    keys = [namespace_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def versioned_key(models, *parts):
+    """
+    Chave de cache que muda quando qualquer dos ``models`` muda.
+
+    ``parts`` identifica o dado (ex.: ``'list', url``); partes longas são
+    resumidas num hash.
+    """
+    versions = '.'.join(str(version) for version in namespace_versions(*models))
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    labels = '+'.join(model._meta.label_lower for model in models)
+    return f"{labels}:v{versions}:{digest}"
+
+
+def _bump(models):
+    cache = get_cache()
+    for model in models:
+        key = namespace_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), None)
+
+
+def bump_namespace(*models):
+    """
+    Invalida todos os dados derivados dos modelos.
+
+    A versão muda depois do commit da transação atual (de imediato fora de
+    transações): antes disso, uma listagem concorrente ainda lê as linhas
+    antigas e guardá-las-ia sob a versão nova.
+    """
+    transaction.on_commit(lambda: _bump(models))
+
+
+def _bump_on_change(sender, **kwargs):
+    bump_namespace(sender)
+
+
+def register(*models):
+    """Liga os sinais de gravação/remoção dos modelos ao incremento das versões"""
+    for model in models:
+        registered_models.add(model)
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=f"namespace-save-{model._meta.label_lower}")
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=f"namespace-delete-{model._meta.label_lower}")
+
+
+class NamespacedListCacheMixin:
+    """
+    Guarda a resposta de ``list()`` sob uma chave versionada pelos
+    ``cache_models`` da view: qualquer gravação nesses modelos invalida todas
+    as páginas em cache, em todos os workers.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        if not self.cache_models or not settings.LIST_CACHE_TIMEOUT:
+            return super().list(request, *args, **kwargs)
+
+        cache = get_cache()
+        # A URL completa inclui o host (URLs absolutas) e todos os filtros
+        key = versioned_key(self.cache_models, 'list', request.build_absolute_uri())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.LIST_CACHE_TIMEOUT)
+        return response
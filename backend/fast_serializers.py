@@ -0,0 +1,182 @@
+"""
+Serialização rápida para listagens só de leitura.
+
+``CompiledSerializer`` analisa uma única vez os campos de um ``ModelSerializer``
+e converte linhas de ``values()`` diretamente em dicts, sem instanciar modelos
+nem percorrer a maquinaria de campos do DRF a cada linha. Relações
+``many=True`` aninhadas (ex.: ``modulos``) são lidas com uma única consulta
+agrupada por página.
+
+A saída é idêntica à do serializer original: datas passam pelo
+``to_representation`` do próprio campo DRF e cada ``SerializerMethodField``
+chama o método do serializer sobre um objeto leve com os valores da linha.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import FileField
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Campos cujo to_representation devolve o próprio valor vindo do banco
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+)
+
+# Campos convertidos pelo to_representation do DRF (formato de datas configurado)
+CONVERTED_FIELDS = (
+    serializers.DateTimeField,
+    serializers.DateField,
+)
+
+PLAIN, METHOD, NESTED = 'plain', 'method', 'nested'
+
+
+class RowObject:
+    """Objeto leve com os valores de uma linha, passado aos ``get_<campo>``"""
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+
+class CompiledSerializer:
+    """
+    Versão pré-compilada de um ``ModelSerializer`` para leitura.
+
+    ``sources`` indica as colunas usadas por cada ``SerializerMethodField``
+    (por omissão, a coluna com o mesmo nome do campo).
+    """
+
+    def __init__(self, serializer_class, sources=None):
+        self.serializer_class = serializer_class
+        self.sources = sources or {}
+
+    @cached_property
+    def model(self):
+        return self.serializer_class.Meta.model
+
+    @cached_property
+    def plan(self):
+        """Lista de ``(nome, tipo, origem, conversor)`` na ordem do serializer"""
+        concrete = {field.name: field for field in self.model._meta.concrete_fields}
+        plan = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                plan.append((name, METHOD, field.method_name, None))
+            elif isinstance(field, serializers.ListSerializer):
+                plan.append((name, NESTED, field.source, CompiledSerializer(type(field.child))))
+            elif isinstance(field, CONVERTED_FIELDS) and field.source in concrete:
+                plan.append((name, PLAIN, field.source, field.to_representation))
+            elif isinstance(field, IDENTITY_FIELDS) and field.source in concrete:
+                plan.append((name, PLAIN, field.source, None))
+            else:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name}: campo não suportado pela serialização rápida"
+                )
+        return plan
+
+    @cached_property
+    def columns(self):
+        """Colunas a pedir em ``values()``"""
+        concrete = {field.name for field in self.model._meta.concrete_fields}
+        columns = [self.model._meta.pk.name]
+        for name, kind, source, _ in self.plan:
+            if kind == PLAIN:
+                columns.append(source)
+            elif kind == METHOD:
+                columns.extend(column for column in self.sources.get(name, (name,)) if column in concrete)
+        return list(dict.fromkeys(columns))
+
+    @cached_property
+    def file_fields(self):
+        """Colunas de arquivo, entregues aos métodos como ``FieldFile``"""
+        return {
+            field.name: field for field in self.model._meta.concrete_fields
+            if isinstance(field, FileField) and field.name in self.columns
+        }
+
+    def values(self, queryset):
+        """Prepara o queryset (sem prefetch) para ser serializado"""
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def load_grouped(self, parent_model, relation_name, parent_ids):
+        """Lê uma relação reversa para vários pais numa consulta: ``{pai_id: [item, ...]}``"""
+        relation = parent_model._meta.get_field(relation_name)
+        fk_name = relation.field.attname
+        rows = list(relation.related_model._default_manager.filter(
+            **{f'{fk_name}__in': parent_ids}
+        ).values(fk_name, *self.columns))
+
+        grouped = {}
+        for row, item in zip(rows, self.serialize(rows)):
+            grouped.setdefault(row[fk_name], []).append(item)
+        return grouped
+
+    def serialize(self, rows, context=None):
+        """Converte linhas de ``values()`` na representação do serializer"""
+        rows = list(rows)
+        plan = self.plan
+        pk_name = self.model._meta.pk.name
+
+        serializer = self.serializer_class(context=context or {})
+        methods = {name: getattr(serializer, source) for name, kind, source, _ in plan if kind == METHOD}
+        nested = {}
+        for name, kind, source, child in plan:
+            if kind == NESTED:
+                parent_ids = [row[pk_name] for row in rows]
+                nested[name] = child.load_grouped(self.model, source, parent_ids) if rows else {}
+
+        file_fields = self.file_fields
+        results = []
+        for row in rows:
+            item = {}
+            obj = None
+            for name, kind, source, convert in plan:
+                if kind == PLAIN:
+                    value = row[source]
+                    item[name] = convert(value) if convert is not None and value is not None else value
+                elif kind == METHOD:
+                    if obj is None:
+                        obj = self.row_object(row, file_fields)
+                    item[name] = methods[name](obj)
+                else:
+                    item[name] = nested[name].get(row[pk_name], [])
+            results.append(item)
+        return results
+
+    @staticmethod
+    def row_object(row, file_fields):
+        values = dict(row)
+        for name, field in file_fields.items():
+            values[name] = field.attr_class(None, field, values[name])
+        return RowObject(values)
+
+
+class FastListMixin:
+    """
+    ``list()`` com ``CompiledSerializer``: ``values()`` em vez de instâncias.
+
+    A view define ``fast_serializer`` e pode sobrescrever ``use_fast_serializer()``
+    para voltar ao caminho normal do DRF em casos especiais.
+    """
+    fast_serializer = None
+
+    def use_fast_serializer(self):
+        return self.fast_serializer is not None and settings.FAST_SERIALIZATION
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_serializer():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.fast_serializer.values(self.filter_queryset(self.get_queryset()))
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.fast_serializer.serialize(page, context))
+        return Response(self.fast_serializer.serialize(queryset, context))
+
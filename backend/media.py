@@ -0,0 +1,202 @@
+"""
+Servidor de arquivos de mídia (uploads) com cache HTTP e suporte a Range.
+
+Substitui ``django.views.static.serve``:
+
+* ``ETag``/``Last-Modified`` e respostas 304 para requisições condicionais;
+* ``Cache-Control: immutable`` para nomes com hash de conteúdo
+  (``foto.<hash>.jpg``), que nunca mudam;
+* requisições ``Range`` (206) para downloads parciais;
+* delegação do envio ao servidor web (``X-Accel-Redirect`` do nginx ou
+  ``X-Sendfile``) quando configurado, para não ocupar um worker do gunicorn.
+  Sem delegação, ``FileResponse`` permite ao gunicorn usar ``sendfile()``.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+# Tamanho do hash de conteúdo inserido nos nomes dos uploads
+HASH_LENGTH = 12
+
+# "nome.<hash>.ext" ou derivados "nome.<hash>.ext_w320.webp"
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}(?:\.[^./]+_w\d+)?\.[^./]+$' % HASH_LENGTH)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Um ano: o máximo recomendado para recursos imutáveis
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def content_hashed_name(name, file):
+    """
+    Insere o hash do conteúdo no nome do arquivo: ``foto.jpg`` -> ``foto.<hash>.jpg``.
+
+    Nomes que já têm hash são devolvidos sem alteração.
+    """
+    if HASHED_NAME_RE.search(name):
+        return name
+
+    digest = hashlib.md5()
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    for chunk in file.chunks() if hasattr(file, 'chunks') else iter(lambda: file.read(64 * 1024), b''):
+        digest.update(chunk)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    root, ext = posixpath.splitext(name)
+    return f"{root}.{digest.hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def is_immutable(path):
+    """Indica se o arquivo tem hash de conteúdo no nome"""
+    return bool(HASHED_NAME_RE.search(path))
+
+
+class RangeFile:
+    """Arquivo limitado a um intervalo de bytes, lido em blocos pelo ``FileResponse``"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Interpreta um cabeçalho ``Range`` de intervalo único.
+
+    Retorna ``(inicio, fim)`` inclusivos, ``None`` para ignorar o cabeçalho
+    (ausente, inválido ou com vários intervalos) ou ``False`` quando o
+    intervalo não é satisfatível.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # "bytes=-500": os últimos 500 bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _range_applies(request, etag, last_modified):
+    """Verifica o ``If-Range``: o intervalo só vale se o arquivo não mudou"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve um arquivo de ``MEDIA_ROOT``"""
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Arquivo não encontrado")
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404("Arquivo não encontrado")
+    if not os.path.isfile(fullpath):
+        raise Http404("Arquivo não encontrado")
+
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = quote_etag(f"{size:x}-{stat.st_mtime_ns:x}")
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, path, fullpath, size, etag, last_modified)
+
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(last_modified))
+    if is_immutable(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def _file_response(request, path, fullpath, size, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    offload = _offload_response(path, fullpath, content_type)
+    if offload is not None:
+        # O servidor web envia o arquivo e trata os cabeçalhos Range
+        return offload
+
+    byte_range = None
+    if _range_applies(request, etag, last_modified):
+        byte_range = parse_range(request.headers.get('Range'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+
+    if byte_range is None:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    else:
+        response = FileResponse(RangeFile(open(fullpath, 'rb'), start, length), content_type=content_type, status=206)
+        response.headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+    response.headers['Content-Length'] = str(length)
+    response.headers['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def _offload_response(path, fullpath, content_type):
+    """Resposta vazia que delega o envio ao servidor web, se configurado"""
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        location = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(path.lstrip('/'))
+        response.headers['X-Accel-Redirect'] = location
+        return response
+    if settings.MEDIA_SENDFILE_HEADER:
+        response = HttpResponse(content_type=content_type)
+        response.headers[settings.MEDIA_SENDFILE_HEADER] = fullpath
+        return response
+    return None
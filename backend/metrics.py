@@ -0,0 +1,328 @@
+"""
+Instrumentação de requisições: tempo total, consultas ao banco e renderização
+de templates.
+
+``RequestTimingMiddleware`` mede cada requisição e:
+
+* acrescenta o cabeçalho ``Server-Timing`` (visível no DevTools do navegador);
+* escreve uma linha JSON no logger ``backend.metrics`` para as requisições
+  mais lentas que ``METRICS_LOG_SLOW_MS`` (as demais em nível DEBUG);
+* agrega as amostras por rota em memória, expostas em formato Prometheus no
+  endpoint ``/metrics`` (apenas staff ou ``Authorization: Bearer METRICS_TOKEN``).
+
+Respostas em streaming (arquivos, exportações) são medidas até o fecho da
+resposta, com as consultas feitas durante o envio; o ``Server-Timing`` dessas
+respostas só cobre o tempo até os cabeçalhos. O ``Template.render`` do backend
+Django é envolvido uma única vez, na importação deste módulo.
+
+As agregações são por processo: com vários workers do gunicorn, cada coleta
+mostra as amostras do worker que atendeu a requisição.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Amostras guardadas por rota para o cálculo dos percentis
+SAMPLE_SIZE = 1024
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Medições de uma requisição"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+def current_metrics():
+    """Medições da requisição em curso (ou ``None`` fora de uma requisição)"""
+    return _current.get()
+
+
+def _timed_template_render(render):
+    """Envolve ``Template.render`` do backend Django para medir o tempo gasto"""
+    def wrapper(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return render(self, *args, **kwargs)
+        # Templates renderizados dentro de outro não são contados duas vezes
+        metrics.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            metrics.template_depth -= 1
+            if metrics.template_depth == 0:
+                metrics.template_time += time.perf_counter() - start
+    wrapper._metrics_wrapped = True
+    return wrapper
+
+
+def install_template_timing():
+    if not getattr(DjangoTemplate.render, '_metrics_wrapped', False):
+        DjangoTemplate.render = _timed_template_render(DjangoTemplate.render)
+
+
+install_template_timing()
+
+
+class RouteStats:
+    """Amostras de uma rota: contagem, somas e janela recente para percentis"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration_sum = 0.0
+        self.db_queries_sum = 0
+        self.db_time_sum = 0.0
+        self.durations = deque(maxlen=SAMPLE_SIZE)
+        self.db_queries = deque(maxlen=SAMPLE_SIZE)
+
+
+class MetricsRegistry:
+    """Agregação em memória das medições por rota"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, route, method, duration, db_queries, db_time):
+        key = (route, method)
+        with self.lock:
+            stats = self.routes.get(key)
+            if stats is None:
+                stats = self.routes[key] = RouteStats()
+            stats.count += 1
+            stats.duration_sum += duration
+            stats.db_queries_sum += db_queries
+            stats.db_time_sum += db_time
+            stats.durations.append(duration)
+            stats.db_queries.append(db_queries)
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+    @staticmethod
+    def quantile(values, q):
+        ordered = sorted(values)
+        if not ordered:
+            return 0.0
+        index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def render_prometheus(self):
+        """Exporta as agregações no formato de texto do Prometheus"""
+        with self.lock:
+            snapshot = [
+                (route, method, stats.count, stats.duration_sum, stats.db_queries_sum,
+                 stats.db_time_sum, list(stats.durations), list(stats.db_queries))
+                for (route, method), stats in sorted(self.routes.items())
+            ]
+
+        lines = [
+            '# HELP http_request_duration_seconds Tempo total da requisição por rota',
+            '# TYPE http_request_duration_seconds summary',
+        ]
+        for route, method, count, duration_sum, _, _, durations, _ in snapshot:
+            labels = f'route="{_escape(route)}",method="{method}"'
+            for q in QUANTILES:
+                lines.append(f'http_request_duration_seconds{{{labels},quantile="{q}"}} {self.quantile(durations, q):.6f}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {duration_sum:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines += [
+            '# HELP http_request_db_queries Consultas ao banco por requisição',
+            '# TYPE http_request_db_queries summary',
+        ]
+        for route, method, count, _, queries_sum, _, _, queries in snapshot:
+            labels = f'route="{_escape(route)}",method="{method}"'
+            for q in QUANTILES:
+                lines.append(f'http_request_db_queries{{{labels},quantile="{q}"}} {self.quantile(queries, q)}')
+            lines.append(f'http_request_db_queries_sum{{{labels}}} {queries_sum}')
+            lines.append(f'http_request_db_queries_count{{{labels}}} {count}')
+
+        lines += [
+            '# HELP http_request_db_seconds_total Tempo total gasto no banco por rota',
+            '# TYPE http_request_db_seconds_total counter',
+        ]
+        for route, method, _, _, _, db_time_sum, _, _ in snapshot:
+            lines.append(f'http_request_db_seconds_total{{route="{_escape(route)}",method="{method}"}} {db_time_sum:.6f}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def route_name(request):
+    """Nome da rota resolvida (evita uma série por URL concreta)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unmatched'
+
+
+class RequestTimingMiddleware:
+    """Mede tempo total, consultas ao banco e renderização de templates por requisição"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        wrappers = _ExecuteWrappers(metrics.db_wrapper).__enter__()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            wrappers.__exit__(None, None, None)
+            raise
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, wrappers.__exit__)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        # O ORM assíncrono corre na thread "thread-sensitive" da requisição, com
+        # conexões próprias: os wrappers são instalados nessa thread
+        wrappers = _ExecuteWrappers(metrics.db_wrapper)
+        await sync_to_async(wrappers.__enter__)()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            await sync_to_async(wrappers.__exit__)(None, None, None)
+            raise
+        finally:
+            _current.reset(token)
+        if not response.streaming:
+            await sync_to_async(wrappers.__exit__)(None, None, None)
+            return self.finish(request, response, metrics, None)
+        # O ``close()`` da resposta corre na mesma thread (sync_to_async do handler ASGI)
+        return self.finish(request, response, metrics, wrappers.__exit__)
+
+    def finish(self, request, response, metrics, release):
+        """
+        Acrescenta o Server-Timing e regista as medições; nas respostas em
+        streaming o registo (e ``release``, que remove os wrappers do banco)
+        fica para o ``close()`` da resposta.
+        """
+        self.add_server_timing(response, metrics)
+        if not response.streaming:
+            if release:
+                release(None, None, None)
+            self.record(request, response, metrics)
+            return response
+
+        def on_close():
+            if release:
+                release(None, None, None)
+            self.record(request, response, metrics)
+        response._resource_closers.append(on_close)
+        return response
+
+    @staticmethod
+    def add_server_timing(response, metrics):
+        if settings.SERVER_TIMING_HEADER:
+            duration = time.perf_counter() - metrics.start
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"',
+                f'tpl;dur={metrics.template_time * 1000:.1f}',
+                f'total;dur={duration * 1000:.1f}',
+            ])
+
+    def record(self, request, response, metrics):
+        """Agrega as medições e regista as requisições lentas"""
+        duration = time.perf_counter() - metrics.start
+        route = route_name(request)
+        registry.observe(route, request.method, duration, metrics.db_queries, metrics.db_time)
+
+        level = logging.INFO if duration * 1000 >= settings.METRICS_LOG_SLOW_MS else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'route': route,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_queries': metrics.db_queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'template_ms': round(metrics.template_time * 1000, 2),
+                'streaming': response.streaming,
+            }))
+
+
+class _ExecuteWrappers:
+    """
+    Instala o mesmo ``execute_wrapper`` em todas as conexões configuradas.
+
+    A remoção é feita pela identidade do wrapper, e não pela ordem: numa
+    resposta em streaming ela só acontece no ``close()``.
+    """
+
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+        self.connections = []
+
+    def __enter__(self):
+        for alias in connections:
+            connection = connections[alias]
+            connection.execute_wrappers.append(self.wrapper)
+            self.connections.append(connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self.connections:
+            wrappers = self.connections.pop().execute_wrappers
+            if self.wrapper in wrappers:
+                wrappers.remove(self.wrapper)
+
+
+def metrics_view(request):
+    """Métricas agregadas por rota em formato Prometheus (staff ou token)"""
+    authorized = request.user.is_authenticated and request.user.is_staff
+    if not authorized and settings.METRICS_TOKEN:
+        header = request.headers.get('Authorization', '')
+        authorized = constant_time_compare(header, f"Bearer {settings.METRICS_TOKEN}")
+    if not authorized:
+        return HttpResponseForbidden("Acesso restrito")
+    return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,53 @@
+"""
+Renderer JSON rápido para a API.
+
+``FastJSONRenderer`` usa o ``orjson`` (quando instalado) e produz exatamente os
+mesmos bytes que o ``JSONRenderer`` do DRF na configuração padrão: separadores
+compactos, UTF-8 sem escapes ``\\uXXXX`` e ``U+2028``/``U+2029`` escapados.
+Datas, decimais e textos traduzíveis passam pelo ``JSONEncoder`` do DRF.
+
+Volta ao renderer do DRF quando o cliente pede indentação, quando as opções
+``COMPACT_JSON``/``UNICODE_JSON`` foram alteradas ou quando o ``orjson`` não
+consegue serializar os dados (ex.: inteiros maiores que 64 bits). Floats em
+notação exponencial (``1e16``) são formatados pelo ``orjson``; a API não
+devolve floats.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        # O DRF formata datas à sua maneira (ex.: "Z" em vez de "+00:00")
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+LINE_SEPARATOR = '\u2028'.encode('utf-8')
+PARAGRAPH_SEPARATOR = '\u2029'.encode('utf-8')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` com ``orjson``, com saída idêntica à do DRF"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Mesmo tratamento do DRF: JSON válido também como JavaScript
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
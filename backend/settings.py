@@ -38,12 +38,16 @@ INSTALLED_APPS = [
     'corsheaders',
     'submissions',
     'certifications',
+    'facets',
+    'analytics',
+    'changes',
 ]
 
 # ⚙️ Middleware
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'backend.metrics.RequestTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -125,6 +129,47 @@ else:
         }
     }
 
+# 🏊 Pool de conexões do PostgreSQL (pool nativo do Django 5.x com psycopg 3)
+# Cada worker do gunicorn mantém entre DB_POOL_MIN_SIZE e DB_POOL_MAX_SIZE conexões
+DB_POOL = config("DB_POOL", default=True, cast=bool)
+DB_POOL_MIN_SIZE = config("DB_POOL_MIN_SIZE", default=1, cast=int)
+DB_POOL_MAX_SIZE = config("DB_POOL_MAX_SIZE", default=4, cast=int)
+# Segundos de espera por uma conexão livre antes de falhar
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", default=10, cast=int)
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and DB_POOL:
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        # Sem psycopg 3: mantém as conexões persistentes (conn_max_age)
+        pass
+    else:
+        DATABASES['default']['OPTIONS'] = {
+            **DATABASES['default'].get('OPTIONS', {}),
+            'pool': {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+            },
+        }
+        # O pool substitui as conexões persistentes
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# 🪶 SQLite: WAL permite leituras durante escritas; IMMEDIATE e o timeout
+# evitam "database is locked" quando vários workers gravam submissões
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {
+        **DATABASES['default'].get('OPTIONS', {}),
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA mmap_size=134217728;'
+            'PRAGMA busy_timeout=20000;'
+            'PRAGMA temp_store=MEMORY;'
+        ),
+        'transaction_mode': 'IMMEDIATE',
+    }
+
 # 🔑 Validação de senha
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -147,9 +192,58 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # 🖼️ Mídias
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Cache de mídias sem hash de conteúdo no nome (as com hash são imutáveis)
+MEDIA_CACHE_MAX_AGE = config("MEDIA_CACHE_MAX_AGE", default=60 * 60, cast=int)
+# Delegação do envio ao servidor web: prefixo interno do nginx (X-Accel-Redirect),
+# ex. "/protected-media/", ou nome do cabeçalho X-Sendfile (Apache/lighttpd)
+MEDIA_ACCEL_REDIRECT_PREFIX = config("MEDIA_ACCEL_REDIRECT_PREFIX", default="")
+MEDIA_SENDFILE_HEADER = config("MEDIA_SENDFILE_HEADER", default="")
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# 🗄️ Cache compartilhado entre os workers
+# Redis quando REDIS_URL estiver definido (requer o pacote "redis"); caso
+# contrário um arquivo SQLite local (backend/sqlite_cache.py), sem serviços externos
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'cptec',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'backend.sqlite_cache.SQLiteCache',
+            'LOCATION': config("CACHE_PATH", default=str(BASE_DIR / 'cache.sqlite3')),
+            'KEY_PREFIX': 'cptec',
+            'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 4},
+        },
+        # Contadores dos limites num arquivo próprio: cada pedido limitado é uma
+        # escrita (BEGIN IMMEDIATE) que não deve disputar o lock do cache acima
+        'throttle': {
+            'BACKEND': 'backend.sqlite_cache.SQLiteCache',
+            'LOCATION': config("THROTTLE_CACHE_PATH", default=str(BASE_DIR / 'throttle.sqlite3')),
+            'KEY_PREFIX': 'cptec',
+            'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 4},
+        },
+    }
+# Versões dos namespaces por modelo (ver backend/caching.py)
+CACHE_NAMESPACE_ALIAS = config("CACHE_NAMESPACE_ALIAS", default="default")
+# Contadores dos limites de requisições: o Redis quando configurado; sem ele
+# um SQLite à parte, com uma escrita por pedido (ver backend/throttling.py)
+THROTTLE_CACHE_ALIAS = config("THROTTLE_CACHE_ALIAS", default="default" if REDIS_URL else "throttle")
+# Páginas das listagens em cache (0 desativa)
+LIST_CACHE_TIMEOUT = config("LIST_CACHE_TIMEOUT", default=5 * 60, cast=int)
+
+# 🧮 Changelists do admin (ver backend/admin_tools.py)
+# Acima deste número de linhas (estimativa do PostgreSQL) o admin não faz COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config("ADMIN_ESTIMATED_COUNT_THRESHOLD", default=10000, cast=int)
+# Contagens exatas e opções dos filtros em cache (invalidadas quando o modelo muda)
+ADMIN_COUNT_CACHE_TIMEOUT = config("ADMIN_COUNT_CACHE_TIMEOUT", default=15 * 60, cast=int)
+
 # 🌐 CORS (p/ Vue.js)
 CORS_ALLOWED_ORIGINS = config(
     "CORS_ALLOWED_ORIGINS",
@@ -208,20 +302,82 @@ CSRF_TRUSTED_ORIGINS.extend([
 # ⚙️ Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
-    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    # orjson com saída idêntica ao JSONRenderer do DRF (ver backend/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': ['backend.renderers.FastJSONRenderer'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_FILTER_BACKENDS': ['rest_framework.filters.SearchFilter', 'rest_framework.filters.OrderingFilter'],
+    # Janela deslizante no cache compartilhado (ver backend/throttling.py)
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'backend.throttling.SlidingWindowAnonThrottle',
+        'backend.throttling.SlidingWindowUserThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
-        'user': '1000/hour'
+        'user': '1000/hour',
+        # Por IP e por endpoint, verificados antes da autenticação
+        'verificacao': config("THROTTLE_RATE_VERIFICACAO", default="60/min"),
+        'pagina_publica': config("THROTTLE_RATE_PAGINA_PUBLICA", default="60/min"),
+        'submissoes': config("THROTTLE_RATE_SUBMISSOES", default="20/hour"),
     }
 }
 
+# ⚡ Listagens serializadas a partir de values() (ver backend/fast_serializers.py)
+FAST_SERIALIZATION = config("FAST_SERIALIZATION", default=True, cast=bool)
+
+# 🔀 Views assíncronas nas verificações públicas e na criação de submissões
+# (só faz sentido servido por ASGI: gunicorn -k uvicorn_worker.UvicornWorker backend.asgi)
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
+# ⚡ Cache das verificações públicas de certificações (por link e por código)
+CERTIFICATION_CACHE_ALIAS = config("CERTIFICATION_CACHE_ALIAS", default="default")
+CERTIFICATION_CACHE_TIMEOUT = config("CERTIFICATION_CACHE_TIMEOUT", default=60 * 60, cast=int)
+# Buscas sem resultado (404) ficam em cache por pouco tempo
+CERTIFICATION_CACHE_NEGATIVE_TIMEOUT = config("CERTIFICATION_CACHE_NEGATIVE_TIMEOUT", default=60, cast=int)
+# Máximo de códigos/links por pedido em POST /api/certifications/verify/
+CERTIFICATION_VERIFY_MAX_ITEMS = config("CERTIFICATION_VERIFY_MAX_ITEMS", default=100, cast=int)
+
+# 🧵 Tarefas depois do commit (QR codes, PDFs, páginas estáticas; ver backend/background.py)
+# Correm num thread de cada worker; True executa-as no próprio pedido (testes, depuração)
+BACKGROUND_JOBS_INLINE = config("BACKGROUND_JOBS_INLINE", default=False, cast=bool)
+
+# 📄 Declarações em PDF (ver certifications/declarations.py)
+# Gera o PDF em segundo plano ao gravar a certificação; desativado, só no primeiro download
+CERTIFICATION_PDF_BACKGROUND = config("CERTIFICATION_PDF_BACKGROUND", default=True, cast=bool)
+# Validade (segundos) do lock de geração de um PDF; enquanto isso os outros pedidos recebem 503
+CERTIFICATION_PDF_LOCK_TIMEOUT = config("CERTIFICATION_PDF_LOCK_TIMEOUT", default=30, cast=int)
+
+# 🗂️ Páginas públicas estáticas (ver certifications/publishing.py)
+# Diretório com declaracoes/<link>/index.html (+ .gz/.br), para um servidor de arquivos
+DECLARATIONS_PUBLISH_ROOT = config("DECLARATIONS_PUBLISH_ROOT", default=str(BASE_DIR / 'published'))
+# Republica a página em segundo plano ao gravar a certificação (o comando publish_declarations publica todas)
+DECLARATIONS_PUBLISH_ON_SAVE = config("DECLARATIONS_PUBLISH_ON_SAVE", default=True, cast=bool)
+
+# 🔄 Feed de alterações (ver changes/feed.py)
+# Só entram alterações com mais destes segundos (transações ainda por confirmar)
+CHANGES_SAFETY_LAG = config("CHANGES_SAFETY_LAG", default=5, cast=int)
+# Dias em que as exclusões ficam guardadas; cursores mais antigos recebem 410
+CHANGES_TOMBSTONE_RETENTION_DAYS = config("CHANGES_TOMBSTONE_RETENTION_DAYS", default=90, cast=int)
+
+# 📨 Ingestão de submissões: 'sync' (grava na requisição) ou 'queue'
+# (fila local drenada por um thread em cada worker web; ver submissions/queue.py).
+# Com 'queue', SUBMISSION_QUEUE_PATH deve estar num disco persistente do serviço web
+SUBMISSION_INGESTION_MODE = config("SUBMISSION_INGESTION_MODE", default="sync")
+SUBMISSION_QUEUE_PATH = config("SUBMISSION_QUEUE_PATH", default=str(BASE_DIR / 'submission_queue.sqlite3'))
+SUBMISSION_QUEUE_BATCH_SIZE = config("SUBMISSION_QUEUE_BATCH_SIZE", default=200, cast=int)
+# Tentativas de gravar uma entrada rejeitada pelo banco antes de marcá-la como falhada
+SUBMISSION_QUEUE_MAX_ATTEMPTS = config("SUBMISSION_QUEUE_MAX_ATTEMPTS", default=5, cast=int)
+# Entradas já gravadas ficam no journal este tempo (segundos) para deduplicar reenvios
+SUBMISSION_QUEUE_RETENTION = config("SUBMISSION_QUEUE_RETENTION", default=7 * 24 * 60 * 60, cast=int)
+
+# 📊 Instrumentação das requisições (ver backend/metrics.py)
+# Cabeçalho Server-Timing com tempo total, banco e templates
+SERVER_TIMING_HEADER = config("SERVER_TIMING_HEADER", default=True, cast=bool)
+# Token para o Prometheus coletar /metrics sem sessão de staff (vazio = só staff)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+# Requisições a partir deste tempo (ms) vão para o log em INFO; as demais em DEBUG (0 = todas)
+METRICS_LOG_SLOW_MS = config("METRICS_LOG_SLOW_MS", default=1000, cast=float)
+
 # Logging configurado por ambiente
 LOGGING = {
     'version': 1,
@@ -231,12 +387,21 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        # As linhas de backend.metrics já são JSON
+        'json': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'metrics': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -253,6 +418,11 @@ LOGGING = {
             'level': 'ERROR' if DEBUG else 'INFO',
             'propagate': False,
         },
+        'backend.metrics': {
+            'handlers': ['metrics'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -0,0 +1,44 @@
+"""
+Valores gravados antes de um ``save()``, lidos numa só consulta.
+
+Vários receptores comparam o registro com a versão anterior: o cache invalida
+os identificadores antigos, as facetas descontam os valores antigos e os
+rollups recalculam o dia anterior. Cada um declara os campos de que precisa
+com ``track(model, fields)`` e lê ``previous(instance)`` no ``post_save``; um
+único ``pre_save`` por modelo busca todos os campos declarados.
+
+Com ``update_fields`` só são lidos os campos declarados que vão ser gravados;
+os demais não mudam e ficam de fora do dicionário.
+"""
+from django.db.models.signals import pre_save
+
+# Campos lidos antes de gravar, por modelo
+registry = {}
+
+
+def track(model, fields):
+    """Inclui ``fields`` nos valores anteriores lidos antes de gravar ``model``"""
+    tracked = registry.setdefault(model, [])
+    tracked.extend(field for field in fields if field not in tracked)
+    pre_save.connect(_remember, sender=model, dispatch_uid=f"snapshots-{model._meta.label_lower}")
+
+
+def _remember(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_values = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+    fields = registry[sender]
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+        if not fields:
+            instance._previous_values = {}
+            return
+    instance._previous_values = sender._default_manager.filter(pk=instance.pk).values(*fields).first()
+
+
+def previous(instance):
+    """
+    ``{campo: valor}`` antes da última gravação, ou ``None`` numa inserção
+    (ou se a gravação não passou pelo ``pre_save``).
+    """
+    return getattr(instance, '_previous_values', None)
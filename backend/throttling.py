@@ -0,0 +1,164 @@
+"""
+Limites de requisições com janela deslizante num store compartilhado.
+
+Os throttles do DRF guardam no cache a lista de timestamps de cada cliente e a
+reescrevem a cada pedido. Aqui cada cliente tem dois contadores inteiros, o da
+janela atual e o da anterior, e a contagem estimada é::
+
+    anterior * (1 - decorrido / duração) + atual
+
+Cada pedido custa uma leitura das duas janelas (``get_many``) e um ``incr``
+atômico (``add`` só no primeiro pedido de cada janela), no cache definido por
+``THROTTLE_CACHE_ALIAS``, por isso todos os workers contam juntos.
+
+Com Redis o ``incr`` é um ``INCR`` nativo. No ``SQLiteCache`` cada ``incr`` é
+uma transação ``BEGIN IMMEDIATE``, isto é, uma escrita serializada por pedido
+limitado: sem ``REDIS_URL`` os contadores ficam num arquivo próprio (alias
+``throttle``) para não disputar o lock de escrita com o cache das listagens,
+mas com tráfego alto o alias deve apontar para o Redis.
+
+``EndpointRateThrottle`` limita por IP e por escopo (``verificacao``,
+``pagina_publica``, ``submissoes``) e é verificado por ``EarlyThrottleMixin``
+antes da autenticação: pedidos rejeitados não tocam no banco (nem na sessão).
+As taxas ficam em ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``; ``None``
+desativa um escopo.
+"""
+import math
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+
+class SlidingWindowMixin:
+    """Substitui o histórico de timestamps do DRF por contadores por janela"""
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        return self.hit(self.key)
+
+    def hit(self, key):
+        """Conta um pedido para ``key``; falso quando o limite foi excedido"""
+        now = self.timer()
+        window = int(now // self.duration)
+        previous_key, current_key = f"{key}:{window - 1}", f"{key}:{window}"
+
+        counts = self.cache.get_many([previous_key, current_key])
+        previous = counts.get(previous_key, 0)
+        current = self.increment(current_key, counts.get(current_key))
+
+        elapsed = now - window * self.duration
+        weight = 1 - elapsed / self.duration
+        if previous * weight + current <= self.num_requests:
+            self._wait = None
+            return True
+
+        if current > self.num_requests or not previous:
+            # Só na próxima janela há espaço
+            self._wait = self.duration - elapsed
+        else:
+            # Espera até o peso da janela anterior cair o suficiente
+            self._wait = self.duration * (1 - (self.num_requests - current) / previous) - elapsed
+        return False
+
+    def increment(self, key, known):
+        """Incrementa o contador da janela; ``known`` é o valor lido (``None`` se ausente)"""
+        # A chave vive duas janelas: na seguinte ainda é a "anterior"
+        timeout = self.duration * 2
+        if known is None and self.cache.add(key, 1, timeout):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expirou entre a leitura e o incr
+            self.cache.set(key, 1, timeout)
+            return 1
+
+    def wait(self):
+        return max(self._wait or 0, 0)
+
+
+class SlidingWindowAnonThrottle(SlidingWindowMixin, AnonRateThrottle):
+    """``AnonRateThrottle`` (escopo ``anon``) com janela deslizante"""
+
+
+class SlidingWindowUserThrottle(SlidingWindowMixin, UserRateThrottle):
+    """``UserRateThrottle`` (escopo ``user``) com janela deslizante"""
+
+
+class EndpointRateThrottle(SlidingWindowMixin, SimpleRateThrottle):
+    """
+    Limite por IP para o escopo da view: ``throttle_scopes[action]`` nas
+    viewsets ou ``throttle_scope``. Não usa ``request.user``.
+    """
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+    # O escopo (e com ele a taxa) só é conhecido com a view
+    scope = None
+
+    def get_rate(self):
+        return self.THROTTLE_RATES.get(self.scope) if self.scope else None
+
+    @staticmethod
+    def view_scope(view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None)) or getattr(view, 'throttle_scope', None)
+
+    def allow_request(self, request, view):
+        return self.allow_scope(request, self.view_scope(view))
+
+    def allow_scope(self, request, scope):
+        self.scope = scope
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return self.hit(self.cache_format % {'scope': scope, 'ident': self.get_ident(request)})
+
+
+class EarlyThrottleMixin:
+    """
+    Aplica ``EndpointRateThrottle`` antes da autenticação e das permissões.
+
+    Os throttles de ``throttle_classes`` (anon/user) continuam a correr depois,
+    como no DRF.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        # Usado pela negociação de conteúdo da resposta 429
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        throttle = EndpointRateThrottle()
+        if not throttle.allow_request(request, self):
+            self.throttled(request, throttle.wait())
+        super().initial(request, *args, **kwargs)
+
+
+def rate_limit_wait(request, scope):
+    """
+    Conta um pedido no escopo para views fora do DRF.
+
+    Retorna ``None`` quando o pedido pode seguir, ou os segundos de espera.
+    """
+    throttle = EndpointRateThrottle()
+    if throttle.allow_scope(request, scope):
+        return None
+    return throttle.wait()
+
+
+def too_many_requests(wait):
+    """Resposta 429 em texto para views fora do DRF"""
+    seconds = math.ceil(wait)
+    response = HttpResponse(
+        f"Muitas requisições. Tente novamente em {seconds} segundos.",
+        status=429, content_type='text/plain; charset=utf-8'
+    )
+    response['Retry-After'] = str(seconds)
+    return response
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
-from django.views.static import serve
 from django.http import JsonResponse
+from .media import serve_media
+from .metrics import metrics_view
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,13 +21,15 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/submissions/', include('submissions.urls')),
     path('api/certifications/', include('certifications.urls')), 
+    path('api/stats/', include('analytics.urls')),
     path('health/', health_check, name='health-check'),
+    path('metrics', metrics_view, name='metrics'),
     path('', health_check),  # rota raiz
 ]
 
-# Servir arquivos de mídia (somente em desenvolvimento)
+# Servir arquivos de mídia (com ETag, Range e X-Accel-Redirect opcional; ver backend/media.py)
 urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    re_path(r'^media/(?P<path>.*)$', serve_media, name='media'),
 ]
 
 
@@ -0,0 +1,54 @@
+"""
+Aquecimento de um worker recém-iniciado.
+
+Chamado pelo ``gunicorn.conf.py`` depois de o worker carregar a aplicação: abre
+as conexões com o banco (e enche o pool até ``min_size``), executa as consultas
+dos caminhos críticos para aquecer o cache de páginas do banco, compila os
+templates e os serializers rápidos e abre o cache compartilhado. Assim o
+primeiro pedido de cada worker não paga esses custos.
+"""
+import logging
+import time
+
+from django.core.cache import caches
+from django.db import connections
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Prepara o worker atual; falhas são registadas e não impedem o arranque"""
+    started = time.monotonic()
+    try:
+        for alias in connections:
+            connections[alias].ensure_connection()
+
+        from certifications.cache import PUBLIC_VIEW_TEMPLATE
+        from certifications.models import Certification
+        from certifications.views import CertificationViewSet
+        from submissions.models import Submission
+        from submissions.views import SubmissionListView
+
+        # Consultas dos caminhos críticos (índices e páginas do banco em memória)
+        list(Certification.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:50])
+        Certification.objects.filter(codigo='').exists()
+        Certification.objects.filter(unique_link='').exists()
+        Submission.objects.order_by('-created_at').exists()
+
+        # Planos dos serializers rápidos e template da página pública
+        CertificationViewSet.fast_serializer.plan
+        SubmissionListView.fast_serializer.plan
+        get_template(PUBLIC_VIEW_TEMPLATE)
+
+        for alias in caches:
+            caches[alias].get('warmup')
+    except Exception as e:
+        logger.error(f"Erro ao aquecer o worker: {str(e)}")
+        return
+    finally:
+        # Devolve as conexões (ao pool, quando ativo); as persistentes reabrem sob demanda
+        for alias in connections:
+            connections[alias].close_if_unusable_or_obsolete()
+
+    logger.info(f"Worker aquecido em {(time.monotonic() - started) * 1000:.0f}ms")
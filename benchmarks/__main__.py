@@ -0,0 +1,165 @@
+"""
+Linha de comando dos benchmarks: ``python -m benchmarks {seed,run,compare}``.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+
+def setup_django():
+    import django
+    django.setup()
+
+
+def cmd_seed(args):
+    setup_django()
+    from django.core.management import call_command
+
+    from . import seed
+
+    call_command('migrate', verbosity=0)
+    if args.reset:
+        print("Removendo dados sintéticos anteriores...")
+        seed.reset()
+    seed.seed_certifications(args.certifications, batch_size=args.batch_size)
+    seed.seed_submissions(args.submissions, batch_size=args.batch_size * 2)
+    seed.finish()
+
+
+def wait_for_server(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health/", timeout=2):
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    raise RuntimeError(f"Servidor não respondeu em {base_url}")
+
+
+def start_server(port, workers, threads):
+    command = [
+        sys.executable, '-m', 'gunicorn', 'backend.wsgi',
+        '--bind', f"127.0.0.1:{port}",
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--log-level', 'warning',
+    ]
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings')
+    # As linhas JSON de métricas por requisição não interessam aqui
+    return subprocess.Popen(command, env=env, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+
+
+def cmd_run(args):
+    setup_django()
+    from django.db import connection
+
+    from certifications.models import Certification
+
+    from . import report
+    from .loadgen import run_scenario
+    from .scenarios import build_scenarios
+    from .seed import CODIGO_PREFIX
+
+    total = Certification.objects.filter(codigo__startswith=CODIGO_PREFIX).count()
+    if not total:
+        sys.exit("Nenhuma certificação sintética encontrada; execute 'python -m benchmarks seed' antes.")
+
+    base_url = args.base_url.rstrip('/')
+    server = None
+    if args.serve:
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, args.workers, args.threads)
+    try:
+        wait_for_server(base_url)
+        results = {}
+        for scenario in build_scenarios(total):
+            if args.scenario and scenario.name not in args.scenario:
+                continue
+            print(f"{scenario.name}: {args.duration:.0f}s com {args.concurrency} clientes...", flush=True)
+            results[scenario.name] = run_scenario(
+                base_url, scenario,
+                concurrency=args.concurrency, duration=args.duration, warmup=args.warmup,
+            )
+            summary = results[scenario.name]
+            print(
+                f"  {summary['throughput_rps']} req/s, p50 {summary['latency_ms']['p50']} ms, "
+                f"p95 {summary['latency_ms']['p95']} ms, p99 {summary['latency_ms']['p99']} ms, "
+                f"consultas {summary['queries']['mean']}, erros {summary['errors']}"
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    options = {
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'certifications': total,
+        'server': {'workers': args.workers, 'threads': args.threads} if args.serve else base_url,
+    }
+    result = report.build_report(results, connection.vendor, options)
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    report.save(result, args.output)
+    print(f"Relatório gravado em {args.output}")
+
+
+def cmd_compare(args):
+    from . import report
+
+    lines, regressions = report.compare(
+        report.load(args.report), report.load(args.baseline), threshold=args.threshold
+    )
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) em relação a {args.baseline}")
+        sys.exit(1)
+    print("\nSem regressões")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Benchmarks de carga")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = subparsers.add_parser('seed', help="Gera o conjunto de dados sintético")
+    seed_parser.add_argument('--certifications', type=int, default=100_000)
+    seed_parser.add_argument('--submissions', type=int, default=500_000)
+    seed_parser.add_argument('--batch-size', type=int, default=2000)
+    seed_parser.add_argument('--reset', action='store_true', help="Remove os dados sintéticos antes")
+    seed_parser.set_defaults(func=cmd_seed)
+
+    run_parser = subparsers.add_parser('run', help="Executa os cenários de carga")
+    run_parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    run_parser.add_argument('--serve', action='store_true', help="Inicia um gunicorn local com benchmarks.settings")
+    run_parser.add_argument('--port', type=int, default=8765)
+    run_parser.add_argument('--workers', type=int, default=3)
+    run_parser.add_argument('--threads', type=int, default=1)
+    run_parser.add_argument('--concurrency', type=int, default=16)
+    run_parser.add_argument('--duration', type=float, default=20.0)
+    run_parser.add_argument('--warmup', type=float, default=2.0)
+    run_parser.add_argument('--scenario', action='append', help="Executa só este cenário (pode repetir)")
+    run_parser.add_argument('--output', default='benchmarks/results/report.json')
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = subparsers.add_parser('compare', help="Compara um relatório com a baseline")
+    compare_parser.add_argument('report')
+    compare_parser.add_argument('--baseline', required=True)
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help="Tolerância relativa (0.2 = 20%%)")
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
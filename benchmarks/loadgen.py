@@ -0,0 +1,129 @@
+"""
+Gerador de carga HTTP concorrente (apenas biblioteca padrão).
+
+Cada thread mantém uma conexão keep-alive e repete requisições do cenário
+durante o tempo pedido; latência, status e número de consultas ao banco (do
+cabeçalho ``Server-Timing``) de cada resposta são registados.
+"""
+import http.client
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+SERVER_TIMING_QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class Scenario:
+    """
+    Um cenário de carga: ``make_request(rng)`` devolve ``(método, caminho, corpo)``;
+    o corpo é ``None`` ou bytes JSON.
+    """
+
+    def __init__(self, name, make_request, expected_statuses=(200,)):
+        self.name = name
+        self.make_request = make_request
+        self.expected_statuses = set(expected_statuses)
+
+
+class Sample:
+    __slots__ = ('latency', 'status', 'queries')
+
+    def __init__(self, latency, status, queries):
+        self.latency = latency
+        self.status = status
+        self.queries = queries
+
+
+def _worker(base_url, scenario, deadline, warmup_until, samples, seed):
+    rng = random.Random(seed)
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=30)
+    headers = {'Accept': 'application/json', 'Connection': 'keep-alive'}
+
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        method, path, body = scenario.make_request(rng)
+        request_headers = dict(headers, **({'Content-Type': 'application/json'} if body else {}))
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=request_headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+            timing = response.getheader('Server-Timing') or ''
+        except (OSError, http.client.HTTPException):
+            # Conexão perdida: conta como erro e reconecta
+            connection.close()
+            connection = connection_class(parts.hostname, parts.port, timeout=30)
+            status, timing = 0, ''
+        latency = time.perf_counter() - start
+
+        if start < warmup_until:
+            continue
+        match = SERVER_TIMING_QUERIES_RE.search(timing)
+        samples.append(Sample(latency, status, int(match.group(1)) if match else None))
+
+    connection.close()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_scenario(base_url, scenario, concurrency=8, duration=20.0, warmup=2.0, seed=0):
+    """Executa um cenário e devolve o resumo (vazão, percentis, consultas)"""
+    samples = []
+    started = time.perf_counter()
+    warmup_until = started + warmup
+    deadline = warmup_until + duration
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(base_url, scenario, deadline, warmup_until, samples, seed * 1000 + index),
+            daemon=True,
+        )
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return summarize(scenario, samples, duration, concurrency)
+
+
+def summarize(scenario, samples, duration, concurrency):
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    errors = sum(1 for sample in samples if sample.status not in scenario.expected_statuses)
+
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'concurrency': concurrency,
+        'duration_s': duration,
+        'throughput_rps': round(len(samples) / duration, 2) if duration else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 0.5), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3) if latencies else 0.0,
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+        'status': statuses,
+    }
@@ -0,0 +1,78 @@
+"""
+Relatório JSON dos benchmarks e comparação com uma baseline.
+"""
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results, database_vendor, options):
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'database': database_vendor,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'options': options,
+        },
+        'scenarios': results,
+    }
+
+
+def load(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def save(report, path):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2, ensure_ascii=False)
+        handle.write('\n')
+
+
+def compare(current, baseline, threshold=0.2, query_tolerance=0.5):
+    """
+    Compara dois relatórios cenário a cenário.
+
+    É regressão: p95 ou p99 acima de ``threshold`` (fração) da baseline, vazão
+    abaixo de ``threshold``, mais de ``query_tolerance`` consultas a mais em
+    média, ou erros onde a baseline não tinha. Retorna ``(linhas, regressões)``.
+    """
+    lines = []
+    regressions = []
+    for name, result in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            lines.append(f"{name}: sem baseline")
+            continue
+
+        checks = []
+        for key in ('p95', 'p99'):
+            now, before = result['latency_ms'][key], base['latency_ms'][key]
+            checks.append((f"{key} {before:.1f} -> {now:.1f} ms", before and now > before * (1 + threshold)))
+        now, before = result['throughput_rps'], base['throughput_rps']
+        checks.append((f"vazão {before:.1f} -> {now:.1f} req/s", now < before * (1 - threshold)))
+        now, before = result['queries']['mean'], base['queries']['mean']
+        if now is not None and before is not None:
+            checks.append((f"consultas {before} -> {now}", now > before + query_tolerance))
+        if result['errors'] and not base['errors']:
+            checks.append((f"erros 0 -> {result['errors']}", True))
+
+        failed = [label for label, regressed in checks if regressed]
+        regressions.extend(f"{name}: {label}" for label in failed)
+        status = 'REGRESSÃO' if failed else 'ok'
+        lines.append(f"{name}: {status} ({'; '.join(label for label, _ in checks)})")
+
+    return lines, regressions
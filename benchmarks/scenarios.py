@@ -0,0 +1,64 @@
+"""
+Cenários dos caminhos críticos, sobre os identificadores gerados por ``seed``.
+"""
+import json
+import uuid
+from urllib.parse import quote
+
+from .loadgen import Scenario
+from .seed import FIRST_NAMES, LAST_NAMES, SERVICES, codigo, unique_link
+
+# Fração de buscas por identificadores inexistentes (404)
+MISS_RATIO = 0.05
+
+
+def _pick(rng, total):
+    """Índice de um registo existente ou ``None`` para simular um 404"""
+    if rng.random() < MISS_RATIO:
+        return None
+    return rng.randrange(total)
+
+
+def build_scenarios(total_certifications):
+    def by_link(rng):
+        index = _pick(rng, total_certifications)
+        link = unique_link(index) if index is not None else f"missing-{uuid.uuid4().hex}"
+        return 'GET', f"/api/certifications/link/{link}/", None
+
+    def by_codigo(rng):
+        index = _pick(rng, total_certifications)
+        value = codigo(index) if index is not None else f"MISSING-{uuid.uuid4().hex[:12]}"
+        return 'GET', f"/api/certifications/codigo/{value}/", None
+
+    def public_view(rng):
+        index = _pick(rng, total_certifications)
+        link = unique_link(index) if index is not None else f"missing-{uuid.uuid4().hex}"
+        return 'GET', f"/api/certifications/view/{link}/", None
+
+    def listing(rng):
+        page = rng.randint(1, 20)
+        return 'GET', f"/api/certifications/?page={page}", None
+
+    def search(rng):
+        term = rng.choice([rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)])
+        return 'GET', f"/api/certifications/?search={quote(term)}", None
+
+    def submission_create(rng):
+        body = json.dumps({
+            'name': 'Benchmark Teste',
+            'email': f"load{rng.randrange(10**9)}@bench.invalid",
+            'phone': f"+2588{rng.randrange(10**7, 10**8)}",
+            'service': rng.choice(SERVICES),
+            'message': "Pedido de informação gerado pelo benchmark de carga.",
+            'consent': True,
+        }).encode('utf-8')
+        return 'POST', '/api/submissions/', body
+
+    return [
+        Scenario('get_by_link', by_link, expected_statuses=(200, 404)),
+        Scenario('get_by_codigo', by_codigo, expected_statuses=(200, 404)),
+        Scenario('public_view', public_view, expected_statuses=(200, 404)),
+        Scenario('list', listing),
+        Scenario('search', search),
+        Scenario('submission_create', submission_create, expected_statuses=(201, 202)),
+    ]
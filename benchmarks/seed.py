@@ -0,0 +1,170 @@
+"""
+Dados sintéticos para os benchmarks.
+
+Os identificadores são determinísticos (``BENCH-0000042`` / ``bench-0000042``),
+por isso os cenários de carga geram URLs válidas sem consultar o banco.
+
+O seed não envia ``certifications_bulk_created``: QR codes, PDFs e páginas
+estáticas de cada linha sintética não interessam aos cenários. Mantém só o
+índice de busca em cada lote e recalcula facetas e agregados em ``finish``.
+"""
+import contextlib
+import datetime
+import random
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from analytics import rollups
+from backend import caching
+from certifications import search
+from certifications.models import Certification, Modulo
+from facets import counts as facets
+from submissions.models import Submission
+
+CODIGO_PREFIX = 'BENCH-'
+LINK_PREFIX = 'bench-'
+EMAIL_DOMAIN = 'bench.invalid'
+
+FIRST_NAMES = [
+    'Ana', 'João', 'Maria', 'José', 'Fátima', 'António', 'Lúcia', 'Célio',
+    'Inês', 'Armando', 'Graça', 'Hélder', 'Sónia', 'Nélson', 'Amélia', 'Dércio',
+]
+LAST_NAMES = [
+    'Machava', 'Cossa', 'Mondlane', 'Tembe', 'Sitoe', 'Mabunda', 'Nhantumbo',
+    'Macuácua', 'Chissano', 'Guebuza', 'Muianga', 'Bila', 'Zandamela', 'Langa',
+]
+COURSES = [
+    'Gestão da Qualidade ISO 9001', 'Segurança da Informação ISO 27001',
+    'Gestão Ambiental ISO 14001', 'Saúde e Segurança Ocupacional ISO 45001',
+    'Auditoria Interna de Sistemas de Gestão', 'Segurança Alimentar ISO 22000',
+]
+MODULES = [
+    'Introdução à norma', 'Requisitos', 'Documentação', 'Auditoria interna',
+    'Ações corretivas', 'Análise crítica pela direção', 'Gestão de riscos',
+]
+SERVICES = ['Formação ISO 9001', 'Formação ISO 27001', 'Consultoria', 'Auditoria', 'Certificação']
+
+# Período coberto pelas datas sintéticas
+DAYS_SPAN = 3 * 365
+
+
+def codigo(index):
+    return f"{CODIGO_PREFIX}{index:07d}"
+
+
+def unique_link(index):
+    return f"{LINK_PREFIX}{index:07d}"
+
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+@contextlib.contextmanager
+def manual_timestamps(model, *field_names):
+    """Desliga ``auto_now``/``auto_now_add`` para gravar datas distribuídas no tempo"""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def reset():
+    """Remove os dados sintéticos de execuções anteriores"""
+    Certification.objects.filter(codigo__startswith=CODIGO_PREFIX).delete()
+    Submission.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+
+
+def seed_certifications(total, batch_size=2000, seed=42, log=print):
+    """Cria ``total`` certificações com 3 a 6 módulos cada"""
+    rng = random.Random(seed)
+    start = Certification.objects.filter(codigo__startswith=CODIGO_PREFIX).count()
+    now = timezone.now()
+    began = time.monotonic()
+
+    for offset in range(start, total, batch_size):
+        indexes = range(offset, min(offset + batch_size, total))
+        certifications = []
+        for index in indexes:
+            created = now - datetime.timedelta(minutes=rng.randrange(DAYS_SPAN * 24 * 60))
+            certifications.append(Certification(
+                nome_completo=person_name(rng),
+                documento=f"{rng.randrange(10**11, 10**12)}B",
+                curso=rng.choice(COURSES),
+                duracao=f"{rng.choice([40, 60, 80, 120])} horas",
+                carga_horaria=f"{rng.choice([40, 60, 80, 120])}h",
+                data_conclusao=created.date(),
+                ano=str(created.year),
+                codigo=codigo(index),
+                unique_link=unique_link(index),
+                status=rng.choice(['Aprovado'] * 8 + ['Reprovado', 'Em Andamento']),
+                declaracao="Declara-se que o estudante concluiu o curso com aproveitamento.",
+                created_at=created,
+                updated_at=created,
+            ))
+
+        with manual_timestamps(Certification, 'created_at', 'updated_at'), transaction.atomic():
+            created_objs = Certification.objects.bulk_create(certifications)
+            if created_objs and created_objs[0].pk is None:
+                # Backends sem RETURNING: recupera as chaves pelos códigos
+                ids = dict(Certification.objects.filter(
+                    codigo__in=[cert.codigo for cert in created_objs]
+                ).values_list('codigo', 'id'))
+                for cert in created_objs:
+                    cert.pk = ids[cert.codigo]
+            Modulo.objects.bulk_create([
+                Modulo(certification=cert, nome=nome)
+                for cert in created_objs
+                for nome in rng.sample(MODULES, rng.randint(3, 6))
+            ])
+            search.index_certifications(created_objs)
+        log(f"  certificações: {indexes.stop}/{total}")
+
+    log(f"Certificações prontas em {time.monotonic() - began:.1f}s")
+
+
+def seed_submissions(total, batch_size=5000, seed=43, log=print):
+    """Cria ``total`` submissões distribuídas no tempo"""
+    rng = random.Random(seed)
+    start = Submission.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").count()
+    now = timezone.now()
+    began = time.monotonic()
+
+    for offset in range(start, total, batch_size):
+        indexes = range(offset, min(offset + batch_size, total))
+        submissions = []
+        for index in indexes:
+            created = now - datetime.timedelta(minutes=rng.randrange(DAYS_SPAN * 24 * 60))
+            submissions.append(Submission(
+                name=person_name(rng),
+                email=f"user{index}@{EMAIL_DOMAIN}",
+                phone=f"+2588{rng.randrange(10**7, 10**8)}",
+                service=rng.choice(SERVICES),
+                message="Gostaria de receber mais informações sobre o curso e os horários.",
+                consent=True,
+                created_at=created,
+                updated_at=created,
+            ))
+        with manual_timestamps(Submission, 'created_at', 'updated_at'):
+            Submission.objects.bulk_create(submissions)
+        log(f"  submissões: {indexes.stop}/{total}")
+
+    log(f"Submissões prontas em {time.monotonic() - began:.1f}s")
+
+
+def finish(log=print):
+    """Recalcula facetas e agregados diários (bulk_create não dispara signals)"""
+    began = time.monotonic()
+    for model in (Certification, Submission):
+        facets.rebuild(model)
+    rollups.refresh_certification_days()
+    rollups.refresh_submission_days()
+    caching.bump_namespace(Certification, Modulo, Submission)
+    log(f"Facetas e agregados recalculados em {time.monotonic() - began:.1f}s")
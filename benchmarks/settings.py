@@ -0,0 +1,68 @@
+"""
+Settings do servidor de benchmark: as de produção sem limites de requisição.
+
+O banco vem de ``BENCH_DATABASE_URL`` (por padrão um SQLite em
+``benchmarks/results/``) e nunca do ``DATABASE_URL`` do ``.env``: o seed grava
+centenas de milhares de linhas sintéticas. Bancos fora desta máquina são
+recusados. Mídias, cache, páginas publicadas e fila também ficam em
+``benchmarks/results/``.
+"""
+import os
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+BENCH_DIR = Path(__file__).resolve().parent / 'results'
+os.makedirs(BENCH_DIR, exist_ok=True)
+
+# Definido antes de carregar as settings de produção, que montam DATABASES
+# (pool do PostgreSQL, PRAGMAs do SQLite) a partir do DATABASE_URL
+os.environ['DATABASE_URL'] = os.environ.get('BENCH_DATABASE_URL', f"sqlite:///{BENCH_DIR / 'bench.sqlite3'}")
+
+from backend.settings import *  # noqa: F401,F403,E402
+from backend.settings import BASE_DIR, DATABASES, REST_FRAMEWORK  # noqa: E402
+
+LOCAL_HOSTS = ('', 'localhost', '127.0.0.1', '::1')
+
+_database = DATABASES['default']
+if (_database.get('HOST') or '') not in LOCAL_HOSTS:
+    raise ImproperlyConfigured(
+        f"Benchmarks só correm contra um banco local (host: {_database['HOST']}). Ajuste BENCH_DATABASE_URL"
+    )
+if Path(str(_database['NAME'])).resolve() == (BASE_DIR / 'db.sqlite3').resolve():
+    raise ImproperlyConfigured("Benchmarks não usam o db.sqlite3 do projeto. Ajuste BENCH_DATABASE_URL")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'backend.sqlite_cache.SQLiteCache',
+        'LOCATION': str(BENCH_DIR / 'cache.sqlite3'),
+        'KEY_PREFIX': 'bench',
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 4},
+    },
+    'throttle': {
+        'BACKEND': 'backend.sqlite_cache.SQLiteCache',
+        'LOCATION': str(BENCH_DIR / 'throttle.sqlite3'),
+        'KEY_PREFIX': 'bench',
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 4},
+    },
+}
+THROTTLE_CACHE_ALIAS = 'throttle'
+MEDIA_ROOT = str(BENCH_DIR / 'media')
+DECLARATIONS_PUBLISH_ROOT = str(BENCH_DIR / 'published')
+SUBMISSION_QUEUE_PATH = str(BENCH_DIR / 'submission_queue.sqlite3')
+
+# Os PDFs e as páginas estáticas não fazem parte dos caminhos medidos
+CERTIFICATION_PDF_BACKGROUND = False
+DECLARATIONS_PUBLISH_ON_SAVE = False
+
+# O gerador de carga faz milhares de requisições por minuto do mesmo IP
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_THROTTLE_CLASSES=[],
+    DEFAULT_THROTTLE_RATES={'verificacao': None, 'pagina_publica': None, 'submissoes': None},
+)
+
+ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+
+# O número de consultas por requisição é lido do Server-Timing
+SERVER_TIMING_HEADER = True
@@ -2,6 +2,9 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.db import models
 from django.forms import Textarea
+from backend.admin_tools import EstimatedCountPaginator
+from facets.filters import FacetFieldListFilter
+from . import qr
 from .models import Certification, Modulo
 
 
@@ -18,12 +21,20 @@ class CertificationAdmin(admin.ModelAdmin):
     
     # Configurações de listagem
     list_display = ("student_info", "course_info", "status_display", "date_display", "link_display")
-    readonly_fields = ('link_card', 'created_at', 'updated_at')
-    list_filter = ("status", "ano", "data_conclusao", "curso")
+    readonly_fields = ('link_card', 'qr_card', 'created_at', 'updated_at')
+    list_filter = (
+        ("status", FacetFieldListFilter),
+        ("ano", FacetFieldListFilter),
+        "data_conclusao",
+        ("curso", FacetFieldListFilter),
+    )
     search_fields = ("nome_completo", "curso", "codigo", "documento")
     date_hierarchy = 'data_conclusao'
     list_per_page = 50
     ordering = ('-created_at',)
+    paginator = EstimatedCountPaginator
+    # Evita um segundo COUNT(*) da tabela inteira quando há filtros
+    show_full_result_count = False
 
     fieldsets = (
         ("Informações do Estudante", {
@@ -39,7 +50,7 @@ class CertificationAdmin(admin.ModelAdmin):
             'description': 'Status da certificação e texto da declaração'
         }),
         ("Link de Compartilhamento", {
-            "fields": ("unique_link", "link_card"),
+            "fields": ("unique_link", "link_card", "qr_card"),
             'description': 'Edite o link único ou deixe em branco para gerar automaticamente'
         }),
         ("Informações do Sistema", {
@@ -114,7 +125,7 @@ class CertificationAdmin(admin.ModelAdmin):
 
     def link_display(self, obj):
         if obj.unique_link:
-            public_url = f"https://www.cptec.co.mz/declaracoes/{obj.unique_link}"
+            public_url = qr.share_url(obj.unique_link)
             return format_html(
                 '<a href="{}" target="_blank" '
                 'style="background: #007bff; color: white; padding: 6px 12px; border-radius: 6px; '
@@ -128,7 +139,7 @@ class CertificationAdmin(admin.ModelAdmin):
     def link_card(self, obj):
         if obj.unique_link:
             public_url = f"/api/certifications/view/{obj.unique_link}/"
-            share_url = f"https://www.cptec.co.mz/declaracoes/{obj.unique_link}"
+            share_url = qr.share_url(obj.unique_link)
             return format_html(
                 '<div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); '
                 'padding: 24px; border-radius: 12px; color: white; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">'
@@ -212,6 +223,24 @@ class CertificationAdmin(admin.ModelAdmin):
         )
     link_card.short_description = 'Link para Compartilhar'
 
+    def qr_card(self, obj):
+        if obj.unique_link:
+            return format_html(
+                '<div style="display: flex; align-items: center; gap: 16px;">'
+                '<img src="{}" alt="QR code" width="140" height="140" '
+                'style="border: 1px solid #dee2e6; border-radius: 8px; background: white;">'
+                '<div style="display: flex; flex-direction: column; gap: 8px;">'
+                '<a href="{}" download style="color: #007bff;">⬇️ Baixar PNG</a>'
+                '<a href="{}" download style="color: #007bff;">⬇️ Baixar SVG</a>'
+                '</div>'
+                '</div>',
+                qr.qr_url(obj.unique_link, 'png'),
+                qr.qr_url(obj.unique_link, 'png'),
+                qr.qr_url(obj.unique_link, 'svg')
+            )
+        return format_html('<span style="color: #6c757d;">O QR code será gerado ao salvar</span>')
+    qr_card.short_description = 'QR Code'
+
     def save_model(self, request, obj, form, change):
         """Adiciona mensagens personalizadas ao salvar"""
         if not change:
@@ -239,10 +268,19 @@ class CertificationAdmin(admin.ModelAdmin):
 @admin.register(Modulo)
 class ModuloAdmin(admin.ModelAdmin):
     list_display = ("module_display", "certification_display", "course_display")
-    list_filter = ("certification__curso", "certification__status")
+    list_filter = (("certification__curso", FacetFieldListFilter), "certification__status")
     search_fields = ("nome", "certification__curso", "certification__nome_completo")
     ordering = ('-id',)
     list_per_page = 50
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Traz o nome e o curso da certificação na mesma consulta (sem N+1)"""
+        return super().get_queryset(request).annotate(
+            certification_nome=models.F('certification__nome_completo'),
+            certification_curso=models.F('certification__curso'),
+        )
 
     def module_display(self, obj):
         return format_html(
@@ -260,14 +298,16 @@ class ModuloAdmin(admin.ModelAdmin):
             '<strong>{}</strong>'
             '<small style="color: #6c757d;">ID: #{}</small>'
             '</div>',
-            obj.certification.nome_completo, obj.certification.id
+            obj.certification_nome, obj.certification_id
         )
     certification_display.short_description = 'Certificação'
+    certification_display.admin_order_field = 'certification_nome'
 
     def course_display(self, obj):
         return format_html(
             '<span style="background: #007bff; color: white; padding: 4px 10px; '
             'border-radius: 8px; font-size: 11px; font-weight: 500;">{}</span>',
-            obj.certification.curso[:30] + ('...' if len(obj.certification.curso) > 30 else '')
+            obj.certification_curso[:30] + ('...' if len(obj.certification_curso) > 30 else '')
         )
-    course_display.short_description = 'Curso'
\ No newline at end of file
+    course_display.short_description = 'Curso'
+    course_display.admin_order_field = 'certification_curso'
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Versões assíncronas das verificações públicas (modo ASGI, ``ASYNC_VIEWS = True``).
+
+Mesmo contrato que ``CertificationViewSet.get_by_link``/``get_by_codigo`` e
+``certification_public_view``: respostas do cache sem tocar no banco e, em
+caso de falha, ``aget`` do ORM assíncrono. Sob uvicorn, um worker atende
+vários pedidos enquanto outros esperam pelo cache ou pelo banco.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.views.decorators.http import require_safe
+from rest_framework import serializers, status
+
+from backend.async_support import json_response, throttled_response
+from backend.throttling import rate_limit_wait, too_many_requests
+
+from . import cache
+from .models import Certification
+from .serializers import CertificationSerializer, parse_fields, project
+from .views import CertificationViewSet, public_page_response, with_absolute_urls
+
+logger = logging.getLogger(__name__)
+
+
+async def _verification_response(request, field, value, action, label):
+    throttled = await throttled_response(request, CertificationViewSet, action)
+    if throttled is not None:
+        return throttled
+
+    try:
+        fields = parse_fields(request.GET.get('fields'), CertificationSerializer.Meta.fields)
+    except serializers.ValidationError as e:
+        return json_response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        data = await cache.aget_verification_payload(field, value)
+        return json_response(with_absolute_urls(project(data, fields), request.build_absolute_uri))
+    except Certification.DoesNotExist:
+        logger.warning(f"Certificação não encontrada para {label}: {value}")
+        return json_response(
+            {"error": "Certificação não encontrada"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        logger.error(f"Erro ao buscar certificação por {label}: {str(e)}")
+        return json_response(
+            {"error": "Erro ao buscar certificação"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_safe
+async def get_by_link(request, unique_link):
+    """Busca certificação por link único"""
+    return await _verification_response(request, 'unique_link', unique_link, 'get_by_link', 'link')
+
+
+@require_safe
+async def get_by_codigo(request, codigo):
+    """Busca certificação por código"""
+    return await _verification_response(request, 'codigo', codigo, 'get_by_codigo', 'código')
+
+
+async def certification_public_view(request, unique_link):
+    """Página pública da certificação (HTML do cache, 304 para pedidos condicionais)"""
+    wait = await sync_to_async(rate_limit_wait)(request, 'pagina_publica')
+    if wait is not None:
+        return too_many_requests(wait)
+    try:
+        page = await cache.aget_public_page(unique_link)
+    except Certification.DoesNotExist:
+        raise Http404("Certificação não encontrada")
+    return public_page_response(request, page)
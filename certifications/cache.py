@@ -0,0 +1,202 @@
+"""
+Cache de leitura (read-through) para as verificações públicas de certificações.
+
+Guarda o payload já serializado por ``unique_link`` e por ``codigo``, a página
+pública já renderizada por ``unique_link``, e também as buscas sem resultado
+(com TTL curto) para que leituras de QR codes inválidos não cheguem ao banco.
+"""
+import hashlib
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .images import get_srcset
+from .models import Certification
+
+logger = logging.getLogger(__name__)
+
+# Campos pelos quais uma certificação pode ser verificada publicamente
+LOOKUP_FIELDS = ('unique_link', 'codigo')
+
+# Marcador guardado no cache para buscas sem resultado
+NOT_FOUND = '__not_found__'
+
+PUBLIC_VIEW_TEMPLATE = 'certifications/public_view.html'
+
+
+def get_cache():
+    """Retorna o backend de cache configurado para as verificações"""
+    return caches[settings.CERTIFICATION_CACHE_ALIAS]
+
+
+def make_key(field, value):
+    """Monta a chave do cache para um campo de busca e valor"""
+    digest = hashlib.md5(str(value).encode('utf-8')).hexdigest()
+    return f"certifications:lookup:{field}:{digest}"
+
+
+def _lookup_key(field, value):
+    if field not in LOOKUP_FIELDS:
+        raise ValueError(f"Campo de busca não suportado: {field}")
+    return make_key(field, value)
+
+
+def _cached(value):
+    """Valor lido do cache (``None`` se ausente); levanta ``DoesNotExist`` para buscas sem resultado"""
+    if value == NOT_FOUND:
+        raise Certification.DoesNotExist
+    return value
+
+
+def _serialize(certification):
+    """
+    Payload guardado no cache.
+
+    Serializado sem request: a foto fica com URL relativa e é tornada
+    absoluta por quem responde, para o payload não depender do host.
+    """
+    # Import local para evitar import circular (serializers -> models)
+    from .serializers import CertificationSerializer
+
+    return dict(CertificationSerializer(certification).data)
+
+
+def get_verification_payload(field, value):
+    """
+    Retorna os dados serializados da certificação com ``field=value``.
+
+    Consulta o cache primeiro e só vai ao banco em caso de falha. Levanta
+    ``Certification.DoesNotExist`` quando a certificação não existe.
+    """
+    cache = get_cache()
+    key = _lookup_key(field, value)
+    payload = _cached(cache.get(key))
+    if payload is not None:
+        return payload
+
+    try:
+        certification = Certification.objects.prefetch_related('modulos').get(**{field: value})
+    except Certification.DoesNotExist:
+        cache.set(key, NOT_FOUND, settings.CERTIFICATION_CACHE_NEGATIVE_TIMEOUT)
+        raise
+
+    payload = _serialize(certification)
+    cache.set(key, payload, settings.CERTIFICATION_CACHE_TIMEOUT)
+    return payload
+
+
+async def aget_verification_payload(field, value):
+    """Versão assíncrona de ``get_verification_payload`` (cache e ORM assíncronos)"""
+    cache = get_cache()
+    key = _lookup_key(field, value)
+    payload = _cached(await cache.aget(key))
+    if payload is not None:
+        return payload
+
+    try:
+        certification = await Certification.objects.prefetch_related('modulos').aget(**{field: value})
+    except Certification.DoesNotExist:
+        await cache.aset(key, NOT_FOUND, settings.CERTIFICATION_CACHE_NEGATIVE_TIMEOUT)
+        raise
+
+    # Os módulos já vieram no prefetch, mas a foto e o QR code consultam o
+    # storage: a serialização corre fora do event loop
+    payload = await sync_to_async(_serialize)(certification)
+    await cache.aset(key, payload, settings.CERTIFICATION_CACHE_TIMEOUT)
+    return payload
+
+
+def make_etag(certification):
+    """ETag da página pública, derivado do id e de ``updated_at``"""
+    stamp = f"{certification.pk}:{certification.updated_at.isoformat()}"
+    return '"%s"' % hashlib.md5(stamp.encode('utf-8')).hexdigest()
+
+
+def render_public_page(certification):
+    """Renderiza o HTML da página pública de uma certificação"""
+    context = {
+        'certification': certification,
+        'modulos': certification.modulos.all(),
+        'foto_srcset': get_srcset(certification.foto),
+    }
+    return render_to_string(PUBLIC_VIEW_TEMPLATE, context)
+
+
+def get_public_page(unique_link):
+    """
+    Retorna a página pública renderizada como ``(html, etag, last_modified)``.
+
+    ``last_modified`` é um timestamp Unix. Levanta ``Certification.DoesNotExist``
+    quando a certificação não existe.
+    """
+    cache = get_cache()
+    key = make_key('page', unique_link)
+    page = _cached(cache.get(key))
+    if page is not None:
+        return page
+
+    try:
+        certification = Certification.objects.prefetch_related('modulos').get(unique_link=unique_link)
+    except Certification.DoesNotExist:
+        cache.set(key, NOT_FOUND, settings.CERTIFICATION_CACHE_NEGATIVE_TIMEOUT)
+        raise
+
+    page = (
+        render_public_page(certification),
+        make_etag(certification),
+        int(certification.updated_at.timestamp()),
+    )
+    cache.set(key, page, settings.CERTIFICATION_CACHE_TIMEOUT)
+    return page
+
+
+async def aget_public_page(unique_link):
+    """Versão assíncrona de ``get_public_page``"""
+    cache = get_cache()
+    key = make_key('page', unique_link)
+    page = _cached(await cache.aget(key))
+    if page is not None:
+        return page
+
+    try:
+        certification = await Certification.objects.prefetch_related('modulos').aget(unique_link=unique_link)
+    except Certification.DoesNotExist:
+        await cache.aset(key, NOT_FOUND, settings.CERTIFICATION_CACHE_NEGATIVE_TIMEOUT)
+        raise
+
+    # O template e o storage (foto) são síncronos: fora do event loop, para
+    # não bloquear os outros pedidos do worker
+    page = (
+        await sync_to_async(render_public_page)(certification),
+        make_etag(certification),
+        int(certification.updated_at.timestamp()),
+    )
+    await cache.aset(key, page, settings.CERTIFICATION_CACHE_TIMEOUT)
+    return page
+
+
+def invalidate(*identifiers):
+    """
+    Remove do cache as entradas de uma certificação.
+
+    Recebe pares ``(campo, valor)``; valores vazios são ignorados. O
+    ``unique_link`` também invalida a página pública renderizada.
+
+    A remoção acontece depois do commit da transação atual (de imediato fora
+    de transações): antes disso, um pedido concorrente ainda lê a linha
+    antiga e voltaria a guardá-la no cache.
+    """
+    identifiers = list(identifiers)
+    keys = [make_key(field, value) for field, value in identifiers if value]
+    keys += [make_key('page', value) for field, value in identifiers if field == 'unique_link' and value]
+    if keys:
+        transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def invalidate_certification(certification):
+    """Remove do cache todas as entradas de busca de uma certificação"""
+    invalidate(*((field, getattr(certification, field)) for field in LOOKUP_FIELDS))
@@ -0,0 +1,229 @@
+"""
+Declarações em PDF das certificações.
+
+O PDF é gerado uma vez por versão da certificação, identificada por
+``(id, updated_at)``, e guardado em ``certifications/pdf/<id>/declaracao.<hash>.pdf``.
+Ao gravar a certificação (ou os seus módulos, ou ao importar uma turma) a nova
+versão é gerada em segundo plano, depois do commit, pela tarefa de
+``certifications/tasks.py``; um pedido que chegue antes disso gera-a na hora.
+Um lock no cache compartilhado garante que cada versão é gerada uma só vez,
+mesmo com pedidos simultâneos em vários workers: quem não obtém o lock não
+espera por ele e recebe ``GenerationInProgress``.
+"""
+import hashlib
+import io
+import logging
+import os
+import posixpath
+import uuid
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from reportlab.graphics.barcode.qr import QrCodeWidget
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import ListFlowable, ListItem, Paragraph, SimpleDocTemplate, Spacer
+
+from backend.media import HASH_LENGTH
+
+from . import qr
+from .models import Certification
+
+logger = logging.getLogger(__name__)
+
+PDF_DIR = 'certifications/pdf'
+
+# Incrementar ao mudar o layout: todas as declarações passam a ser regeradas
+PDF_VERSION = 1
+
+
+class GenerationInProgress(Exception):
+    """O PDF está a ser gerado por outro pedido ou thread"""
+
+
+def version_token(pk, updated_at):
+    """Hash de ``(id, updated_at)``: nome do arquivo e ETag"""
+    stamp = f"{PDF_VERSION}:{pk}:{updated_at.isoformat()}"
+    return hashlib.md5(stamp.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+def pdf_name(pk, updated_at):
+    """Nome no storage do PDF de uma versão da certificação"""
+    return f"{PDF_DIR}/{pk}/declaracao.{version_token(pk, updated_at)}.pdf"
+
+
+def make_etag(pk, updated_at):
+    return '"%s"' % version_token(pk, updated_at)
+
+
+def name_token(name):
+    """Hash da versão contido no nome de um PDF de ``pdf_name``"""
+    return posixpath.basename(name).split('.')[-2]
+
+
+def snapshot(certification):
+    """Dados usados no PDF (os módulos devem vir no prefetch)"""
+    return {
+        'id': certification.pk,
+        'updated_at': certification.updated_at,
+        'nome_completo': certification.nome_completo,
+        'documento': certification.documento,
+        'curso': certification.curso,
+        'carga_horaria': certification.carga_horaria,
+        'data_conclusao': certification.data_conclusao,
+        'status': certification.status,
+        'codigo': certification.codigo,
+        'declaracao': certification.declaracao,
+        'modulos': [modulo.nome for modulo in certification.modulos.all()],
+        'link': qr.share_url(certification.unique_link),
+    }
+
+
+def render(data):
+    """Gera o PDF de uma declaração a partir de ``snapshot``; retorna os bytes"""
+    styles = getSampleStyleSheet()
+    body = ParagraphStyle('Corpo', parent=styles['BodyText'], fontSize=11, leading=16)
+    small = ParagraphStyle('Rodape', parent=body, fontSize=9, leading=12, textColor=colors.grey)
+
+    def paragraph(text, style=body):
+        return Paragraph(escape(str(text)).replace('\n', '<br/>'), style)
+
+    story = [
+        Paragraph('CPTec Academy', styles['Title']),
+        Paragraph('Declaração de Conclusão', styles['Heading2']),
+        Spacer(1, 0.5 * cm),
+        Paragraph(
+            f"Declara-se que <b>{escape(data['nome_completo'])}</b>, portador(a) do documento "
+            f"{escape(data['documento'])}, concluiu o curso <b>{escape(data['curso'])}</b>, "
+            f"com carga horária de {escape(data['carga_horaria'])}, em "
+            f"{data['data_conclusao'].strftime('%d/%m/%Y')}, com o estado <b>{escape(data['status'])}</b>.",
+            body
+        ),
+    ]
+    if data['declaracao']:
+        story += [Spacer(1, 0.4 * cm), paragraph(data['declaracao'])]
+    if data['modulos']:
+        story += [
+            Spacer(1, 0.4 * cm),
+            Paragraph('Módulos concluídos', styles['Heading4']),
+            ListFlowable(
+                [ListItem(paragraph(nome), leftIndent=12) for nome in data['modulos']],
+                bulletType='bullet', start='•'
+            ),
+        ]
+
+    code = QrCodeWidget(data['link'])
+    left, bottom, right, top = code.getBounds()
+    size = 3.5 * cm
+    drawing = Drawing(size, size, transform=[size / (right - left), 0, 0, size / (top - bottom), 0, 0])
+    drawing.add(code)
+    story += [
+        Spacer(1, 0.8 * cm),
+        drawing,
+        paragraph(f"Código de verificação: {data['codigo']}"),
+        paragraph(f"Verifique a autenticidade em {data['link']}", small),
+    ]
+
+    buffer = io.BytesIO()
+    # invariant: sem data de criação nem id aleatório, o mesmo conteúdo gera os mesmos bytes
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, invariant=True,
+        title=f"Declaração - {data['nome_completo']}", author='CPTec Academy',
+        leftMargin=2.5 * cm, rightMargin=2.5 * cm, topMargin=2.5 * cm, bottomMargin=2.5 * cm,
+    )
+    document.build(story)
+    return buffer.getvalue()
+
+
+def _write(name, content):
+    """Grava o PDF sem que outro processo leia um arquivo incompleto"""
+    temporary = default_storage.save(f"{name}.{uuid.uuid4().hex}.tmp", ContentFile(content))
+    os.replace(default_storage.path(temporary), default_storage.path(name))
+
+
+def _remove_stale(pk, keep):
+    """
+    Remove os PDFs da certificação mais antigos que ``keep`` (todos, sem ``keep``).
+
+    Compara pela data de gravação: dois threads a gerar versões diferentes ao
+    mesmo tempo não apagam o PDF um do outro.
+    """
+    directory = f"{PDF_DIR}/{pk}"
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    newest = os.stat(default_storage.path(keep)).st_mtime_ns if keep else None
+    for filename in files:
+        name = f"{directory}/{filename}"
+        if name == keep or filename.endswith('.tmp'):
+            continue
+        try:
+            if newest is None or os.stat(default_storage.path(name)).st_mtime_ns < newest:
+                default_storage.delete(name)
+        except FileNotFoundError:
+            pass
+
+
+def generate(pk):
+    """Gera o PDF da versão atual da certificação; retorna o nome no storage"""
+    certification = Certification.objects.prefetch_related('modulos').get(pk=pk)
+    name = pdf_name(certification.pk, certification.updated_at)
+    if not default_storage.exists(name):
+        _write(name, render(snapshot(certification)))
+        logger.info(f"Declaração em PDF gerada: {name}")
+    _remove_stale(pk, keep=name)
+    return name
+
+
+def get_pdf(pk, updated_at):
+    """
+    Retorna o nome do PDF da versão ``updated_at``, gerando-o se necessário.
+
+    Só um pedido gera cada versão; enquanto isso, os outros levantam
+    ``GenerationInProgress`` de imediato em vez de esperar. Se a certificação
+    mudou entretanto, é gerada (e retornada) a versão mais recente: use
+    ``name_token`` para saber qual.
+    """
+    name = pdf_name(pk, updated_at)
+    if default_storage.exists(name):
+        return name
+
+    cache = caches[settings.CERTIFICATION_CACHE_ALIAS]
+    lock = f"certifications:pdf:lock:{name}"
+    # O lock expira sozinho se o processo que gera o PDF morrer
+    if not cache.add(lock, 1, settings.CERTIFICATION_PDF_LOCK_TIMEOUT):
+        raise GenerationInProgress(name)
+    try:
+        return generate(pk)
+    finally:
+        cache.delete(lock)
+
+
+def generate_many(ids):
+    """Gera os PDFs das versões atuais das certificações ``ids`` (tarefa em segundo plano)"""
+    versions = list(Certification.objects.filter(pk__in=ids).values_list('pk', 'updated_at'))
+    for pk, updated_at in versions:
+        try:
+            get_pdf(pk, updated_at)
+        except GenerationInProgress:
+            # Outro pedido já está a gerar esta versão
+            pass
+        except Exception as e:
+            logger.error(f"Erro ao gerar a declaração em PDF da certificação {pk}: {str(e)}")
+
+
+def delete(pk):
+    """Remove todos os PDFs de uma certificação"""
+    _remove_stale(pk, keep=None)
+    directory = posixpath.join(PDF_DIR, str(pk))
+    try:
+        os.rmdir(default_storage.path(directory))
+    except OSError:
+        pass
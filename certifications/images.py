@@ -0,0 +1,181 @@
+"""
+Derivados redimensionados de ``Certification.foto``.
+
+No upload, a foto original é reduzida para larguras fixas em WebP e JPEG (sem
+EXIF) e os arquivos ficam ao lado do original, por exemplo
+``certifications/foto.<hash>.jpg`` -> ``certifications/foto.<hash>.jpg_w320.webp``
+(o nome inclui a extensão do original: ``foto.jpg`` e ``foto.png`` não
+partilham derivados). O serializer e a página pública usam esses derivados em
+``srcset``, para que a verificação em redes móveis carregue kilobytes em vez
+de megabytes.
+"""
+import io
+import logging
+import time
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Larguras geradas (a foto é exibida com 150px; 2x e 4x para ecrãs densos)
+DERIVATIVE_WIDTHS = (160, 320, 640)
+
+# Extensão -> (formato do Pillow, opções de gravação)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Tamanho de exibição usado no atributo ``sizes``
+DISPLAY_SIZE = '150px'
+
+# Fotos sem derivados voltam a ser verificadas no storage depois deste tempo
+# (segundos); as que têm derivados ficam registadas até o processo terminar
+MISSING_RECHECK = 60
+MAX_REMEMBERED = 10000
+
+# Nome da foto -> (tem derivados, momento da verificação)
+_availability = {}
+
+
+def derivative_name(name, width, ext):
+    """Nome do derivado de ``name`` para a largura e extensão dadas"""
+    return f"{name}_w{width}.{ext}"
+
+
+def derivative_names(name):
+    """Todos os nomes de derivados de uma foto"""
+    return [
+        derivative_name(name, width, ext)
+        for ext in DERIVATIVE_FORMATS
+        for width in DERIVATIVE_WIDTHS
+    ]
+
+
+def _prepare(image, ext):
+    """Aplica a orientação do EXIF e converte para um modo suportado"""
+    image = ImageOps.exif_transpose(image)
+    if ext == 'jpg' or image.mode not in ('RGB', 'RGBA'):
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # JPEG não tem transparência: compõe sobre fundo branco
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        else:
+            image = image.convert('RGB')
+    return image
+
+
+def generate_derivatives(field_file):
+    """
+    Gera os derivados de uma foto já gravada no storage.
+
+    Os derivados são regravados a partir do zero e não levam o EXIF do
+    original. Retorna a lista de nomes gerados.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        original = Image.open(source)
+        original.load()
+
+    generated = []
+    for ext, (pil_format, options) in DERIVATIVE_FORMATS.items():
+        prepared = _prepare(original, ext)
+        for width in DERIVATIVE_WIDTHS:
+            image = prepared
+            if image.width > width:
+                height = round(image.height * width / image.width)
+                image = image.resize((width, height), Image.LANCZOS)
+
+            buffer = io.BytesIO()
+            image.save(buffer, pil_format, **options)
+
+            name = derivative_name(field_file.name, width, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            generated.append(storage.save(name, ContentFile(buffer.getvalue())))
+
+    _remember(field_file.name, True)
+    logger.info(f"Derivados gerados para {field_file.name}: {len(generated)}")
+    return generated
+
+
+def delete_derivatives(storage, name):
+    """Remove os derivados de uma foto (ex.: quando a foto é trocada)"""
+    _availability.pop(name, None)
+    for derivative in derivative_names(name):
+        if storage.exists(derivative):
+            storage.delete(derivative)
+
+
+def _remember(name, available):
+    if len(_availability) >= MAX_REMEMBERED:
+        _availability.clear()
+    _availability[name] = (available, time.monotonic())
+
+
+def has_derivatives(storage, name):
+    """
+    Indica se os derivados de ``name`` já existem no storage.
+
+    Consulta o storage uma vez por foto e não por linha das listagens: os
+    nomes têm o hash do conteúdo, por isso os derivados de um nome não mudam.
+    """
+    available, checked_at = _availability.get(name, (False, None))
+    if available or (checked_at is not None and time.monotonic() - checked_at < MISSING_RECHECK):
+        return available
+    available = storage.exists(derivative_name(name, DERIVATIVE_WIDTHS[0], 'webp'))
+    _remember(name, available)
+    return available
+
+
+def get_srcset(field_file, build_url=None):
+    """
+    Retorna ``{'webp': srcset, 'jpeg': srcset, 'src': url, 'sizes': ...}`` da
+    foto, ou ``None`` se não houver foto ou os derivados ainda não existirem.
+
+    ``build_url`` permite tornar as URLs absolutas (ex.: ``request.build_absolute_uri``).
+    """
+    if not field_file:
+        return None
+
+    storage = field_file.storage
+    if not has_derivatives(storage, field_file.name):
+        return None
+
+    build_url = build_url or (lambda url: url)
+
+    def srcset(ext):
+        return ', '.join(
+            f"{build_url(storage.url(derivative_name(field_file.name, width, ext)))} {width}w"
+            for width in DERIVATIVE_WIDTHS
+        )
+
+    return {
+        'webp': srcset('webp'),
+        'jpeg': srcset('jpg'),
+        'src': build_url(storage.url(derivative_name(field_file.name, DERIVATIVE_WIDTHS[1], 'jpg'))),
+        'sizes': DISPLAY_SIZE,
+    }
+
+
+def absolutize_srcset(value, build_url):
+    """Torna absolutas as URLs de um ``get_srcset`` gerado com URLs relativas"""
+    if not value:
+        return value
+
+    def convert(srcset):
+        candidates = []
+        for candidate in srcset.split(', '):
+            url, descriptor = candidate.rsplit(' ', 1)
+            candidates.append(f"{build_url(url)} {descriptor}")
+        return ', '.join(candidates)
+
+    return dict(
+        value,
+        webp=convert(value['webp']),
+        jpeg=convert(value['jpeg']),
+        src=build_url(value['src']),
+    )
@@ -0,0 +1,227 @@
+"""
+Importação em lote de certificações (turmas inteiras) a partir de CSV ou JSONL.
+
+Cada lote é validado linha a linha sem consultas ao banco; a unicidade de
+``codigo`` e ``unique_link`` é verificada com uma única consulta por lote e as
+certificações e módulos são inseridos com ``bulk_create`` numa transação.
+"""
+import csv
+import io
+import json
+import logging
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from .models import Certification, Modulo
+from .serializers import CertificationSerializer
+from .signals import certifications_bulk_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+# Separador dos módulos numa coluna CSV ("Módulo 1; Módulo 2")
+CSV_MODULO_SEPARATOR = ';'
+
+FORMATS = ('csv', 'jsonl')
+
+
+class CertificationImportSerializer(CertificationSerializer):
+    """
+    Valida uma linha de importação.
+
+    A unicidade de ``codigo`` fica a cargo do importador (uma consulta por
+    lote), por isso o validador de unicidade por linha é removido.
+    """
+    modulos = serializers.ListField(
+        child=serializers.CharField(max_length=200), required=False, default=list
+    )
+
+    class Meta(CertificationSerializer.Meta):
+        fields = [
+            'nome_completo', 'documento', 'curso', 'duracao', 'carga_horaria',
+            'data_conclusao', 'ano', 'codigo', 'status', 'declaracao',
+            'descricao', 'unique_link', 'modulos'
+        ]
+        read_only_fields = []
+        extra_kwargs = {
+            'codigo': {'validators': []},
+            'unique_link': {'validators': [], 'required': False},
+        }
+
+    def validate_codigo(self, value):
+        """Valida o código sem consultar o banco"""
+        if not value or len(value.strip()) < 3:
+            raise serializers.ValidationError("Código deve ter pelo menos 3 caracteres")
+        return value.strip()
+
+    def validate_unique_link(self, value):
+        return value.strip() if value else value
+
+
+def parse_rows(stream, fmt):
+    """
+    Lê as linhas de um arquivo CSV ou JSONL e devolve ``(numero_linha, dados)``.
+
+    ``stream`` pode ser binário ou texto. No CSV, os módulos vêm numa coluna
+    ``modulos`` separados por ``;``.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato não suportado: {fmt}")
+
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.BytesIO(stream)
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig')
+
+    if fmt == 'csv':
+        # A linha 1 é o cabeçalho
+        for number, row in enumerate(csv.DictReader(stream), start=2):
+            row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+            modulos = row.pop('modulos', '')
+            row['modulos'] = [nome.strip() for nome in modulos.split(CSV_MODULO_SEPARATOR) if nome.strip()]
+            yield number, {key: value for key, value in row.items() if value != ''}
+        return
+
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, e
+            continue
+        yield number, row
+
+
+class ImportResult:
+    """Resumo de uma importação: quantidade criada e erros por linha"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        errors = {field: [str(message) for message in messages] for field, messages in errors.items()}
+        self.errors.append({'linha': line, 'erros': errors})
+
+    def as_dict(self):
+        return {'criadas': self.created, 'erros': sorted(self.errors, key=lambda error: error['linha'])}
+
+
+class CertificationImporter:
+    """Importa certificações em lotes com ``bulk_create``"""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        # Identificadores já aceitos em lotes anteriores desta importação
+        self.seen_codigos = set()
+        self.seen_links = set()
+        # Um só serializer para todas as linhas: os campos são construídos uma vez
+        self.validator = CertificationImportSerializer()
+
+    def run(self, rows):
+        """Importa um iterável de ``(numero_linha, dados)``"""
+        result = ImportResult()
+        batch = []
+        for number, data in rows:
+            if isinstance(data, Exception):
+                result.add_error(number, {'non_field_errors': [f"JSON inválido: {data}"]})
+                continue
+            if not isinstance(data, dict):
+                result.add_error(number, {'non_field_errors': ["Linha deve ser um objeto"]})
+                continue
+            # Módulos podem vir como texto ou como objetos {"nome": ...}
+            data = dict(data, modulos=[
+                modulo.get('nome', '') if isinstance(modulo, dict) else modulo
+                for modulo in data.get('modulos') or []
+            ])
+            batch.append((number, data))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch, result)
+                batch = []
+        if batch:
+            self.import_batch(batch, result)
+        return result
+
+    def import_batch(self, batch, result):
+        valid = []
+        for number, data in batch:
+            try:
+                valid.append((number, dict(self.validator.run_validation(data))))
+            except serializers.ValidationError as e:
+                result.add_error(number, e.detail)
+
+        valid = self.check_uniqueness(valid, result)
+        if self.dry_run:
+            result.created += len(valid)
+            return
+        if not valid:
+            return
+
+        certifications, modulos_by_index = [], []
+        for number, data in valid:
+            nomes = data.pop('modulos', [])
+            if not data.get('unique_link'):
+                data['unique_link'] = str(uuid.uuid4())
+            certifications.append(Certification(**data))
+            modulos_by_index.append(nomes)
+
+        try:
+            with transaction.atomic():
+                created = Certification.objects.bulk_create(certifications)
+                Modulo.objects.bulk_create([
+                    Modulo(certification=certification, nome=nome)
+                    for certification, nomes in zip(created, modulos_by_index)
+                    for nome in nomes
+                ])
+                transaction.on_commit(
+                    lambda: certifications_bulk_created.send(sender=Certification, instances=created)
+                )
+        except IntegrityError as e:
+            # Outro processo gravou os mesmos identificadores entre a verificação e o INSERT
+            logger.error(f"Erro de integridade ao importar lote: {str(e)}")
+            for number, _ in valid:
+                result.add_error(number, {'non_field_errors': ["Lote não importado: conflito de código ou link"]})
+            return
+
+        result.created += len(created)
+        logger.info(f"Lote importado: {len(created)} certificações")
+
+    def check_uniqueness(self, valid, result):
+        """
+        Remove do lote as linhas com ``codigo``/``unique_link`` repetidos,
+        no próprio lote ou já existentes no banco (uma única consulta).
+        """
+        codigos = {data['codigo'] for _, data in valid}
+        links = {data['unique_link'] for _, data in valid if data.get('unique_link')}
+
+        existing = Certification.objects.filter(
+            Q(codigo__in=codigos) | Q(unique_link__in=links)
+        ).values_list('codigo', 'unique_link')
+        taken_codigos, taken_links = self.seen_codigos, self.seen_links
+        for codigo, link in existing:
+            taken_codigos.add(codigo)
+            taken_links.add(link)
+
+        accepted = []
+        for number, data in valid:
+            errors = {}
+            if data['codigo'] in taken_codigos:
+                errors['codigo'] = ["Já existe uma certificação com este código"]
+            link = data.get('unique_link')
+            if link and link in taken_links:
+                errors['unique_link'] = ["Este link já está sendo usado por outra certificação."]
+            if errors:
+                result.add_error(number, errors)
+                continue
+            taken_codigos.add(data['codigo'])
+            if link:
+                taken_links.add(link)
+            accepted.append((number, data))
+        return accepted
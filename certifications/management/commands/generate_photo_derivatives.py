@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from backend import caching
+from certifications import cache
+from certifications.images import DERIVATIVE_WIDTHS, derivative_name, generate_derivatives
+from certifications.models import Certification
+
+
+class Command(BaseCommand):
+    help = "Gera os derivados redimensionados (WebP/JPEG) das fotos já existentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Regenera também as fotos que já têm derivados"
+        )
+
+    def handle(self, *args, **options):
+        generated, failed = 0, 0
+        certifications = Certification.objects.exclude(foto='').exclude(foto__isnull=True)
+        for certification in certifications.only('pk', 'foto', 'unique_link', 'codigo').iterator():
+            foto = certification.foto
+            first = derivative_name(foto.name, DERIVATIVE_WIDTHS[0], 'webp')
+            if not options['force'] and foto.storage.exists(first):
+                continue
+            try:
+                generate_derivatives(foto)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Certificação #{certification.pk} ({foto.name}): {e}")
+                continue
+            cache.invalidate_certification(certification)
+            generated += 1
+
+        if generated:
+            # As listagens em cache passam a incluir os novos srcset
+            caching.bump_namespace(Certification)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Derivados gerados para {generated} fotos, {failed} com erro"
+        ))
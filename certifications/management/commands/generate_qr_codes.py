@@ -0,0 +1,34 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from certifications import qr
+from certifications.models import Certification
+
+
+class Command(BaseCommand):
+    help = "Gera os QR codes (PNG/SVG) das certificações que ainda não os têm"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Regenera também os QR codes que já existem"
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Processos que geram as imagens (padrão: número de CPUs)"
+        )
+
+    def handle(self, *args, **options):
+        links = (
+            Certification.objects.exclude(unique_link='').exclude(unique_link__isnull=True)
+            .values_list('unique_link', flat=True).iterator()
+        )
+        # A geração (CPU) corre num pool; a gravação no storage fica neste processo
+        generated, errors = qr.generate_many(links, force=options['force'], workers=options['workers'])
+        for link, error in errors:
+            self.stderr.write(f"{link}: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"QR codes gerados para {generated} certificações, {len(errors)} com erro"
+        ))
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import background
+from certifications.importers import DEFAULT_BATCH_SIZE, FORMATS, CertificationImporter, parse_rows
+
+
+class Command(BaseCommand):
+    help = "Importa certificações (com módulos) em lote a partir de um arquivo CSV ou JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help="Caminho do arquivo .csv ou .jsonl")
+        parser.add_argument(
+            '--formato', choices=FORMATS,
+            help="Formato do arquivo (por omissão, deduzido da extensão)"
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help=f"Quantidade de linhas por transação (padrão: {DEFAULT_BATCH_SIZE})"
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Valida o arquivo sem gravar nada no banco"
+        )
+        parser.add_argument(
+            '--wait', action='store_true',
+            help="Espera pela geração dos QR codes, PDFs e páginas estáticas antes de terminar"
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['arquivo'])
+        if not path.exists():
+            raise CommandError(f"Arquivo não encontrado: {path}")
+
+        fmt = options['formato'] or path.suffix.lstrip('.').lower()
+        if fmt not in FORMATS:
+            raise CommandError("Formato desconhecido; use --formato csv ou --formato jsonl")
+
+        importer = CertificationImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        with path.open('rb') as stream:
+            result = importer.run(parse_rows(stream, fmt))
+
+        for error in result.as_dict()['erros']:
+            messages = '; '.join(
+                f"{field}: {' '.join(errors)}" for field, errors in error['erros'].items()
+            )
+            self.stderr.write(f"Linha {error['linha']}: {messages}")
+
+        action = "validadas" if options['dry_run'] else "importadas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} certificações {action}, {len(result.errors)} linhas com erro"
+        ))
+        if options['dry_run'] or not result.created:
+            return
+
+        # Os arquivos de cada certificação são gerados numa tarefa em segundo
+        # plano, que termina com o processo se não houver --wait
+        if options['wait']:
+            background.flush_all()
+            self.stdout.write("QR codes, PDFs e páginas estáticas gerados")
+        else:
+            self.stdout.write(
+                "QR codes e páginas estáticas: use --wait ou os comandos generate_qr_codes e "
+                "publish_declarations (os PDFs são gerados no primeiro download)"
+            )
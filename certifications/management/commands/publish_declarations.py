@@ -0,0 +1,31 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from certifications import publishing
+
+
+class Command(BaseCommand):
+    help = (
+        "Publica as páginas públicas das certificações como HTML estático "
+        "pré-comprimido (só as alteradas desde a última publicação)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Ignora o manifesto: renderiza todas as páginas e remove diretórios órfãos"
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Processos que comprimem as páginas (padrão: número de CPUs)"
+        )
+
+    def handle(self, *args, **options):
+        # A renderização usa o banco e fica neste processo; gzip/brotli correm no pool
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            published, unchanged, removed = publishing.publish(full=options['full'], pool=pool)
+        self.stdout.write(self.style.SUCCESS(
+            f"{published} páginas publicadas, {unchanged} inalteradas, {removed} removidas"
+        ))
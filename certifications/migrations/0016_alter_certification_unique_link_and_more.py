@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0015_alter_modulo_options_alter_certification_ano_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certification',
+            name='unique_link',
+            field=models.CharField(blank=True, db_index=True, help_text='Você pode editar este link. Deixe em branco para gerar automaticamente.', max_length=100, null=True, unique=True, verbose_name='Link Único de Compartilhamento'),
+        ),
+        migrations.AddIndex(
+            model_name='certification',
+            index=models.Index(fields=['-created_at', '-id'], name='certificati_created_4f6761_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certification',
+            index=models.Index(fields=['-data_conclusao', '-id'], name='certificati_data_co_4b87c8_idx'),
+        ),
+    ]
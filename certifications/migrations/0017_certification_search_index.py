@@ -0,0 +1,57 @@
+from django.db import migrations
+
+FTS_TABLE = 'certifications_certification_fts'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "nome_completo, documento, codigo, curso, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, nome_completo, documento, codigo, curso) "
+            "SELECT id, nome_completo, documento, codigo, curso FROM certifications_certification"
+        )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # unaccent() não é IMMUTABLE; o wrapper permite usá-lo em índices
+        schema_editor.execute(
+            "CREATE OR REPLACE FUNCTION certifications_unaccent(text) RETURNS text AS "
+            "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS certifications_search_gin ON certifications_certification "
+            "USING gin (to_tsvector('simple', certifications_unaccent("
+            "coalesce(nome_completo, '') || ' ' || coalesce(documento, '') || ' ' || "
+            "coalesce(codigo, '') || ' ' || coalesce(curso, ''))))"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS certifications_nome_trgm ON certifications_certification "
+            "USING gin (certifications_unaccent(nome_completo) gin_trgm_ops)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS certifications_nome_trgm")
+        schema_editor.execute("DROP INDEX IF EXISTS certifications_search_gin")
+        schema_editor.execute("DROP FUNCTION IF EXISTS certifications_unaccent(text)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0016_alter_certification_unique_link_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
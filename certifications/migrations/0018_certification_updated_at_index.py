@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0017_certification_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certification',
+            index=models.Index(fields=['updated_at', 'id'], name='certificati_updated_588523_idx'),
+        ),
+    ]
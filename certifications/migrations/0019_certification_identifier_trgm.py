@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_identifier_indexes(apps, schema_editor):
+    # Trechos de documento/codigo (icontains = UPPER(campo) LIKE UPPER(%s)) pelos trigramas
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in ('documento', 'codigo'):
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS certifications_{field}_trgm ON certifications_certification "
+            f"USING gin (UPPER({field}) gin_trgm_ops)"
+        )
+
+
+def drop_identifier_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in ('documento', 'codigo'):
+        schema_editor.execute(f"DROP INDEX IF EXISTS certifications_{field}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certifications', '0018_certification_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_identifier_indexes, drop_identifier_indexes),
+    ]
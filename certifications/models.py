@@ -3,6 +3,8 @@ from django.core.validators import MinLengthValidator
 from django.core.exceptions import ValidationError
 import uuid
 
+from backend.media import content_hashed_name
+
 
 class Certification(models.Model):
     nome_completo = models.CharField(
@@ -120,6 +122,9 @@ class Certification(models.Model):
         # Gera link automático apenas se estiver vazio
         if not self.unique_link:
             self.unique_link = str(uuid.uuid4())
+        # Fotos novas recebem o hash do conteúdo no nome, para cache imutável
+        if self.foto and not self.foto._committed:
+            self.foto.name = content_hashed_name(self.foto.name, self.foto.file)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -128,6 +133,13 @@ class Certification(models.Model):
     class Meta:
         verbose_name = 'Certificação'
         verbose_name_plural = 'Certificações'
+        indexes = [
+            # Suporte à paginação por cursor (ver pagination.py)
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['-data_conclusao', '-id']),
+            # Cursor do feed de alterações (ver changes/feed.py)
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
 
 class Modulo(models.Model):
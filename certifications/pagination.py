@@ -0,0 +1,145 @@
+"""
+Paginação por cursor (keyset) para a listagem de certificações.
+
+Em vez de OFFSET + COUNT(*), cada página continua a partir da posição
+``(campo, id)`` do último item, usando os índices compostos de
+``Certification.Meta.indexes``. A ordem é estável mesmo com inserções
+concorrentes, pois o ``id`` desempata registros com o mesmo valor.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .models import Certification
+
+
+class CertificationKeysetPagination(BasePagination):
+    """
+    Paginação por cursor sobre ``(created_at, id)`` ou ``(data_conclusao, id)``.
+
+    Ativada com ``?paginacao=cursor`` (ou quando um ``cursor`` é enviado). A
+    ordenação segue o parâmetro ``ordering`` quando ele é um dos campos
+    suportados; caso contrário usa ``-created_at``.
+    """
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 50)
+    cursor_query_param = 'cursor'
+    mode_query_param = 'paginacao'
+    mode_value = 'cursor'
+    ordering_fields = ('created_at', 'data_conclusao')
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Cursor inválido'
+
+    @classmethod
+    def is_requested(cls, request):
+        """Indica se o cliente pediu paginação por cursor"""
+        params = request.query_params
+        return params.get(cls.mode_query_param) == cls.mode_value or cls.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request)
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        # Ao voltar uma página, percorre o índice no sentido contrário
+        if descending != reverse:
+            queryset = queryset.order_by(f'-{field}', '-id')
+        else:
+            queryset = queryset.order_by(field, 'id')
+
+        if cursor:
+            lookup = 'lt' if descending != reverse else 'gt'
+            # O __lte/__gte redundante dá ao banco o início do intervalo no índice
+            queryset = queryset.filter(**{f'{field}__{lookup}e': cursor['value']}).filter(
+                Q(**{f'{field}__{lookup}': cursor['value']}) |
+                Q(**{field: cursor['value'], f'id__{lookup}': cursor['id']})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get('ordering', '').split(',')[0].strip()
+        if ordering.lstrip('-') in self.ordering_fields:
+            return ordering
+        return self.default_ordering
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        field = Certification._meta.get_field(self.ordering.lstrip('-'))
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return {
+                'value': field.to_python(position['v']),
+                'id': int(position['id']),
+                'reverse': bool(position.get('r')),
+            }
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse=False):
+        field = self.ordering.lstrip('-')
+        # Aceita instâncias ou linhas de values() (serialização rápida)
+        if isinstance(instance, dict):
+            value, pk = instance[field], instance['id']
+        else:
+            value, pk = getattr(instance, field), instance.pk
+        position = {'v': value.isoformat(), 'id': pk}
+        if reverse:
+            position['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,267 @@
+"""
+Exportação estática das páginas públicas das declarações.
+
+Cada certificação tem a sua página renderizada de ``public_view.html`` em
+``<DECLARATIONS_PUBLISH_ROOT>/declaracoes/<unique_link>/index.html``, com as
+versões pré-comprimidas ``index.html.gz`` e ``index.html.br`` (esta só com o
+pacote ``brotli``). Um servidor de arquivos (nginx com ``gzip_static`` e
+``brotli_static``, um CDN, ``whitenoise``) serve então as verificações sem
+passar pelo Python.
+
+O manifesto guarda, por id, o link e o ``updated_at`` publicados, num
+arquivo por certificação (``manifest/<id>.json``): o comando
+``publish_declarations`` só volta a renderizar as linhas que mudaram desde a
+última publicação e remove as páginas de certificações apagadas ou com link
+alterado, e republicar uma página lê e grava só a entrada dela.
+
+Ao gravar uma certificação (ou os seus módulos) a página é republicada em
+segundo plano depois do commit, pela tarefa de ``certifications/tasks.py``
+(``DECLARATIONS_PUBLISH_ON_SAVE``); várias gravações seguidas da mesma
+certificação resultam numa só publicação.
+"""
+import fcntl
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+
+from . import cache
+from .models import Certification
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PAGES_DIR = 'declaracoes'
+INDEX_FILE = 'index.html'
+MANIFEST_DIR = 'manifest'
+LOCK_FILE = 'manifest.lock'
+# Manifesto num só arquivo, de versões anteriores (convertido na primeira publicação)
+LEGACY_MANIFEST_FILE = 'manifest.json'
+
+# Qualidade do brotli: máxima no comando publish_declarations; mais baixa ao
+# republicar depois de gravar, em que a compressão corre a cada gravação
+BROTLI_QUALITY = 11
+SAVE_BROTLI_QUALITY = 5
+
+# Certificações renderizadas por consulta na publicação
+BATCH_SIZE = 500
+
+
+def is_enabled():
+    """Indica se as páginas são republicadas ao gravar"""
+    return settings.DECLARATIONS_PUBLISH_ON_SAVE
+
+
+def page_directory(unique_link):
+    """Diretório da página de um link, ou ``None`` se o link não serve de caminho"""
+    if not unique_link or '/' in unique_link or '\\' in unique_link or unique_link in ('.', '..'):
+        return None
+    return os.path.join(settings.DECLARATIONS_PUBLISH_ROOT, PAGES_DIR, unique_link)
+
+
+def compress(content, brotli_quality=BROTLI_QUALITY):
+    """Conteúdo e versões pré-comprimidas, por sufixo do arquivo"""
+    # mtime=0: a mesma página gera sempre os mesmos bytes
+    variants = {'': content, '.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, mode=brotli.MODE_TEXT, quality=brotli_quality)
+    return variants
+
+
+def _write(path, content):
+    """Grava sem que o servidor de arquivos leia um arquivo incompleto"""
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(content)
+    os.replace(temporary, path)
+
+
+def render_page(certification):
+    """HTML da página de uma certificação (módulos no prefetch)"""
+    return cache.render_public_page(certification).encode('utf-8')
+
+
+def write_page(unique_link, variants):
+    """Grava a página e as versões comprimidas de ``compress``"""
+    directory = page_directory(unique_link)
+    os.makedirs(directory, exist_ok=True)
+    for suffix, content in variants.items():
+        _write(os.path.join(directory, INDEX_FILE + suffix), content)
+
+
+def remove_page(unique_link):
+    directory = page_directory(unique_link)
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def manifest_entry(unique_link, updated_at):
+    return {'link': unique_link, 'updated_at': updated_at.isoformat()}
+
+
+def _entry_path(pk):
+    return os.path.join(settings.DECLARATIONS_PUBLISH_ROOT, MANIFEST_DIR, f"{pk}.json")
+
+
+def read_entry(pk):
+    """Entrada publicada de uma certificação, ou ``None``"""
+    try:
+        with open(_entry_path(pk), 'rb') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_entry(pk, entry):
+    _write(_entry_path(pk), json.dumps(entry).encode('utf-8'))
+
+
+def remove_entry(pk):
+    try:
+        os.remove(_entry_path(pk))
+    except FileNotFoundError:
+        pass
+
+
+def read_manifest():
+    """Todas as entradas publicadas, como ``{id: entrada}``"""
+    directory = os.path.join(settings.DECLARATIONS_PUBLISH_ROOT, MANIFEST_DIR)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return {}
+    entries = {}
+    for name in names:
+        pk, ext = os.path.splitext(name)
+        if ext == '.json' and pk.isdigit():
+            entry = read_entry(pk)
+            if entry is not None:
+                entries[int(pk)] = entry
+    return entries
+
+
+def _convert_legacy_manifest(root):
+    """Passa o ``manifest.json`` antigo para um arquivo por certificação"""
+    path = os.path.join(root, LEGACY_MANIFEST_FILE)
+    try:
+        with open(path, 'rb') as file:
+            pages = json.load(file).get('pages', {})
+    except FileNotFoundError:
+        return
+    except ValueError:
+        pages = {}
+    for pk, entry in pages.items():
+        write_entry(pk, entry)
+    os.remove(path)
+
+
+@contextmanager
+def manifest_lock():
+    """Lock exclusivo entre os processos que publicam páginas"""
+    root = settings.DECLARATIONS_PUBLISH_ROOT
+    os.makedirs(os.path.join(root, MANIFEST_DIR), exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        _convert_legacy_manifest(root)
+        yield
+
+
+def _publish_rows(ids, previous, pool=None, brotli_quality=BROTLI_QUALITY):
+    """
+    Renderiza as certificações ``ids`` e grava as suas entradas do manifesto.
+
+    ``previous`` tem as entradas já publicadas (``{id: entrada}``), para
+    remover a página de um link alterado. Com ``pool`` (um ``Executor``), a
+    compressão, que é a parte mais cara, corre nos processos do pool.
+    """
+    compressor = partial(compress, brotli_quality=brotli_quality)
+    published = 0
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = Certification.objects.prefetch_related('modulos').filter(pk__in=ids[start:start + BATCH_SIZE])
+        pending = []
+        for certification in batch:
+            entry = previous.get(certification.pk)
+            if entry and entry['link'] != certification.unique_link:
+                remove_page(entry['link'])
+                remove_entry(certification.pk)
+            if page_directory(certification.unique_link) is None:
+                logger.warning(f"Link inválido para publicação: {certification.unique_link}")
+                continue
+            pending.append((certification, render_page(certification)))
+
+        htmls = [html for _, html in pending]
+        compressed = pool.map(compressor, htmls, chunksize=16) if pool else map(compressor, htmls)
+        for (certification, _), variants in zip(pending, compressed):
+            write_page(certification.unique_link, variants)
+            write_entry(certification.pk, manifest_entry(certification.unique_link, certification.updated_at))
+            published += 1
+    return published
+
+
+def publish(full=False, pool=None):
+    """
+    Publica as páginas de todas as certificações.
+
+    Sem ``full``, só as que mudaram desde o manifesto. Retorna
+    ``(publicadas, inalteradas, removidas)``.
+    """
+    with manifest_lock():
+        entries = read_manifest()
+        current = {
+            pk: manifest_entry(link, updated_at)
+            for pk, link, updated_at in Certification.objects.values_list('pk', 'unique_link', 'updated_at').iterator()
+        }
+
+        removed = 0
+        for pk in [pk for pk in entries if pk not in current]:
+            remove_page(entries.pop(pk)['link'])
+            remove_entry(pk)
+            removed += 1
+        if full:
+            removed += _remove_orphans({entry['link'] for entry in current.values()})
+
+        changed = [pk for pk, entry in current.items() if full or entries.get(pk) != entry]
+        published = _publish_rows(changed, entries, pool)
+    return published, len(current) - len(changed), removed
+
+
+def _remove_orphans(links):
+    """Remove diretórios de páginas sem certificação (ex.: manifesto perdido)"""
+    root = os.path.join(settings.DECLARATIONS_PUBLISH_ROOT, PAGES_DIR)
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return 0
+    orphans = [name for name in names if name not in links]
+    for name in orphans:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return len(orphans)
+
+
+def publish_certifications(ids):
+    """
+    Republica (ou remove, se apagadas) as páginas das certificações ``ids``.
+
+    Lê e grava só as entradas do manifesto destas certificações.
+    """
+    ids = list(dict.fromkeys(ids))
+    with manifest_lock():
+        existing = set(Certification.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        previous = {pk: read_entry(pk) for pk in ids}
+        for pk in ids:
+            if pk not in existing and previous[pk]:
+                remove_page(previous[pk]['link'])
+                remove_entry(pk)
+        return _publish_rows(
+            [pk for pk in ids if pk in existing], previous, brotli_quality=SAVE_BROTLI_QUALITY
+        )
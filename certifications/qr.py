@@ -0,0 +1,147 @@
+"""
+QR codes (PNG e SVG) do link de compartilhamento de cada certificação.
+
+Os arquivos são gerados em segundo plano depois de gravar a certificação (ver
+``certifications/tasks.py``) e só voltam a ser gerados quando o
+``unique_link`` muda. O nome leva um hash do conteúdo codificado
+(``certifications/qr/<link>.<hash>.png``), por isso é servido com
+``Cache-Control: immutable`` (ver ``backend/media.py``) e a URL pode ser
+calculada sem consultar o storage.
+"""
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import qrcode
+import qrcode.image.svg
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+
+from backend.media import HASH_LENGTH
+
+logger = logging.getLogger(__name__)
+
+QR_DIR = 'certifications/qr'
+
+SHARE_URL = 'https://www.cptec.co.mz/declaracoes/{}'
+
+# Incrementar ao mudar a aparência: muda os nomes e invalida os caches dos clientes
+QR_VERSION = 1
+
+QR_FORMATS = ('png', 'svg')
+
+# Lotes a partir deste tamanho são renderizados num pool de processos
+POOL_THRESHOLD = 50
+
+
+def share_url(unique_link):
+    """Link público de compartilhamento de uma certificação"""
+    return SHARE_URL.format(unique_link)
+
+
+def qr_name(unique_link, ext):
+    """Nome do arquivo do QR code no storage"""
+    digest = hashlib.md5(f"{QR_VERSION}:{share_url(unique_link)}".encode('utf-8')).hexdigest()
+    return f"{QR_DIR}/{slugify(unique_link)[:60] or 'qr'}.{digest[:HASH_LENGTH]}.{ext}"
+
+
+def qr_url(unique_link, ext='png'):
+    """URL (relativa) do QR code, ou ``None`` sem ``unique_link``"""
+    if not unique_link:
+        return None
+    return default_storage.url(qr_name(unique_link, ext))
+
+
+def render(unique_link):
+    """
+    Gera os QR codes como ``{'png': bytes, 'svg': bytes}``.
+
+    Não usa o Django: pode correr num processo do pool do comando de backfill.
+    """
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=4)
+    code.add_data(share_url(unique_link))
+    code.make(fit=True)
+
+    images = {}
+    for ext, factory in (('png', None), ('svg', qrcode.image.svg.SvgPathImage)):
+        buffer = io.BytesIO()
+        code.make_image(image_factory=factory).save(buffer)
+        images[ext] = buffer.getvalue()
+    return images
+
+
+def save(unique_link, images):
+    """Grava no storage os arquivos gerados por ``render``"""
+    for ext, content in images.items():
+        name = qr_name(unique_link, ext)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(content))
+
+
+def exists(unique_link):
+    return all(default_storage.exists(qr_name(unique_link, ext)) for ext in QR_FORMATS)
+
+
+def generate(unique_link, force=False):
+    """Gera os QR codes de um link, se ainda não existirem"""
+    if not unique_link or (not force and exists(unique_link)):
+        return False
+    save(unique_link, render(unique_link))
+    logger.info(f"QR codes gerados para {unique_link}")
+    return True
+
+
+def _render(unique_link):
+    try:
+        return unique_link, render(unique_link), None
+    except Exception as e:
+        return unique_link, None, str(e)
+
+
+def generate_many(links, force=False, workers=None):
+    """
+    Gera os QR codes dos ``links`` que ainda não os têm (todos, com ``force``).
+
+    Lotes grandes são renderizados (CPU) num pool de ``workers`` processos,
+    por omissão um por CPU; a gravação no storage fica no processo atual.
+    Retorna ``(gerados, erros)``, com ``erros`` como ``[(link, mensagem)]``.
+    """
+    links = [link for link in dict.fromkeys(links) if link and (force or not exists(link))]
+    workers = workers or os.cpu_count() or 1
+
+    pool = None
+    if workers > 1 and len(links) >= POOL_THRESHOLD:
+        # 'spawn': o processo atual pode ter outros threads (ex.: worker do gunicorn)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+    generated, errors = 0, []
+    try:
+        results = pool.map(_render, links, chunksize=32) if pool else map(_render, links)
+        for link, images, error in results:
+            if error:
+                errors.append((link, error))
+                continue
+            save(link, images)
+            generated += 1
+    finally:
+        if pool:
+            pool.shutdown()
+
+    if generated:
+        logger.info(f"QR codes gerados para {generated} links")
+    return generated, errors
+
+
+def delete(unique_link):
+    """Remove os QR codes de um link (ex.: quando o link muda)"""
+    if not unique_link:
+        return
+    for ext in QR_FORMATS:
+        name = qr_name(unique_link, ext)
+        if default_storage.exists(name):
+            default_storage.delete(name)
@@ -0,0 +1,184 @@
+"""
+Busca textual de certificações.
+
+Substitui os ``icontains`` do ``SearchFilter`` por um índice de texto:
+
+* PostgreSQL: ``to_tsvector`` com índice GIN e trigramas (``pg_trgm``) para
+  nomes aproximados, ambos sobre ``certifications_unaccent``.
+* SQLite: tabela virtual FTS5 (``certifications_certification_fts``) mantida
+  em sincronia pelos signals de ``Certification``.
+
+Nos dois casos a busca ignora acentos ("Joao" encontra "João"). Outros bancos
+continuam a usar ``icontains``.
+
+Os índices só encontram termos pelo início ("Silv" encontra "Silva"). Para que
+trechos do meio de um ``documento`` ou ``codigo`` ("2024-00", "56789B")
+continuem a ser encontrados, buscas em que todos os termos têm dígitos também
+procuram cada termo por ``icontains`` nesses dois campos (no PostgreSQL com
+índices de trigramas, migração 0019).
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+FTS_TABLE = 'certifications_certification_fts'
+
+# Campos indexados, na ordem das colunas da tabela FTS5
+SEARCH_FIELDS = ('nome_completo', 'documento', 'codigo', 'curso')
+
+POSTGRES_DOCUMENT = (
+    "to_tsvector('simple', certifications_unaccent("
+    "coalesce(nome_completo, '') || ' ' || coalesce(documento, '') || ' ' || "
+    "coalesce(codigo, '') || ' ' || coalesce(curso, '')))"
+)
+POSTGRES_NAME = "certifications_unaccent(nome_completo)"
+
+
+def strip_accents(value):
+    """Remove acentos de um texto ("João" -> "Joao")"""
+    normalized = unicodedata.normalize('NFKD', value)
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
+
+
+def tokenize(value):
+    """Divide o texto de busca em termos alfanuméricos sem acentos"""
+    return re.findall(r'\w+', strip_accents(value).lower())
+
+
+def identifier_filter(search_terms):
+    """
+    ``Q`` que procura os termos por trecho em ``documento`` ou ``codigo``
+    quando todos têm dígitos (parecem identificadores); senão ``None``.
+    """
+    if not search_terms or not all(any(char.isdigit() for char in term) for term in search_terms):
+        return None
+    condition = Q()
+    for term in search_terms:
+        condition &= Q(documento__icontains=term) | Q(codigo__icontains=term)
+    return condition
+
+
+class LikeSearchBackend:
+    """Busca por ``icontains``, usada quando não há índice de texto"""
+
+    def search(self, queryset, terms, identifiers=None):
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(nome_completo__icontains=term) | Q(documento__icontains=term) |
+                Q(codigo__icontains=term) | Q(curso__icontains=term)
+            )
+        if identifiers is not None:
+            condition |= identifiers
+        return queryset.filter(condition)
+
+    def search_name(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(nome_completo__icontains=term)
+        return queryset
+
+
+class SQLiteSearchBackend:
+    """Busca pela tabela FTS5 com prefixos de termos"""
+
+    def _match(self, expression):
+        return Q(pk__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression]
+        ))
+
+    def search(self, queryset, terms, identifiers=None):
+        condition = self._match(' '.join(f'"{term}"*' for term in terms))
+        if identifiers is not None:
+            condition |= identifiers
+        return queryset.filter(condition)
+
+    def search_name(self, queryset, terms):
+        return queryset.filter(self._match(' '.join(f'nome_completo:"{term}"*' for term in terms)))
+
+
+class PostgresSearchBackend:
+    """Busca pelo ``tsvector`` indexado, com trigramas para nomes aproximados"""
+
+    def search(self, queryset, terms, identifiers=None):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        # O operador % usa pg_trgm.similarity_threshold (0.3 por omissão)
+        condition = Q(RawSQL(
+            f"({POSTGRES_DOCUMENT} @@ to_tsquery('simple', %s) OR {POSTGRES_NAME} %% %s)",
+            [tsquery, ' '.join(terms)],
+            output_field=BooleanField(),
+        ))
+        if identifiers is not None:
+            condition |= identifiers
+        return queryset.filter(condition)
+
+    def search_name(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(RawSQL(
+                f"({POSTGRES_NAME} ILIKE %s OR {POSTGRES_NAME} %% %s)",
+                [f'%{term}%', term],
+                output_field=BooleanField(),
+            ))
+        return queryset
+
+
+def get_search_backend():
+    """Escolhe o backend de busca conforme o banco em uso"""
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    return LikeSearchBackend()
+
+
+def search_by_name(queryset, value):
+    """Filtra certificações pelo nome do estudante"""
+    terms = tokenize(value)
+    if not terms:
+        return queryset
+    return get_search_backend().search_name(queryset, terms)
+
+
+class CertificationSearchFilter(SearchFilter):
+    """``SearchFilter`` que usa o índice de texto em vez de ``icontains``"""
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        terms = tokenize(' '.join(search_terms))
+        if not terms:
+            return queryset
+        return get_search_backend().search(queryset, terms, identifier_filter(search_terms))
+
+
+def index_certification(certification):
+    """Atualiza a entrada da certificação na tabela FTS5 (apenas SQLite)"""
+    index_certifications([certification])
+
+
+def index_certifications(certifications):
+    """Atualiza várias certificações na tabela FTS5 (apenas SQLite)"""
+    if connection.vendor != 'sqlite':
+        return
+    rows = [
+        (obj.pk, *(getattr(obj, field) or '' for field in SEARCH_FIELDS))
+        for obj in certifications
+    ]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_certification(pk):
+    """Remove a certificação da tabela FTS5 (apenas SQLite)"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.core.exceptions import ValidationError as DjangoValidationError
+from . import qr
+from .images import get_srcset
 from .models import Certification, Modulo
 
 
@@ -9,18 +12,94 @@ class ModuloSerializer(serializers.ModelSerializer):
         fields = ['id', 'nome']
         read_only_fields = ['id']
 
-class CertificationSerializer(serializers.ModelSerializer):
+# Campos mínimos para mostrar "válido / nome / curso" na verificação pública
+VERIFICATION_FIELDS = (
+    'id', 'nome_completo', 'curso', 'data_conclusao', 'ano', 'codigo', 'status', 'unique_link'
+)
+
+# Conjuntos nomeados aceites em ?fields=
+FIELD_PRESETS = {
+    'verificacao': VERIFICATION_FIELDS,
+}
+
+# Colunas do modelo necessárias para os campos calculados
+FIELD_SOURCES = {
+    'foto_srcset': ('foto',),
+    'link_completo': ('unique_link',),
+    'qr_url': ('unique_link',),
+    'qr_svg_url': ('unique_link',),
+}
+
+
+def parse_fields(value, available):
+    """
+    Interpreta ``?fields=a,b,c`` (ou um conjunto nomeado, ex.: ``verificacao``).
+
+    Retorna a tupla de campos pedidos, ou ``None`` quando o parâmetro não foi
+    enviado. Campos desconhecidos levantam ``ValidationError``.
+    """
+    if not value:
+        return None
+    if value in FIELD_PRESETS:
+        return FIELD_PRESETS[value]
+
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in available]
+    if unknown or not fields:
+        raise serializers.ValidationError({
+            "fields": f"Campos desconhecidos: {', '.join(unknown)}" if unknown else "Nenhum campo informado"
+        })
+    return fields
+
+
+def project(data, fields):
+    """Restringe um payload já serializado aos campos pedidos"""
+    if fields is None:
+        return data
+    return {name: data[name] for name in fields if name in data}
+
+
+class SparseFieldsetMixin:
+    """Remove os campos não pedidos (``context['fields']``) antes de serializar"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
+class CertificationVerificationSerializer(SparseFieldsetMixin, serializers.Serializer):
+    """
+    Projeção só de leitura para a verificação pública: apenas colunas simples,
+    sem campos calculados, URLs absolutas nem módulos.
+    """
+    id = serializers.IntegerField(read_only=True)
+    nome_completo = serializers.CharField(read_only=True)
+    curso = serializers.CharField(read_only=True)
+    data_conclusao = serializers.DateField(read_only=True)
+    ano = serializers.CharField(read_only=True)
+    codigo = serializers.CharField(read_only=True)
+    status = serializers.CharField(read_only=True)
+    unique_link = serializers.CharField(read_only=True)
+
+
+class CertificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     foto = serializers.SerializerMethodField()
+    foto_srcset = serializers.SerializerMethodField()
     link_completo = serializers.SerializerMethodField()
+    qr_url = serializers.SerializerMethodField()
+    qr_svg_url = serializers.SerializerMethodField()
     modulos = ModuloSerializer(many=True, read_only=True)
 
     class Meta:
         model = Certification
         fields = [
-            'id', 'nome_completo', 'documento', 'foto', 'curso', 'duracao',
+            'id', 'nome_completo', 'documento', 'foto', 'foto_srcset', 'curso', 'duracao',
             'carga_horaria', 'data_conclusao', 'ano', 'codigo', 'status',
             'declaracao', 'descricao', 'unique_link', 'link_completo',
-            'modulos', 'created_at', 'updated_at'
+            'qr_url', 'qr_svg_url', 'modulos', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'unique_link', 'created_at', 'updated_at']
 
@@ -33,12 +112,32 @@ class CertificationSerializer(serializers.ModelSerializer):
             return obj.foto.url
         return None
 
+    def get_foto_srcset(self, obj):
+        """Retorna os derivados redimensionados da foto prontos para srcset"""
+        request = self.context.get("request")
+        return get_srcset(obj.foto, request.build_absolute_uri if request else None)
+
     def get_link_completo(self, obj):
         """Retorna link completo da certificação"""
         if obj.unique_link:
-            return f"https://www.cptec.co.mz/declaracoes/{obj.unique_link}"
+            return qr.share_url(obj.unique_link)
         return None
 
+    def _qr_url(self, obj, ext):
+        url = qr.qr_url(obj.unique_link, ext)
+        request = self.context.get("request")
+        if url and request:
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_qr_url(self, obj):
+        """Retorna a URL do QR code (PNG) do link de compartilhamento"""
+        return self._qr_url(obj, 'png')
+
+    def get_qr_svg_url(self, obj):
+        """Retorna a URL do QR code (SVG) do link de compartilhamento"""
+        return self._qr_url(obj, 'svg')
+
     def validate_codigo(self, value):
         """Valida que o código é único"""
         if not value or len(value.strip()) < 3:
@@ -71,3 +170,26 @@ class CertificationSerializer(serializers.ModelSerializer):
             })
         
         return data
+
+
+class BatchVerificationSerializer(serializers.Serializer):
+    """Entrada da verificação em lote: listas de códigos e/ou links únicos"""
+    codigos = serializers.ListField(
+        child=serializers.CharField(max_length=100, trim_whitespace=True), required=False, default=list
+    )
+    links = serializers.ListField(
+        child=serializers.CharField(max_length=100, trim_whitespace=True), required=False, default=list
+    )
+
+    def validate(self, data):
+        """Remove duplicados e limita o tamanho do lote"""
+        data['codigos'] = list(dict.fromkeys(data['codigos']))
+        data['links'] = list(dict.fromkeys(data['links']))
+        total = len(data['codigos']) + len(data['links'])
+        if not total:
+            raise serializers.ValidationError("Envie pelo menos um código ou link")
+        if total > settings.CERTIFICATION_VERIFY_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"Máximo de {settings.CERTIFICATION_VERIFY_MAX_ITEMS} certificações por pedido"
+            )
+        return data
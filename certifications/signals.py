@@ -0,0 +1,151 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+import logging
+
+from backend import caching, snapshots
+from changes import feed as changes
+from facets import counts as facets
+
+from . import cache, declarations, images, qr, search, tasks
+from .models import Certification, Modulo
+
+logger = logging.getLogger(__name__)
+
+# Enviado após importações com bulk_create, que não disparam post_save.
+# Argumentos: instances (lista de Certification já salvas)
+certifications_bulk_created = Signal()
+
+
+def previous_lookup(instance):
+    """Link e código anteriores à gravação (só os que foram lidos)"""
+    previous = snapshots.previous(instance) or {}
+    return {field: previous[field] for field in cache.LOOKUP_FIELDS if field in previous}
+
+
+@receiver(post_save, sender=Certification)
+def update_photo_derivatives(sender, instance, **kwargs):
+    """
+    Gera os derivados da foto quando ela é enviada ou trocada.
+
+    Registado antes da invalidação do cache: quando a remoção das chaves
+    corre (no commit), os derivados já existem e o ``foto_srcset`` recalculado
+    não fica ``None``.
+    """
+    values = snapshots.previous(instance)
+    if values is not None and 'foto' not in values:
+        # Foto fora de ``update_fields``
+        return
+    previous = (values or {}).get('foto') or ''
+    current = instance.foto.name if instance.foto else ''
+    if previous == current:
+        return
+    try:
+        if previous:
+            images.delete_derivatives(instance.foto.storage, previous)
+        if current:
+            images.generate_derivatives(instance.foto)
+    except Exception as e:
+        # Uma foto inválida não deve impedir a gravação da certificação
+        logger.error(f"Erro ao gerar derivados da foto {current}: {str(e)}")
+
+
+@receiver(post_save, sender=Certification)
+def invalidate_certification_on_save(sender, instance, **kwargs):
+    """Invalida o cache da certificação (identificadores novos e antigos) após o commit"""
+    cache.invalidate(*previous_lookup(instance).items())
+    # Também limpa buscas negativas guardadas para os novos identificadores
+    cache.invalidate_certification(instance)
+
+
+@receiver(post_delete, sender=Certification)
+def invalidate_certification_on_delete(sender, instance, **kwargs):
+    cache.invalidate_certification(instance)
+
+
+@receiver(post_save, sender=Certification)
+def update_search_index(sender, instance, **kwargs):
+    search.index_certification(instance)
+
+
+@receiver(post_delete, sender=Certification)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_certification(instance.pk)
+
+
+@receiver(post_save, sender=Certification)
+def update_qr_codes(sender, instance, **kwargs):
+    """Remove os QR codes do link anterior quando o ``unique_link`` muda"""
+    previous = previous_lookup(instance).get('unique_link')
+    if previous and previous != instance.unique_link:
+        qr.delete(previous)
+
+
+@receiver(post_delete, sender=Certification)
+def delete_qr_codes(sender, instance, **kwargs):
+    qr.delete(instance.unique_link)
+
+
+@receiver(post_delete, sender=Certification)
+def delete_declaration_pdf(sender, instance, **kwargs):
+    declarations.delete(instance.pk)
+
+
+@receiver(post_save, sender=Certification)
+@receiver(post_delete, sender=Certification)
+def refresh_artifacts(sender, instance, **kwargs):
+    """
+    QR codes, PDF e página estática da nova versão (ou remoção da página),
+    gerados em segundo plano depois do commit (ver ``tasks.py``).
+    """
+    tasks.schedule(instance.pk)
+
+
+@receiver(post_save, sender=Modulo)
+@receiver(post_delete, sender=Modulo)
+def invalidate_certification_on_modulo_change(sender, instance, **kwargs):
+    """
+    Alterações nos módulos mudam o payload da certificação.
+
+    Atualiza também o ``updated_at`` da certificação, do qual derivam o ETag
+    e o Last-Modified da página pública.
+    """
+    certifications = Certification.objects.filter(pk=instance.certification_id)
+    identifiers = certifications.values(*cache.LOOKUP_FIELDS).first()
+    if identifiers:
+        certifications.update(updated_at=timezone.now())
+        cache.invalidate(*identifiers.items())
+        caching.bump_namespace(Certification)
+        tasks.schedule(instance.certification_id)
+
+
+@receiver(certifications_bulk_created)
+def handle_bulk_created(sender, instances, **kwargs):
+    """
+    Mantém cache, índice de busca e facetas em dia após importações em lote.
+
+    Só operações em lote: o trabalho por certificação (QR codes, PDFs,
+    páginas) fica numa única tarefa em segundo plano.
+    """
+    cache.invalidate(*(
+        (field, getattr(instance, field)) for instance in instances for field in cache.LOOKUP_FIELDS
+    ))
+    search.index_certifications(instances)
+    facets.add_instances(Certification, instances)
+    tasks.schedule(*(instance.pk for instance in instances))
+    caching.bump_namespace(Certification, Modulo)
+
+
+# Link, código e foto anteriores, lidos na mesma consulta que os valores
+# anteriores das facetas e da data de conclusão (ver backend/snapshots.py)
+snapshots.track(Certification, (*cache.LOOKUP_FIELDS, 'foto'))
+
+# Contagens por status, ano e curso (filtros do admin e endpoint facets/)
+facets.register(Certification, ('status', 'ano', 'curso'))
+
+# Exclusões entregues pelo endpoint changes/
+changes.register(Certification)
+
+# Registado por último: os receptores acima (derivados, índice, facetas) já
+# correram quando a versão muda e as listagens são recalculadas
+caching.register(Certification, Modulo)
@@ -0,0 +1,53 @@
+"""
+Arquivos derivados das certificações, gerados fora do pedido.
+
+Gravações, alterações de módulos e importações em lote acrescentam os ids a
+``refresh_artifacts``, executada depois do commit num thread em segundo plano
+com todos os ids acumulados (ver ``backend/background.py``). Uma importação
+de uma turma inteira é assim uma só tarefa, e o pedido não espera pela
+renderização.
+
+O que se perder num reinício é recuperado pelos comandos ``generate_qr_codes``
+e ``publish_declarations``; os PDFs em falta são gerados no primeiro download.
+"""
+import logging
+
+from django.conf import settings
+
+from backend import background
+
+from . import declarations, publishing, qr
+from .models import Certification
+
+logger = logging.getLogger(__name__)
+
+
+@background.job('certificacoes')
+def refresh_artifacts(ids):
+    """
+    Gera os QR codes e os PDFs em falta das certificações ``ids`` e republica
+    as suas páginas estáticas (ou remove-as, se foram apagadas).
+    """
+    links = list(Certification.objects.filter(pk__in=ids).values_list('unique_link', flat=True))
+    try:
+        generated, errors = qr.generate_many(links)
+        for link, error in errors:
+            logger.error(f"Erro ao gerar QR codes de {link}: {error}")
+    except Exception as e:
+        # Um erro no storage não impede as etapas seguintes
+        logger.error(f"Erro ao gerar QR codes de {len(links)} certificações: {str(e)}")
+
+    if settings.CERTIFICATION_PDF_BACKGROUND:
+        declarations.generate_many(ids)
+
+    if publishing.is_enabled():
+        try:
+            publishing.publish_certifications(ids)
+        except Exception as e:
+            # A publicação estática não afeta a gravação; o comando corrige depois
+            logger.error(f"Erro ao publicar páginas das certificações {ids}: {str(e)}")
+
+
+def schedule(*ids):
+    """Atualiza os arquivos das certificações ``ids`` depois do commit"""
+    refresh_artifacts.defer(ids)
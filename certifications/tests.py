@@ -1,3 +1,1242 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import decimal
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+
+from backend import background
+from backend.renderers import FastJSONRenderer
+from backend.throttling import EndpointRateThrottle
+from changes.models import PruneWatermark
+from facets.models import FacetCount
+
+from . import async_views, cache, declarations, images, publishing, qr, tasks
+from .importers import CertificationImporter, parse_rows
+from .models import Certification, Modulo
+from .pagination import CertificationKeysetPagination
+from .serializers import VERIFICATION_FIELDS
+from .views import CertificationViewSet
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'certifications-tests'},
+    'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'certifications-throttle'},
+}
+
+
+def make_certification(index=1, **kwargs):
+    data = {
+        'nome_completo': f"Estudante {index}",
+        'documento': f"{index:012d}B",
+        'curso': 'Gestão da Qualidade ISO 9001',
+        'duracao': '40 horas',
+        'carga_horaria': '40h',
+        'data_conclusao': datetime.date(2025, 1, 1) + datetime.timedelta(days=index),
+        'ano': '2025',
+        'codigo': f"TEST-{index:05d}",
+        'unique_link': f"teste-{index:05d}",
+    }
+    data.update(kwargs)
+    return Certification.objects.create(**data)
+
+
+def reload_urlconf():
+    """Volta a montar as rotas (dependem de ``ASYNC_VIEWS`` na importação)"""
+    clear_url_caches()
+    for module in ('certifications.urls', 'backend.urls'):
+        importlib.reload(sys.modules[module])
+
+
+class CertificationTestCase(TestCase):
+    """
+    Cache em memória e mídias num diretório temporário.
+
+    Os PDFs e as páginas estáticas em segundo plano ficam desligados e as
+    tarefas depois do commit correm no próprio thread; os testes que gravam
+    certificações usam ``captureOnCommitCallbacks`` para correr as
+    invalidações e tarefas feitas depois do commit.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(
+            CACHES=TEST_CACHES,
+            MEDIA_ROOT=os.path.join(root, 'media'),
+            DECLARATIONS_PUBLISH_ROOT=os.path.join(root, 'published'),
+            CERTIFICATION_PDF_BACKGROUND=False,
+            DECLARATIONS_PUBLISH_ON_SAVE=False,
+            BACKGROUND_JOBS_INLINE=True,
+        ))
+        super().setUpClass()
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+    def create(self, index=1, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            certification = make_certification(index, **kwargs)
+            Modulo.objects.create(certification=certification, nome='Requisitos')
+        return Certification.objects.get(pk=certification.pk)
+
+
+class AsyncViewsTests(CertificationTestCase):
+    """Rotas de ``ASYNC_VIEWS=True`` servidas pelas views assíncronas"""
+
+    def setUp(self):
+        super().setUp()
+        with self.settings(ASYNC_VIEWS=True):
+            reload_urlconf()
+        self.addCleanup(reload_urlconf)
+        self.certification = self.create()
+        self.client = AsyncClient()
+
+    def test_routes_use_async_views(self):
+        link = self.certification.unique_link
+        self.assertIs(resolve(f'/api/certifications/link/{link}/').func, async_views.get_by_link)
+        self.assertIs(resolve(f'/api/certifications/view/{link}/').func, async_views.certification_public_view)
+
+    async def test_verification_by_link(self):
+        response = await self.client.get(f'/api/certifications/link/{self.certification.unique_link}/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['codigo'], self.certification.codigo)
+        self.assertEqual([modulo['nome'] for modulo in data['modulos']], ['Requisitos'])
+
+        response = await self.client.get('/api/certifications/link/inexistente/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_public_page_and_conditional_get(self):
+        in_event_loop = []
+        render = cache.render_public_page
+
+        def checked_render(certification):
+            try:
+                asyncio.get_running_loop()
+                in_event_loop.append(True)
+            except RuntimeError:
+                in_event_loop.append(False)
+            return render(certification)
+
+        url = f'/api/certifications/view/{self.certification.unique_link}/'
+        with mock.patch.object(cache, 'render_public_page', checked_render):
+            response = await self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # O template é renderizado fora do event loop
+        self.assertEqual(in_event_loop, [False])
+        self.assertContains(response, self.certification.nome_completo)
+
+        response = await self.client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+class VerificationCacheTests(CertificationTestCase):
+    """Cache de leitura das verificações por link e código"""
+
+    def setUp(self):
+        super().setUp()
+        self.certification = self.create()
+
+    def get_by_codigo(self, codigo=None):
+        return self.client.get(f'/api/certifications/codigo/{codigo or self.certification.codigo}/')
+
+    def test_cache_hit_does_not_query_database(self):
+        self.assertEqual(self.get_by_codigo().status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.get_by_codigo()
+        self.assertEqual(response.json()['codigo'], self.certification.codigo)
+
+    def test_save_invalidates_after_commit(self):
+        self.get_by_codigo()
+        key = cache.make_key('codigo', self.certification.codigo)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certification.curso = 'Auditoria Interna'
+            self.certification.save()
+            # Antes do commit outro pedido ainda lê a linha antiga: a entrada fica
+            self.assertIsNotNone(cache.get_cache().get(key))
+        self.assertIsNone(cache.get_cache().get(key))
+        self.assertEqual(self.get_by_codigo().json()['curso'], 'Auditoria Interna')
+
+    def test_link_change_invalidates_previous_link(self):
+        old_link = self.certification.unique_link
+        self.assertEqual(self.client.get(f'/api/certifications/link/{old_link}/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certification.unique_link = 'novo-link'
+            self.certification.save()
+        self.assertEqual(self.client.get(f'/api/certifications/link/{old_link}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/certifications/link/novo-link/').status_code, 200)
+
+    def test_modulo_change_invalidates_payload(self):
+        self.get_by_codigo()
+        with self.captureOnCommitCallbacks(execute=True):
+            Modulo.objects.create(certification=self.certification, nome='Auditoria')
+        nomes = [modulo['nome'] for modulo in self.get_by_codigo().json()['modulos']]
+        self.assertEqual(sorted(nomes), ['Auditoria', 'Requisitos'])
+
+    def test_not_found_is_cached_until_created(self):
+        self.assertEqual(self.get_by_codigo('TEST-00002').status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_by_codigo('TEST-00002').status_code, 404)
+        self.create(2)
+        self.assertEqual(self.get_by_codigo('TEST-00002').status_code, 200)
+
+    def test_public_page_conditional_get(self):
+        url = f'/api/certifications/view/{self.certification.unique_link}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certification.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    async def test_sync_and_async_payloads_match(self):
+        codigo = self.certification.codigo
+        with mock.patch.object(cache, '_serialize', wraps=cache._serialize) as serialize:
+            payload = await sync_to_async(cache.get_verification_payload)('codigo', codigo)
+            await cache.get_cache().aclear()
+            async_payload = await cache.aget_verification_payload('codigo', codigo)
+        self.assertEqual(serialize.call_count, 2)
+        self.assertEqual(async_payload, payload)
+
+        with self.assertRaises(ValueError):
+            cache.get_verification_payload('documento', self.certification.documento)
+        with self.assertRaises(ValueError):
+            await cache.aget_verification_payload('documento', self.certification.documento)
+
+
+@mock.patch.object(CertificationKeysetPagination, 'page_size', 3)
+class KeysetPaginationTests(CertificationTestCase):
+    """Paginação por cursor da listagem (``?paginacao=cursor``)"""
+
+    def setUp(self):
+        super().setUp()
+        for index in range(1, 11):
+            make_certification(index)
+        # Empates no created_at: o id desempata
+        moment = Certification.objects.order_by('pk')[0].created_at
+        Certification.objects.filter(pk__in=Certification.objects.order_by('pk').values('pk')[2:7]).update(
+            created_at=moment
+        )
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [item['id'] for item in data['results']]
+            url = data['next']
+            pages += 1
+        return ids, pages
+
+    def test_pages_cover_every_row_once(self):
+        ids, pages = self.walk('/api/certifications/?paginacao=cursor')
+        expected = list(Certification.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_ascending_ordering(self):
+        ids, _ = self.walk('/api/certifications/?paginacao=cursor&ordering=data_conclusao')
+        expected = list(Certification.objects.order_by('data_conclusao', 'id').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get('/api/certifications/?paginacao=cursor').json()
+        second = self.client.get(first['next']).json()
+        previous = self.client.get(second['previous']).json()
+        self.assertEqual(
+            [item['id'] for item in previous['results']],
+            [item['id'] for item in first['results']]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/certifications/?cursor=invalido')
+        self.assertEqual(response.status_code, 404)
+
+
+def import_row(index, **kwargs):
+    row = {
+        'nome_completo': f"Importado {index}",
+        'documento': f"{index:012d}C",
+        'curso': 'Segurança da Informação ISO 27001',
+        'duracao': '60 horas',
+        'carga_horaria': '60h',
+        'data_conclusao': '2025-03-01',
+        'ano': '2025',
+        'codigo': f"IMP-{index:05d}",
+        'modulos': ['Introdução', 'Requisitos'],
+    }
+    row.update(kwargs)
+    return row
+
+
+class ImporterTests(CertificationTestCase):
+    """Importação em lote e tratamento de duplicados"""
+
+    def run_import(self, rows, batch_size=500):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CertificationImporter(batch_size=batch_size).run(enumerate(rows, start=1)).as_dict()
+
+    def test_creates_certifications_with_modulos(self):
+        result = self.run_import([import_row(1), import_row(2)])
+        self.assertEqual(result, {'criadas': 2, 'erros': []})
+        certification = Certification.objects.get(codigo='IMP-00001')
+        self.assertTrue(certification.unique_link)
+        self.assertEqual(sorted(certification.modulos.values_list('nome', flat=True)), ['Introdução', 'Requisitos'])
+
+    def test_duplicate_codigo_in_same_file(self):
+        result = self.run_import([import_row(1), import_row(2, codigo='IMP-00001')])
+        self.assertEqual(result['criadas'], 1)
+        self.assertEqual([error['linha'] for error in result['erros']], [2])
+        self.assertIn('codigo', result['erros'][0]['erros'])
+
+    def test_duplicate_across_batches(self):
+        rows = [import_row(1), import_row(2), import_row(3, codigo='IMP-00001'), import_row(4, unique_link='x')]
+        rows.append(import_row(5, unique_link='x'))
+        result = self.run_import(rows, batch_size=2)
+        self.assertEqual(result['criadas'], 3)
+        self.assertEqual([error['linha'] for error in result['erros']], [3, 5])
+        self.assertIn('unique_link', result['erros'][1]['erros'])
+
+    def test_existing_certification_is_not_imported_again(self):
+        self.create(1, codigo='IMP-00001')
+        result = self.run_import([import_row(1), import_row(2)])
+        self.assertEqual(result['criadas'], 1)
+        self.assertEqual(Certification.objects.filter(codigo='IMP-00001').count(), 1)
+
+    def test_invalid_rows_are_reported(self):
+        result = self.run_import([import_row(1, data_conclusao='ontem'), 'texto', import_row(3)])
+        self.assertEqual(result['criadas'], 1)
+        self.assertEqual([error['linha'] for error in result['erros']], [1, 2])
+
+    def test_parse_csv_and_jsonl(self):
+        csv_rows = list(parse_rows(
+            b"codigo,nome_completo,modulos\nIMP-1,Ana,Introdu\xc3\xa7\xc3\xa3o; Requisitos ;\n", 'csv'
+        ))
+        self.assertEqual(csv_rows, [(2, {'codigo': 'IMP-1', 'nome_completo': 'Ana', 'modulos': ['Introdução', 'Requisitos']})])
+
+        jsonl_rows = list(parse_rows(b'{"codigo": "IMP-1"}\n\nnao json\n', 'jsonl'))
+        self.assertEqual(jsonl_rows[0], (1, {'codigo': 'IMP-1'}))
+        self.assertEqual(jsonl_rows[1][0], 3)
+        self.assertIsInstance(jsonl_rows[1][1], ValueError)
+
+    def test_large_import_is_bounded(self):
+        rows = [import_row(index) for index in range(1, 2001)]
+        with mock.patch.object(tasks.refresh_artifacts, 'function') as refresh, \
+                mock.patch.object(qr, 'render') as render, \
+                CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = self.run_import(rows)
+            elapsed = time.perf_counter() - started
+        self.assertEqual(result['criadas'], 2000)
+        # Consultas por lote (uniqueness, INSERTs em bloco, índice, facetas), não por linha
+        self.assertLess(len(queries), 150)
+        # Uma tarefa por lote para os arquivos; nada renderizado no pedido
+        self.assertEqual(refresh.call_count, 4)
+        render.assert_not_called()
+        self.assertLess(elapsed, 10)
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', encoding='utf-8') as file:
+            file.write(json.dumps(import_row(1)) + '\n')
+            file.flush()
+            output = io.StringIO()
+            with mock.patch.object(background, 'flush_all') as flush_all:
+                with self.captureOnCommitCallbacks(execute=True):
+                    call_command('import_certifications', file.name, '--wait', stdout=output)
+        self.assertIn("1 certificações importadas", output.getvalue())
+        flush_all.assert_called_once()
+        self.assertTrue(Certification.objects.filter(codigo='IMP-00001').exists())
+
+    def test_bulk_import_endpoint(self):
+        url = '/api/certifications/bulk-import/'
+        payload = {'certificacoes': [import_row(1), import_row(2, codigo='IMP-00001')]}
+        self.assertEqual(self.client.get('/api/certifications/codigo/IMP-00001/').status_code, 404)
+        self.assertEqual(self.client.post(url, payload, content_type='application/json').status_code, 403)
+
+        admin = get_user_model().objects.create_user('admin', password='senha', is_staff=True)
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['criadas'], 1)
+
+        # Os receptores do lote limpam a busca sem resultado guardada no cache
+        self.assertEqual(self.client.get('/api/certifications/codigo/IMP-00001/').status_code, 200)
+
+
+@override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='', MEDIA_SENDFILE_HEADER='')
+@override_settings(LIST_CACHE_TIMEOUT=0)
+class SerializationParityTests(CertificationTestCase):
+    """``CompiledSerializer`` + ``FastJSONRenderer`` produzem os mesmos bytes que o DRF"""
+
+    def setUp(self):
+        super().setUp()
+        first = self.create(1, nome_completo='José "Zé" Mãe Filho', descricao='Linha\u2028nova\u2029🎓 <b>&</b>')
+        Modulo.objects.create(certification=first, nome='Auditoria Interna')
+        for index in range(2, 5):
+            self.create(index, status='Em Andamento' if index % 2 else 'Aprovado')
+        Certification.objects.filter(pk=first.pk).update(foto='certificacoes/fotos/retrato.jpg')
+
+    def get_content(self, url, fast):
+        renderers = [FastJSONRenderer] if fast else [JSONRenderer]
+        with self.settings(FAST_SERIALIZATION=fast), \
+                mock.patch.object(CertificationViewSet, 'renderer_classes', renderers):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def assertSameBytes(self, url):
+        fast = self.get_content(url, fast=True)
+        self.assertEqual(fast, self.get_content(url, fast=False))
+        return fast
+
+    def test_page_number_pagination(self):
+        content = self.assertSameBytes('/api/certifications/')
+        self.assertEqual(json.loads(content)['count'], 4)
+        # U+2028 escapado como no JSONRenderer
+        self.assertIn(b'\\u2028', content)
+        self.assertSameBytes('/api/certifications/?page_size=2&ordering=nome_completo')
+
+    def test_cursor_pagination(self):
+        url = '/api/certifications/?paginacao=cursor&ordering=data_conclusao'
+        content = self.assertSameBytes(url)
+        self.assertSameBytes(json.loads(content)['next'] or url)
+
+    def test_renderer_matches_drf(self):
+        data = {
+            'texto': 'ação \u2028 \u2029 "aspas" \\ / 🎓',
+            'data': datetime.date(2025, 1, 2),
+            'momento': datetime.datetime(2025, 1, 2, 3, 4, 5, 600000, tzinfo=datetime.timezone.utc),
+            'decimal': decimal.Decimal('10.50'),
+            'numeros': [0, -1, 2 ** 63 - 1, 1.5, None, True],
+            1: 'chave inteira',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        # Inteiros fora dos 64 bits: volta ao DRF
+        self.assertEqual(FastJSONRenderer().render({'n': 2 ** 70}), JSONRenderer().render({'n': 2 ** 70}))
+
+
+class SearchTests(CertificationTestCase):
+    """
+    ``?search=`` e ``?nome=`` pelo índice do banco em uso (FTS5 no SQLite,
+    tsvector e trigramas no PostgreSQL)
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.joao = self.create(
+            1, nome_completo='João Conceição', documento='123456789012B', codigo='CERT-2024-0042'
+        )
+        self.other = self.create(2, nome_completo='Maria Silva', curso='Auditoria Interna')
+
+    def search(self, **params):
+        response = self.client.get('/api/certifications/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['codigo'] for item in response.json()['results']]
+
+    def test_accent_insensitive(self):
+        for term in ('Joao', 'conceicao', 'JOÃO', 'Joao Conce'):
+            self.assertEqual(self.search(search=term), [self.joao.codigo], term)
+        self.assertEqual(self.search(nome='joao conceicao'), [self.joao.codigo])
+        self.assertEqual(self.search(search='auditoria'), [self.other.codigo])
+
+    def test_identifier_substring(self):
+        # Trechos do meio de códigos e documentos, que o índice por prefixo não encontra
+        for term in ('2024-004', '0042', '56789012', '789012b'):
+            self.assertEqual(self.search(search=term), [self.joao.codigo], term)
+        self.assertEqual(self.search(search='2024-004 56789'), [self.joao.codigo])
+        self.assertEqual(self.search(search='2024-999'), [])
+
+    def test_index_follows_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.nome_completo = 'Mário Gonçalves'
+            self.other.save()
+        self.assertEqual(self.search(search='goncalves'), [self.other.codigo])
+        self.assertEqual(self.search(search='silva'), [])
+
+
+class BatchVerificationTests(CertificationTestCase):
+    """Verificação de vários códigos e links num só pedido"""
+
+    def setUp(self):
+        super().setUp()
+        self.approved = self.create(1)
+        self.failed = self.create(2, status='Reprovado')
+        self.pending = self.create(3, status='Em Andamento')
+
+    def verify(self, **data):
+        return self.client.post('/api/certifications/verify/', data, content_type='application/json')
+
+    def test_valido_follows_status(self):
+        codigos = [self.approved.codigo, self.failed.codigo, self.pending.codigo, 'NAO-EXISTE']
+        # Uma só consulta, sem módulos
+        with self.assertNumQueries(1):
+            response = self.verify(codigos=codigos, links=[self.failed.unique_link])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual(data['codigos'][self.approved.codigo], {
+            'valido': True,
+            'status': 'Aprovado',
+            'nome': self.approved.nome_completo,
+            'curso': self.approved.curso,
+            'data_conclusao': self.approved.data_conclusao.isoformat(),
+        })
+        self.assertFalse(data['codigos'][self.failed.codigo]['valido'])
+        self.assertEqual(data['codigos'][self.failed.codigo]['status'], 'Reprovado')
+        self.assertFalse(data['codigos'][self.pending.codigo]['valido'])
+        self.assertEqual(data['codigos']['NAO-EXISTE'], {'valido': False})
+        self.assertEqual(data['links'][self.failed.unique_link], data['codigos'][self.failed.codigo])
+
+    def test_empty_batch_returns_400(self):
+        response = self.verify(codigos=[], links=[])
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(LIST_CACHE_TIMEOUT=0)
+class SparseFieldsetTests(CertificationTestCase):
+    """Campos pedidos em ``?fields=`` e o conjunto ``verificacao``"""
+
+    def setUp(self):
+        super().setUp()
+        self.certification = self.create()
+
+    def test_verification_preset_on_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/certifications/?fields=verificacao')
+        self.assertEqual(response.status_code, 200)
+        row = response.json()['results'][0]
+        self.assertEqual(list(row), list(VERIFICATION_FIELDS))
+        self.assertEqual(row['codigo'], self.certification.codigo)
+        # Sem prefetch dos módulos e só as colunas necessárias
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse(any('certifications_modulo' in query for query in sql))
+        self.assertFalse(any('"documento"' in query for query in sql))
+
+    def test_computed_fields_keep_full_serializer(self):
+        response = self.client.get('/api/certifications/?fields=codigo,link_completo,modulos')
+        row = response.json()['results'][0]
+        self.assertEqual(list(row), ['codigo', 'link_completo', 'modulos'])
+        self.assertEqual([modulo['nome'] for modulo in row['modulos']], ['Requisitos'])
+        self.assertIn(self.certification.unique_link, row['link_completo'])
+
+    def test_lookups_are_projected(self):
+        for url in (
+            f'/api/certifications/{self.certification.pk}/',
+            f'/api/certifications/link/{self.certification.unique_link}/',
+            f'/api/certifications/codigo/{self.certification.codigo}/',
+        ):
+            response = self.client.get(f'{url}?fields=nome_completo,status')
+            self.assertEqual(response.json(), {'nome_completo': 'Estudante 1', 'status': 'Aprovado'}, url)
+
+    def test_unknown_field_returns_400(self):
+        for url in ('/api/certifications/', f'/api/certifications/link/{self.certification.unique_link}/'):
+            response = self.client.get(f'{url}?fields=codigo,senha')
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('senha', response.json()['fields'])
+        self.assertEqual(self.client.get('/api/certifications/?fields=,').status_code, 400)
+
+    def test_unknown_field_returns_400_in_async_view(self):
+        with self.settings(ASYNC_VIEWS=True):
+            reload_urlconf()
+        self.addCleanup(reload_urlconf)
+        response = self.client.get(f'/api/certifications/link/{self.certification.unique_link}/?fields=senha')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('senha', response.json()['fields'])
+
+
+class AdminChangelistTests(CertificationTestCase):
+    """Changelists do admin com número de consultas independente das linhas"""
+
+    def setUp(self):
+        super().setUp()
+        admin = get_user_model().objects.create_superuser('admin', 'admin@exemplo.co.mz', 'senha')
+        self.client.force_login(admin)
+        self.next_index = 1
+
+    def add_rows(self, count):
+        for _ in range(count):
+            certification = make_certification(self.next_index, curso=f"Curso {self.next_index % 3}")
+            Modulo.objects.create(certification=certification, nome='Requisitos')
+            Modulo.objects.create(certification=certification, nome='Auditoria')
+            self.next_index += 1
+
+    def get(self, url, clear_cache=True):
+        if clear_cache:
+            caches['default'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def assertConstantQueries(self, url):
+        self.add_rows(3)
+        _, few = self.get(url)
+        self.add_rows(12)
+        _, many = self.get(url)
+        self.assertEqual(len(many), len(few), '\n'.join(many))
+
+    def test_certification_changelist(self):
+        self.assertConstantQueries('/admin/certifications/certification/')
+        self.assertConstantQueries('/admin/certifications/certification/?curso=Curso+1')
+
+    def test_modulo_changelist(self):
+        self.assertConstantQueries('/admin/certifications/modulo/')
+        response, _ = self.get('/admin/certifications/modulo/?o=2')
+        self.assertContains(response, 'Estudante 1')
+
+    def test_count_and_filter_choices_are_cached_until_change(self):
+        self.add_rows(3)
+        url = '/admin/certifications/certification/'
+        _, first = self.get(url)
+        _, second = self.get(url, clear_cache=False)
+        self.assertLess(len(second), len(first))
+        self.assertFalse(any('COUNT(' in query for query in second))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_rows(1)
+        response, third = self.get(url, clear_cache=False)
+        self.assertTrue(any('COUNT(' in query for query in third))
+        self.assertEqual(response.context['cl'].result_count, 4)
+        self.assertIn('Curso 1', [str(choice) for choice in response.context['cl'].filter_specs[3].lookup_choices])
+
+    def test_estimated_count_skips_count_query(self):
+        self.add_rows(2)
+        with mock.patch('backend.admin_tools.estimated_count', return_value=50000):
+            response, queries = self.get('/admin/certifications/certification/')
+        self.assertEqual(response.context['cl'].result_count, 50000)
+        self.assertFalse(any('COUNT(' in query for query in queries))
+
+
+class MediaResponseTests(CertificationTestCase):
+    """Respostas condicionais e parciais de ``/media/``"""
+
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        super().setUp()
+        directory = os.path.join(settings.MEDIA_ROOT, 'certifications')
+        os.makedirs(directory, exist_ok=True)
+        for name in ('foto.0123456789ab.jpg', 'foto.jpg'):
+            with open(os.path.join(directory, name), 'wb') as file:
+                file.write(self.content)
+
+    def get(self, name='foto.0123456789ab.jpg', **headers):
+        return self.client.get(f'/media/certifications/{name}', headers=headers)
+
+    def test_full_response_and_cache_control(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        # Nomes sem hash de conteúdo podem mudar
+        self.assertNotIn('immutable', self.get('foto.jpg')['Cache-Control'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.get()['ETag']
+        response = self.get(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_range_returns_206(self):
+        response = self.get(Range='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f"bytes 0-9/{len(self.content)}")
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[:10])
+
+        response = self.get(Range='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-4:])
+
+    def test_unsatisfiable_range_returns_416(self):
+        response = self.get(Range='bytes=999999-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f"bytes */{len(self.content)}")
+
+    def test_stale_if_range_returns_full_file(self):
+        response = self.get(Range='bytes=0-9', **{'If-Range': '"outro"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+
+class PhotoDerivativeTests(CertificationTestCase):
+    """Derivados redimensionados da foto e ``foto_srcset``"""
+
+    def setUp(self):
+        super().setUp()
+        images._availability.clear()
+        self.addCleanup(images._availability.clear)
+
+    def photo(self, color='red', size=(1200, 900)):
+        exif = Image.Exif()
+        exif[0x010F] = 'Telemovel'
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_derivatives_are_resized_without_exif(self):
+        certification = self.create(foto=self.photo())
+        name = certification.foto.name
+        for derivative in images.derivative_names(name):
+            self.assertTrue(default_storage.exists(derivative), derivative)
+
+        for width in images.DERIVATIVE_WIDTHS:
+            for ext in images.DERIVATIVE_FORMATS:
+                with default_storage.open(images.derivative_name(name, width, ext)) as file:
+                    image = Image.open(file)
+                    self.assertEqual(image.size, (width, width * 3 // 4))
+                    self.assertEqual(len(image.getexif()), 0)
+
+    def test_small_photo_is_not_enlarged(self):
+        certification = self.create(foto=self.photo(size=(200, 100)))
+        with default_storage.open(images.derivative_name(certification.foto.name, 640, 'webp')) as file:
+            self.assertEqual(Image.open(file).size, (200, 100))
+
+    def test_srcset_in_api_and_public_page(self):
+        certification = self.create(foto=self.photo())
+        data = self.client.get(f'/api/certifications/link/{certification.unique_link}/').json()
+        srcset = data['foto_srcset']
+        self.assertEqual(srcset['sizes'], images.DISPLAY_SIZE)
+        candidates = srcset['webp'].split(', ')
+        self.assertEqual([candidate.rsplit(' ', 1)[1] for candidate in candidates], ['160w', '320w', '640w'])
+        self.assertTrue(all(candidate.startswith('http://testserver/media/') for candidate in candidates))
+        self.assertTrue(srcset['src'].endswith('_w320.jpg'))
+
+        response = self.client.get(f'/api/certifications/view/{certification.unique_link}/')
+        self.assertContains(response, '<source type="image/webp"')
+
+        without_photo = self.create(2)
+        data = self.client.get(f'/api/certifications/link/{without_photo.unique_link}/').json()
+        self.assertIsNone(data['foto_srcset'])
+
+    def test_new_photo_replaces_derivatives(self):
+        certification = self.create(foto=self.photo())
+        previous = certification.foto.name
+
+        certification.foto = self.photo('blue')
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.save()
+        self.assertNotEqual(certification.foto.name, previous)
+        self.assertFalse(any(default_storage.exists(name) for name in images.derivative_names(previous)))
+        self.assertTrue(all(default_storage.exists(name) for name in images.derivative_names(certification.foto.name)))
+
+    def test_save_without_photo_change_skips_generation(self):
+        certification = self.create(foto=self.photo())
+        with mock.patch.object(images, 'generate_derivatives') as generate:
+            certification.nome_completo = 'Outro Nome'
+            certification.save(update_fields=['nome_completo'])
+            certification.save()
+        generate.assert_not_called()
+
+
+class FacetCountTests(CertificationTestCase):
+    """Contagens de facetas ajustadas pelas gravações"""
+
+    def count(self, field, value):
+        row = FacetCount.objects.filter(model='certifications.certification', field=field, value=value).first()
+        return row.count if row else 0
+
+    def test_save_update_and_delete_adjust_counts(self):
+        first = self.create(1)
+        self.create(2)
+        self.assertEqual(self.count('status', 'Aprovado'), 2)
+        self.assertEqual(self.count('ano', '2025'), 2)
+
+        first.status = 'Reprovado'
+        first.save()
+        self.assertEqual(self.count('status', 'Aprovado'), 1)
+        self.assertEqual(self.count('status', 'Reprovado'), 1)
+
+        first.delete()
+        self.assertEqual(self.count('status', 'Reprovado'), 0)
+        self.assertEqual(self.count('ano', '2025'), 1)
+
+    def test_update_fields_without_facets_skip_lookup(self):
+        certification = self.create()
+        certification.nome_completo = 'Outro Nome'
+        # Sem leitura dos valores anteriores nem ajuste das facetas
+        with CaptureQueriesContext(connection) as queries:
+            certification.save(update_fields=['nome_completo'])
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn(FacetCount._meta.db_table, sql)
+        self.assertNotIn('"status"', sql)
+        self.assertEqual(self.count('status', 'Aprovado'), 1)
+
+    def test_save_reads_previous_values_once(self):
+        certification = self.create()
+        certification.status = 'Reprovado'
+        certification.data_conclusao = datetime.date(2024, 6, 1)
+        certification.codigo = 'TEST-NOVO'
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                certification.save()
+        # Facetas, cache, QR codes e rollups partilham a mesma leitura
+        table = Certification._meta.db_table
+        previous = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}" WHERE "{table}"."id" =' in query['sql']
+        ]
+        self.assertEqual(len(previous), 1, previous)
+        self.assertEqual(self.count('status', 'Reprovado'), 1)
+        self.assertEqual(self.count('status', 'Aprovado'), 0)
+
+    def test_facets_endpoint(self):
+        self.create(1)
+        self.create(2, status='Em Andamento', ano='2024')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/certifications/facets/', {'facets': 'status,ano'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'status': {'Aprovado': 1, 'Em Andamento': 1},
+            'ano': {'2024': 1, '2025': 1},
+        })
+
+        # Segunda leitura vem do cache
+        with self.assertNumQueries(0):
+            self.client.get('/api/certifications/facets/', {'facets': 'status,ano'})
+
+        response = self.client.get('/api/certifications/facets/', {'facets': 'documento'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ThrottleTests(CertificationTestCase):
+    """Limites por IP com janela deslizante"""
+
+    rates = {'verificacao': '2/min', 'pagina_publica': '1/min'}
+
+    def setUp(self):
+        super().setUp()
+        self.certification = self.create()
+        self.now = 600.0
+        # As taxas são lidas na importação do DRF; o relógio fica no início de uma janela
+        for name, value in (('THROTTLE_RATES', self.rates), ('timer', lambda throttle: self.now)):
+            patcher = mock.patch.object(EndpointRateThrottle, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_by_codigo(self):
+        return self.client.get(f'/api/certifications/codigo/{self.certification.codigo}/')
+
+    def test_over_rate_returns_429_with_retry_after(self):
+        self.assertEqual(self.get_by_codigo().status_code, 200)
+        self.assertEqual(self.get_by_codigo().status_code, 200)
+
+        # Rejeitado antes da autenticação: nenhuma consulta ao banco
+        with self.assertNumQueries(0):
+            response = self.get_by_codigo()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+    def test_previous_window_still_counts(self):
+        self.get_by_codigo()
+        self.get_by_codigo()
+
+        # A meio da janela seguinte metade dos pedidos anteriores ainda conta
+        self.now += 90
+        self.assertEqual(self.get_by_codigo().status_code, 200)
+        response = self.get_by_codigo()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_one_read_and_one_write_per_request(self):
+        store = caches[settings.THROTTLE_CACHE_ALIAS]
+        methods = {}
+        for name in ('get_many', 'add', 'incr', 'set'):
+            patcher = mock.patch.object(store, name, side_effect=getattr(store, name))
+            methods[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+
+        def calls():
+            used = {name: method.call_count for name, method in methods.items() if method.call_count}
+            for method in methods.values():
+                method.reset_mock()
+            return used
+
+        throttle = EndpointRateThrottle()
+        self.assertIsNone(throttle.rate)
+        request = RequestFactory().get('/')
+        self.assertTrue(throttle.allow_scope(request, 'verificacao'))
+        # Primeiro pedido da janela: o contador é criado com add
+        self.assertEqual(calls(), {'get_many': 1, 'add': 1})
+        self.assertTrue(throttle.allow_scope(request, 'verificacao'))
+        self.assertEqual(calls(), {'get_many': 1, 'incr': 1})
+
+    def test_public_page_returns_429(self):
+        url = f'/api/certifications/view/{self.certification.unique_link}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+
+class DeclarationPdfTests(CertificationTestCase):
+    """Declaração em PDF gerada uma vez por versão e servida com ETag"""
+
+    def setUp(self):
+        super().setUp()
+        self.certification = self.create()
+        self.url = f'/api/certifications/{self.certification.pk}/pdf/'
+        self.token = declarations.version_token(self.certification.pk, self.certification.updated_at)
+
+    def test_pdf_is_rendered_once_per_version(self):
+        with mock.patch.object(declarations, 'render', wraps=declarations.render) as render:
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+            self.assertEqual(response['ETag'], f'"{self.token}"')
+            self.assertIn('no-cache', response['Cache-Control'])
+
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(render.call_count, 1)
+
+    def test_conditional_get_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        with mock.patch.object(declarations, 'get_pdf') as get_pdf:
+            response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        get_pdf.assert_not_called()
+
+    def test_versioned_url_is_immutable(self):
+        response = self.client.get(self.url, {'v': self.token})
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(self.url, {'v': 'antigo'})
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_new_version_replaces_previous_pdf(self):
+        previous = declarations.get_pdf(self.certification.pk, self.certification.updated_at)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certification.status = 'Reprovado'
+            self.certification.save()
+
+        response = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], f'"{self.token}"')
+        self.assertFalse(default_storage.exists(previous))
+
+    def test_generation_in_progress_returns_503_without_waiting(self):
+        name = declarations.pdf_name(self.certification.pk, self.certification.updated_at)
+        # Outro pedido tem o lock desta versão
+        caches['default'].add(f"certifications:pdf:lock:{name}", 1)
+        with mock.patch.object(declarations, 'render') as render, \
+                mock.patch('time.sleep', side_effect=AssertionError("não deve esperar")):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        render.assert_not_called()
+
+    def test_etag_matches_the_served_version(self):
+        generate = declarations.generate
+
+        def changed_meanwhile(pk):
+            # Outra gravação entre a leitura da view e a geração
+            Certification.objects.filter(pk=pk).update(updated_at=timezone.now())
+            return generate(pk)
+
+        with mock.patch.object(declarations, 'generate', changed_meanwhile):
+            response = self.client.get(self.url, {'v': self.token})
+        self.assertEqual(response.status_code, 200)
+        certification = Certification.objects.get(pk=self.certification.pk)
+        self.assertEqual(response['ETag'], declarations.make_etag(certification.pk, certification.updated_at))
+        self.assertNotEqual(response['ETag'], f'"{self.token}"')
+        # O ?v= pedido já não corresponde ao arquivo servido
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    @override_settings(CERTIFICATION_PDF_BACKGROUND=True)
+    def test_generated_after_commit_once_per_batch(self):
+        certification = self.create(2)
+        self.assertTrue(default_storage.exists(declarations.pdf_name(certification.pk, certification.updated_at)))
+
+        with mock.patch.object(declarations, 'generate_many') as generate_many:
+            with self.captureOnCommitCallbacks(execute=True):
+                CertificationImporter().run(enumerate([import_row(1), import_row(2), import_row(3)], start=1))
+        generate_many.assert_called_once()
+        self.assertEqual(len(generate_many.call_args.args[0]), 3)
+
+
+@override_settings(CHANGES_SAFETY_LAG=0)
+class ChangeFeedTests(CertificationTestCase):
+    """Feed de alterações: gravações e exclusões por cursor"""
+
+    url = '/api/certifications/changes/'
+
+    def setUp(self):
+        super().setUp()
+        self.certifications = [self.create(index) for index in range(1, 6)]
+
+    def page(self, cursor=None, **params):
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_pages_include_deletes_without_duplicates(self):
+        ids = {certification.pk for certification in self.certifications}
+        first = self.page(limit=2)
+        self.assertTrue(first['has_more'])
+        seen = [(entry['op'], entry['id']) for entry in first['results']]
+
+        # Exclusão a meio da sincronização: chega como 'delete' no fim
+        removed = self.certifications[3].pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certifications[3].delete()
+
+        cursor = first['cursor']
+        while True:
+            data = self.page(cursor, limit=2)
+            seen += [(entry['op'], entry['id']) for entry in data['results']]
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+
+        upserts = [pk for op, pk in seen if op == 'upsert']
+        self.assertEqual(len(upserts), len(set(upserts)))
+        self.assertEqual(set(upserts), ids - {removed})
+        self.assertEqual(seen[-1], ('delete', removed))
+
+        # Nada de novo depois do último cursor
+        self.assertEqual(self.page(cursor)['results'], [])
+
+    def test_update_after_cursor_is_delivered_again(self):
+        cursor = self.page()['cursor']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certifications[0].status = 'Reprovado'
+            self.certifications[0].save()
+
+        results = self.page(cursor)['results']
+        self.assertEqual([(entry['op'], entry['id']) for entry in results], [('upsert', self.certifications[0].pk)])
+        self.assertEqual(results[0]['data']['status'], 'Reprovado')
+
+    def test_cursor_before_prune_watermark_is_gone(self):
+        cursor = self.page(limit=1)['cursor']
+        PruneWatermark.objects.create(model='certifications.certification', pruned_until=timezone.now())
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(response.status_code, 410)
+
+    def test_invalid_parameters_return_400(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'invalido'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'updated_since': 'ontem'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'limit': '0'}).status_code, 400)
+
+    def test_ndjson_stream_ends_with_cursor(self):
+        response = self.client.get(self.url, {'formato': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([line['op'] for line in lines], ['upsert'] * 5 + ['end'])
+
+        self.assertEqual(self.page(lines[-1]['cursor'])['results'], [])
+
+
+@override_settings(LIST_CACHE_TIMEOUT=60)
+class ListCacheTests(CertificationTestCase):
+    """Listagens em cache sob o namespace versionado dos modelos"""
+
+    url = '/api/certifications/'
+
+    def setUp(self):
+        super().setUp()
+        self.certification = self.create()
+
+    def names(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [modulo['nome'] for item in response.json()['results'] for modulo in item['modulos']]
+
+    def test_cached_list_does_not_query_database(self):
+        self.names()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Requisitos'])
+
+    def test_related_change_invalidates_after_commit(self):
+        self.names()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Modulo.objects.create(certification=self.certification, nome='Auditoria')
+            # Antes do commit a versão não muda: a listagem antiga continua válida
+            self.assertEqual(self.names(), ['Requisitos'])
+        self.assertTrue(callbacks)
+        self.assertEqual(sorted(self.names()), ['Auditoria', 'Requisitos'])
+
+
+class QrCodeTests(CertificationTestCase):
+    """QR codes gerados depois do commit, fora do pedido"""
+
+    def test_generated_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            certification = make_certification(10)
+        self.assertFalse(qr.exists(certification.unique_link))
+
+        for callback in callbacks:
+            callback()
+        self.assertTrue(qr.exists(certification.unique_link))
+        self.assertTrue(default_storage.exists(qr.qr_name(certification.unique_link, 'svg')))
+
+    def test_link_change_replaces_files(self):
+        certification = self.create(20)
+        previous = certification.unique_link
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.unique_link = 'novo-link'
+            certification.save()
+        self.assertFalse(qr.exists(previous))
+        self.assertTrue(qr.exists('novo-link'))
+
+    def test_bulk_import_defers_one_task(self):
+        rows = [import_row(index) for index in range(1, 6)]
+        with mock.patch.object(tasks.refresh_artifacts, 'function') as refresh, \
+                mock.patch.object(qr, 'render') as render:
+            with self.captureOnCommitCallbacks(execute=True):
+                CertificationImporter().run(enumerate(rows, start=1))
+        render.assert_not_called()
+        refresh.assert_called_once()
+        self.assertEqual(sorted(refresh.call_args.args[0]), sorted(Certification.objects.values_list('pk', flat=True)))
+
+    @mock.patch.object(qr, 'POOL_THRESHOLD', 2)
+    def test_generate_many_with_process_pool(self):
+        links = ['link-a', 'link-b', 'link-c']
+        self.assertEqual(qr.generate_many(links, workers=2), (3, []))
+        self.assertTrue(all(qr.exists(link) for link in links))
+        # Os que já existem não são gerados de novo
+        self.assertEqual(qr.generate_many(links + ['link-d'], workers=1), (1, []))
+
+    def test_backfill_command(self):
+        with mock.patch.object(tasks.refresh_artifacts, 'function'):
+            certification = self.create(30)
+        self.assertFalse(qr.exists(certification.unique_link))
+        call_command('generate_qr_codes', workers=1, stdout=io.StringIO())
+        self.assertTrue(qr.exists(certification.unique_link))
+
+
+class BackgroundJobTests(CertificationTestCase):
+    """Tarefas depois do commit agrupadas num só lote"""
+
+    def test_repeated_ids_are_merged_into_one_run(self):
+        calls = []
+        done = threading.Event()
+
+        def record(ids):
+            calls.append(ids)
+            done.set()
+
+        job = background.Job('teste', record)
+        with self.settings(BACKGROUND_JOBS_INLINE=False):
+            # Um commit com vários callbacks (ex.: formset com N módulos)
+            for ids in ([1], [2, 1], [1], [3]):
+                job.submit(ids)
+            self.assertTrue(done.wait(5))
+        self.assertEqual(calls, [[1, 2, 3]])
+        self.assertTrue(job.thread.daemon)
+
+    def test_flush_runs_pending_ids(self):
+        calls = []
+        job = background.Job('teste', calls.append)
+        job.pending.update(dict.fromkeys([4, 5]))
+        self.assertEqual(job.flush(), 2)
+        self.assertEqual(calls, [[4, 5]])
+
+
+@override_settings(DECLARATIONS_PUBLISH_ON_SAVE=True)
+class PublishingTests(CertificationTestCase):
+    """Páginas estáticas republicadas em segundo plano depois de gravar"""
+
+    def setUp(self):
+        super().setUp()
+        # Diretório próprio por teste: as páginas não são desfeitas com a transação
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(self.settings(DECLARATIONS_PUBLISH_ROOT=root))
+
+    def page(self, link, suffix=''):
+        return os.path.join(settings.DECLARATIONS_PUBLISH_ROOT, publishing.PAGES_DIR, link, 'index.html' + suffix)
+
+    def test_save_publishes_page_and_entry(self):
+        with mock.patch.object(publishing.brotli, 'compress', wraps=publishing.brotli.compress) as compress:
+            certification = self.create(1)
+        with open(self.page(certification.unique_link), encoding='utf-8') as file:
+            self.assertIn(certification.nome_completo, file.read())
+        self.assertTrue(os.path.exists(self.page(certification.unique_link, '.gz')))
+        self.assertTrue(os.path.exists(self.page(certification.unique_link, '.br')))
+        # Compressão mais rápida ao gravar
+        self.assertEqual(compress.call_args.kwargs['quality'], publishing.SAVE_BROTLI_QUALITY)
+        self.assertEqual(publishing.read_entry(certification.pk), publishing.manifest_entry(
+            certification.unique_link, certification.updated_at
+        ))
+
+    def test_link_change_and_delete_remove_pages(self):
+        certification = self.create(2)
+        previous = certification.unique_link
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.unique_link = 'link-publicado'
+            certification.save()
+        self.assertFalse(os.path.exists(self.page(previous)))
+        self.assertTrue(os.path.exists(self.page('link-publicado')))
+        self.assertEqual(publishing.read_entry(certification.pk)['link'], 'link-publicado')
+
+        pk = certification.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.delete()
+        self.assertFalse(os.path.exists(self.page('link-publicado')))
+        self.assertIsNone(publishing.read_entry(pk))
+
+    def test_republishing_touches_only_its_entry(self):
+        first = self.create(3)
+        second = self.create(4)
+        with mock.patch.object(publishing, 'read_manifest') as read_manifest, \
+                mock.patch.object(publishing, 'write_entry', wraps=publishing.write_entry) as write_entry:
+            publishing.publish_certifications([first.pk])
+        read_manifest.assert_not_called()
+        self.assertEqual([call.args[0] for call in write_entry.call_args_list], [first.pk])
+        self.assertIsNotNone(publishing.read_entry(second.pk))
+
+    def test_command_publishes_only_changes(self):
+        with self.settings(DECLARATIONS_PUBLISH_ON_SAVE=False):
+            certification = self.create(5)
+        output = io.StringIO()
+        call_command('publish_declarations', workers=1, stdout=output)
+        self.assertIn("1 páginas publicadas", output.getvalue())
+        self.assertTrue(os.path.exists(self.page(certification.unique_link)))
+
+        output = io.StringIO()
+        call_command('publish_declarations', workers=1, stdout=output)
+        self.assertIn("0 páginas publicadas, 1 inalteradas", output.getvalue())
+
+    def test_legacy_manifest_is_converted(self):
+        certification = self.create(6)
+        root = settings.DECLARATIONS_PUBLISH_ROOT
+        publishing.remove_entry(certification.pk)
+        legacy = {'pages': {str(certification.pk): publishing.manifest_entry('link-antigo', certification.updated_at)}}
+        with open(os.path.join(root, publishing.LEGACY_MANIFEST_FILE), 'w') as file:
+            json.dump(legacy, file)
+
+        publishing.publish_certifications([certification.pk])
+        self.assertFalse(os.path.exists(os.path.join(root, publishing.LEGACY_MANIFEST_FILE)))
+        # A entrada convertida indica o link antigo, cuja página é removida
+        self.assertEqual(publishing.read_entry(certification.pk)['link'], certification.unique_link)
@@ -9,13 +9,25 @@
 
 
 from rest_framework import routers
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
+from . import async_views
 from .views import CertificationViewSet, certification_public_view
 
 router = routers.DefaultRouter()
 router.register(r'', CertificationViewSet)
 
-urlpatterns = [
-    path('link/<str:unique_link>/', CertificationViewSet.as_view({'get': 'get_by_link'}), name='certification-by-link'),
-    path('view/<str:unique_link>/', certification_public_view, name='certification-public-view'),
-] + router.urls
\ No newline at end of file
+if settings.ASYNC_VIEWS:
+    # Antes das rotas do router para que o código seja atendido pela view assíncrona
+    urlpatterns = [
+        path('link/<str:unique_link>/', async_views.get_by_link, name='certification-by-link'),
+        re_path(r'^codigo/(?P<codigo>[^/.]+)/$', async_views.get_by_codigo, name='certification-get-by-codigo'),
+        path('view/<str:unique_link>/', async_views.certification_public_view, name='certification-public-view'),
+    ]
+else:
+    urlpatterns = [
+        path('link/<str:unique_link>/', CertificationViewSet.as_view({'get': 'get_by_link'}), name='certification-by-link'),
+        path('view/<str:unique_link>/', certification_public_view, name='certification-public-view'),
+    ]
+
+urlpatterns += router.urls
\ No newline at end of file
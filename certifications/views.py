@@ -1,34 +1,118 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from django.db.models import Q
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render, get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import logging
 
-from .models import Certification
-from .serializers import CertificationSerializer
+from backend.caching import NamespacedListCacheMixin
+from backend.media import IMMUTABLE_MAX_AGE
+from backend.fast_serializers import CompiledSerializer, FastListMixin
+from backend.throttling import EarlyThrottleMixin, rate_limit_wait, too_many_requests
+from changes.feed import ChangeFeed
+from changes.views import change_feed_response
+from facets.views import facets_response
+
+from . import cache, declarations
+from .images import absolutize_srcset
+from .importers import FORMATS, CertificationImporter, parse_rows
+from .models import Certification, Modulo
+from .pagination import CertificationKeysetPagination
+from .search import CertificationSearchFilter, search_by_name
+from .serializers import (
+    FIELD_SOURCES, VERIFICATION_FIELDS, BatchVerificationSerializer, CertificationSerializer,
+    CertificationVerificationSerializer, parse_fields, project,
+)
 
 logger = logging.getLogger(__name__)
 
-class CertificationViewSet(viewsets.ModelViewSet):
+class CertificationViewSet(EarlyThrottleMixin, NamespacedListCacheMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Certification.objects.select_related().prefetch_related('modulos')
     serializer_class = CertificationSerializer
+    cache_models = (Certification, Modulo)
+    fast_serializer = CompiledSerializer(CertificationSerializer, sources=FIELD_SOURCES)
+    filter_backends = [CertificationSearchFilter, OrderingFilter]
     filterset_fields = ['status', 'curso', 'ano']
     search_fields = ['nome_completo', 'documento', 'codigo', 'curso']
     ordering_fields = ['data_conclusao', 'created_at', 'nome_completo']
     ordering = ['-created_at']
+    # Limites por IP das verificações públicas (ver backend/throttling.py)
+    throttle_scopes = {
+        'get_by_link': 'verificacao', 'get_by_codigo': 'verificacao', 'verify': 'verificacao',
+        'pdf': 'pagina_publica',
+    }
+
+    @property
+    def paginator(self):
+        """Usa paginação por cursor quando solicitada (?paginacao=cursor)"""
+        if not hasattr(self, '_paginator') and CertificationKeysetPagination.is_requested(self.request):
+            self._paginator = CertificationKeysetPagination()
+        return super().paginator
+
+    # Ações em que ?fields= restringe a resposta
+    sparse_actions = ('list', 'retrieve', 'get_by_link', 'get_by_codigo')
+
+    @property
+    def requested_fields(self):
+        """Campos pedidos em ?fields= (``None`` = todos)"""
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = None
+            if self.action in self.sparse_actions:
+                self._requested_fields = parse_fields(
+                    self.request.query_params.get('fields'), CertificationSerializer.Meta.fields
+                )
+        return self._requested_fields
+
+    def use_fast_serializer(self):
+        """A listagem com ?fields= usa a projeção com .only()"""
+        return super().use_fast_serializer() and not self.requested_fields
+
+    def get_serializer_class(self):
+        """Usa a projeção de verificação quando só campos simples são pedidos"""
+        fields = self.requested_fields
+        if fields and set(fields) <= set(VERIFICATION_FIELDS):
+            return CertificationVerificationSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields
+        return context
+
+    def _only_requested_columns(self, queryset, fields):
+        """Carrega só as colunas necessárias para os campos pedidos"""
+        concrete = {field.name for field in Certification._meta.concrete_fields}
+        # id e campos de ordenação/cursor são sempre carregados
+        columns = {'id', 'created_at', 'data_conclusao'}
+        for name in fields:
+            columns.update(column for column in FIELD_SOURCES.get(name, (name,)) if column in concrete)
+        queryset = queryset.only(*columns)
+        if 'modulos' not in fields:
+            queryset = queryset.prefetch_related(None)
+        return queryset
 
     def get_queryset(self):
         """Otimiza queries com filtros adicionais"""
         queryset = super().get_queryset()
+
+        fields = self.requested_fields
+        if fields:
+            queryset = self._only_requested_columns(queryset, fields)
         
         # Filtro por nome
         nome = self.request.query_params.get('nome', None)
         if nome:
-            queryset = queryset.filter(nome_completo__icontains=nome)
+            queryset = search_by_name(queryset, nome)
         
         # Filtro por documento
         documento = self.request.query_params.get('documento', None)
@@ -71,15 +155,176 @@ class CertificationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(
+        detail=False, methods=['post'], url_path='bulk-import',
+        permission_classes=[IsAdminUser], parser_classes=[MultiPartParser, JSONParser]
+    )
+    def bulk_import(self, request):
+        """
+        Importa uma turma inteira de certificações (com módulos).
+
+        Aceita um arquivo ``arquivo`` (.csv ou .jsonl) ou um JSON
+        ``{"certificacoes": [...]}``. Devolve as linhas criadas e os erros por linha.
+        """
+        try:
+            upload = request.FILES.get('arquivo')
+            if upload:
+                fmt = request.data.get('formato') or upload.name.rsplit('.', 1)[-1].lower()
+                if fmt not in FORMATS:
+                    return Response(
+                        {"error": "Formato não suportado. Use csv ou jsonl"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                rows = parse_rows(upload.file, fmt)
+            else:
+                items = request.data.get('certificacoes')
+                if not isinstance(items, list):
+                    return Response(
+                        {"error": "Envie um arquivo ou a lista 'certificacoes'"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                rows = enumerate(items, start=1)
+
+            result = CertificationImporter().run(rows)
+            logger.info(f"Importação em lote: {result.created} criadas, {len(result.errors)} erros")
+            response_status = status.HTTP_201_CREATED if result.created else status.HTTP_400_BAD_REQUEST
+            return Response(result.as_dict(), status=response_status)
+        except Exception as e:
+            logger.error(f"Erro na importação em lote: {str(e)}")
+            return Response(
+                {"error": "Erro ao importar certificações"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['post'], url_path='verify')
+    def verify(self, request):
+        """
+        Verifica várias certificações num só pedido.
+
+        Recebe ``{"codigos": [...], "links": [...]}`` e devolve o estado de cada
+        um, por código e por link, com uma só consulta com ``IN``. Só certificações
+        aprovadas são válidas; as demais devolvem ``valido`` falso com o status.
+        """
+        serializer = BatchVerificationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": "Dados inválidos", "details": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            codigos = serializer.validated_data['codigos']
+            links = serializer.validated_data['links']
+            certifications = Certification.objects.filter(
+                Q(codigo__in=codigos) | Q(unique_link__in=links)
+            ).only(
+                'nome_completo', 'curso', 'data_conclusao', 'status', 'codigo', 'unique_link'
+            )
+
+            by_codigo = {}
+            by_link = {}
+            for certification in certifications:
+                summary = self._verification_summary(certification)
+                by_codigo[certification.codigo] = summary
+                by_link[certification.unique_link] = summary
+
+            not_found = {"valido": False}
+            logger.info(f"Verificação em lote: {len(codigos) + len(links)} pedidos, {len(by_codigo)} encontradas")
+            return Response({
+                "codigos": {codigo: by_codigo.get(codigo, not_found) for codigo in codigos},
+                "links": {link: by_link.get(link, not_found) for link in links},
+            })
+        except Exception as e:
+            logger.error(f"Erro na verificação em lote: {str(e)}")
+            return Response(
+                {"error": "Erro ao verificar certificações"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'], url_path='facets')
+    def facets(self, request):
+        """Quantidade de certificações por status, ano e curso"""
+        return facets_response(request, Certification)
+
+    @action(detail=True, methods=['get'], url_path='pdf')
+    def pdf(self, request, pk=None):
+        """
+        Declaração em PDF, gerada uma vez por versão da certificação.
+
+        Pedidos condicionais recebem 304 sem abrir o arquivo. A URL versionada
+        (``?v=`` com o valor do ETag, sem aspas) é servida como imutável.
+        Enquanto outro pedido gera o PDF a resposta é 503 com ``Retry-After``.
+        """
+        certification = get_object_or_404(Certification.objects.only('id', 'codigo', 'updated_at'), pk=pk)
+        token = declarations.version_token(certification.pk, certification.updated_at)
+        etag = declarations.make_etag(certification.pk, certification.updated_at)
+        last_modified = int(certification.updated_at.timestamp())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            try:
+                name = declarations.get_pdf(certification.pk, certification.updated_at)
+                response = FileResponse(
+                    default_storage.open(name, 'rb'), content_type='application/pdf',
+                    as_attachment=True, filename=f"declaracao-{certification.codigo}.pdf"
+                )
+                served = declarations.name_token(name)
+                if served != token:
+                    # A certificação mudou entretanto e foi servida a versão mais recente
+                    token = served
+                    response.headers['ETag'] = '"%s"' % served
+                    last_modified = None
+            except declarations.GenerationInProgress:
+                logger.warning(f"Declaração da certificação {pk} ainda em geração")
+                return Response(
+                    {"error": "Declaração em geração. Tente novamente em instantes"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={'Retry-After': '5'}
+                )
+            except Exception as e:
+                logger.error(f"Erro ao gerar declaração em PDF: {str(e)}")
+                return Response(
+                    {"error": "Erro ao gerar declaração"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        if request.query_params.get('v') == token:
+            patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """Certificações gravadas ou excluídas desde um cursor (sincronização incremental)"""
+        feed = ChangeFeed(self.fast_serializer, context=self.get_serializer_context())
+        return change_feed_response(request, feed)
+
+    @staticmethod
+    def _verification_summary(certification):
+        """Resumo devolvido pela verificação em lote"""
+        return {
+            "valido": certification.status == 'Aprovado',
+            "status": certification.status,
+            "nome": certification.nome_completo,
+            "curso": certification.curso,
+            "data_conclusao": certification.data_conclusao.isoformat(),
+        }
+
+    def _with_absolute_urls(self, data):
+        """Torna absolutas as URLs da foto e dos QR codes de um payload vindo do cache"""
+        return with_absolute_urls(data, self.request.build_absolute_uri)
+
     @action(detail=False, methods=['get'], url_path='link/(?P<unique_link>[^/.]+)')
     def get_by_link(self, request, unique_link=None):
         """Busca certificação por link único"""
+        fields = self.requested_fields
         try:
-            certification = Certification.objects.select_related().prefetch_related('modulos').get(
-                unique_link=unique_link
-            )
-            serializer = self.get_serializer(certification)
-            return Response(serializer.data)
+            data = cache.get_verification_payload('unique_link', unique_link)
+            return Response(self._with_absolute_urls(project(data, fields)))
         except Certification.DoesNotExist:
             logger.warning(f"Certificação não encontrada para link: {unique_link}")
             return Response(
@@ -96,12 +341,10 @@ class CertificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='codigo/(?P<codigo>[^/.]+)')
     def get_by_codigo(self, request, codigo=None):
         """Busca certificação por código"""
+        fields = self.requested_fields
         try:
-            certification = Certification.objects.select_related().prefetch_related('modulos').get(
-                codigo=codigo
-            )
-            serializer = self.get_serializer(certification)
-            return Response(serializer.data)
+            data = cache.get_verification_payload('codigo', codigo)
+            return Response(self._with_absolute_urls(project(data, fields)))
         except Certification.DoesNotExist:
             logger.warning(f"Certificação não encontrada para código: {codigo}")
             return Response(
@@ -116,16 +359,41 @@ class CertificationViewSet(viewsets.ModelViewSet):
             )
 
 
+def with_absolute_urls(data, build_url):
+    """Torna absolutas as URLs da foto e dos QR codes de um payload vindo do cache"""
+    for field in ('foto', 'qr_url', 'qr_svg_url'):
+        if data.get(field):
+            data = dict(data, **{field: build_url(data[field])})
+    if data.get('foto_srcset'):
+        data = dict(data, foto_srcset=absolutize_srcset(data['foto_srcset'], build_url))
+    return data
+
+
+def public_page_response(request, page):
+    """Resposta da página pública, com 304 para pedidos condicionais"""
+    html, etag, last_modified = page
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(html)
+
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(last_modified))
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
 def certification_public_view(request, unique_link):
-    """View pública para exibir certificação sem autenticação"""
-    certification = get_object_or_404(
-        Certification.objects.prefetch_related('modulos'),
-        unique_link=unique_link
-    )
-    
-    context = {
-        'certification': certification,
-        'modulos': certification.modulos.all()
-    }
-    
-    return render(request, 'certifications/public_view.html', context)
\ No newline at end of file
+    """
+    View pública para exibir certificação sem autenticação.
+
+    Serve o HTML já renderizado do cache e responde 304 a requisições
+    condicionais (If-None-Match / If-Modified-Since) sem renderizar o template.
+    """
+    wait = rate_limit_wait(request, 'pagina_publica')
+    if wait is not None:
+        return too_many_requests(wait)
+    try:
+        page = cache.get_public_page(unique_link)
+    except Certification.DoesNotExist:
+        raise Http404("Certificação não encontrada")
+    return public_page_response(request, page)
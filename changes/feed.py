@@ -0,0 +1,193 @@
+"""
+Feed de alterações por modelo, para sincronização incremental.
+
+Em vez de voltar a descarregar a listagem inteira, o cliente guarda um cursor
+e pede só o que mudou depois dele: linhas gravadas (pelo ``updated_at``) e
+linhas excluídas (pelos ``Tombstone`` do ``post_delete``), numa só sequência
+ordenada por ``(momento, id)``. As duas consultas percorrem os índices
+``(updated_at, id)`` e ``(model, deleted_at, object_id)``, por isso o custo
+depende do número de alterações e não do tamanho da tabela.
+
+Só entram alterações com mais de ``CHANGES_SAFETY_LAG`` segundos: o
+``updated_at`` é definido antes do commit, e uma transação ainda aberta
+poderia gravar um momento que o cursor de um cliente já ultrapassou.
+As exclusões ficam guardadas ``CHANGES_TOMBSTONE_RETENTION_DAYS`` dias;
+um cursor anterior às últimas exclusões removidas (``PruneWatermark``)
+obriga a uma sincronização completa.
+"""
+import base64
+import heapq
+import json
+from collections import namedtuple
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from .models import PruneWatermark, Tombstone
+
+UPSERT, DELETE = 'upsert', 'delete'
+
+_timestamp = serializers.DateTimeField()
+
+
+class Cursor(namedtuple('Cursor', ('timestamp', 'id', 'deleted'))):
+    """
+    Posição no feed: momento, id e se é uma exclusão.
+
+    A ordem das tuplas é a ordem do feed (uma gravação e uma exclusão no mesmo
+    momento e id saem por essa ordem).
+    """
+    __slots__ = ()
+
+    @classmethod
+    def since(cls, timestamp):
+        """Cursor que inclui as alterações a partir de ``timestamp`` (inclusive)"""
+        return cls(timestamp, 0, False)
+
+    @classmethod
+    def decode(cls, value):
+        """Interpreta um cursor devolvido pelo feed; levanta ``ValueError``"""
+        try:
+            position = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+            timestamp = parse_datetime(position['t'])
+            if timestamp is None or timezone.is_naive(timestamp):
+                raise ValueError
+            return cls(timestamp, int(position['id']), bool(position.get('d')))
+        except Exception:
+            raise ValueError("Cursor inválido")
+
+    def encode(self):
+        position = {'t': self.timestamp.isoformat(), 'id': self.id}
+        if self.deleted:
+            position['d'] = 1
+        return base64.urlsafe_b64encode(json.dumps(position).encode('ascii')).decode('ascii')
+
+
+def upper_bound():
+    """Momento até ao qual as alterações já podem ser entregues"""
+    return timezone.now() - timedelta(seconds=settings.CHANGES_SAFETY_LAG)
+
+
+def horizon():
+    """Momento a partir do qual as exclusões ainda estão guardadas"""
+    return timezone.now() - timedelta(days=settings.CHANGES_TOMBSTONE_RETENTION_DAYS)
+
+
+class ChangeFeed:
+    """
+    Alterações de um modelo, com os dados serializados por ``CompiledSerializer``.
+
+    O modelo precisa de ``updated_at`` (com índice ``(updated_at, id)``) e de
+    ter sido registado com ``register`` para que as exclusões apareçam.
+    """
+
+    def __init__(self, serializer, context=None, queryset=None):
+        self.serializer = serializer
+        self.context = context
+        self.model = serializer.model
+        self.queryset = queryset if queryset is not None else self.model._default_manager.all()
+        self.label = self.model._meta.label_lower
+
+    def pruned_until(self):
+        """Momento até ao qual as exclusões do modelo já foram removidas (ou ``None``)"""
+        return PruneWatermark.objects.filter(model=self.label).values_list('pruned_until', flat=True).first()
+
+    def is_expired(self, cursor):
+        """Indica se exclusões posteriores ao cursor já foram removidas"""
+        if cursor is None:
+            return False
+        pruned_until = self.pruned_until()
+        return pruned_until is not None and cursor.timestamp < pruned_until
+
+    def _saved(self, cursor, upper, limit):
+        queryset = self.queryset.filter(updated_at__lte=upper)
+        if cursor:
+            # O __gte redundante dá ao banco o início do intervalo no índice
+            queryset = queryset.filter(updated_at__gte=cursor.timestamp).filter(
+                Q(updated_at__gt=cursor.timestamp) | Q(updated_at=cursor.timestamp, pk__gt=cursor.id)
+            )
+        rows = queryset.order_by('updated_at', 'pk').values_list('updated_at', 'pk')[:limit]
+        return [Cursor(timestamp, pk, False) for timestamp, pk in rows]
+
+    def _deleted(self, cursor, upper, limit):
+        queryset = Tombstone.objects.filter(model=self.label, deleted_at__lte=upper)
+        if cursor:
+            same_moment = Q(deleted_at=cursor.timestamp, object_id__gt=cursor.id)
+            if not cursor.deleted:
+                same_moment |= Q(deleted_at=cursor.timestamp, object_id=cursor.id)
+            queryset = queryset.filter(deleted_at__gte=cursor.timestamp).filter(
+                Q(deleted_at__gt=cursor.timestamp) | same_moment
+            )
+        rows = queryset.order_by('deleted_at', 'object_id').values_list('deleted_at', 'object_id')[:limit]
+        return [Cursor(timestamp, pk, True) for timestamp, pk in rows]
+
+    def page(self, cursor, upper, limit):
+        """
+        Até ``limit`` alterações depois de ``cursor`` e até ``upper``.
+
+        Retorna ``(entradas, cursor_seguinte, ha_mais)``; sem alterações, o
+        cursor seguinte é o recebido.
+        """
+        merged = heapq.merge(self._saved(cursor, upper, limit + 1), self._deleted(cursor, upper, limit + 1))
+        positions = list(islice(merged, limit + 1))
+        has_more = len(positions) > limit
+        positions = positions[:limit]
+        return self.entries(positions), (positions[-1] if positions else cursor), has_more
+
+    def entries(self, positions):
+        """Entradas do feed; as linhas gravadas são serializadas numa consulta"""
+        ids = [position.id for position in positions if not position.deleted]
+        data = {}
+        if ids:
+            rows = self.serializer.values(self.queryset.filter(pk__in=ids))
+            data = {item['id']: item for item in self.serializer.serialize(rows, self.context)}
+
+        entries = []
+        for position in positions:
+            if position.deleted:
+                entries.append({
+                    'op': DELETE, 'id': position.id,
+                    'deleted_at': _timestamp.to_representation(position.timestamp),
+                })
+            elif position.id in data:
+                # Sem dados: excluída entre as duas consultas, a exclusão vem depois
+                entries.append({
+                    'op': UPSERT, 'id': position.id,
+                    'updated_at': _timestamp.to_representation(position.timestamp),
+                    'data': data[position.id],
+                })
+        return entries
+
+    def batches(self, cursor, upper, batch_size):
+        """Gera ``(entradas, cursor)`` em lotes até não haver mais alterações"""
+        has_more = True
+        while has_more:
+            entries, cursor, has_more = self.page(cursor, upper, batch_size)
+            yield entries, cursor
+
+
+def record_deletion(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+def register(model):
+    """Regista as exclusões de ``model`` para o feed de alterações"""
+    post_delete.connect(record_deletion, sender=model, dispatch_uid=f'changes_{model._meta.label_lower}')
+
+
+def prune():
+    """Remove as exclusões mais antigas que a retenção; retorna quantas"""
+    limit = horizon()
+    total = 0
+    labels = Tombstone.objects.filter(deleted_at__lt=limit).values_list('model', flat=True).distinct()
+    for label in list(labels):
+        deleted, _ = Tombstone.objects.filter(model=label, deleted_at__lt=limit).delete()
+        PruneWatermark.objects.update_or_create(model=label, defaults={'pruned_until': limit})
+        total += deleted
+    return total
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from changes import feed
+
+
+class Command(BaseCommand):
+    help = "Remove as exclusões registadas há mais de CHANGES_TOMBSTONE_RETENTION_DAYS dias"
+
+    def handle(self, *args, **options):
+        deleted = feed.prune()
+        self.stdout.write(self.style.SUCCESS(
+            f"{deleted} exclusões removidas (retenção: {settings.CHANGES_TOMBSTONE_RETENTION_DAYS} dias)"
+        ))
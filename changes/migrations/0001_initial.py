@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PruneWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, unique=True, verbose_name='Modelo')),
+                ('pruned_until', models.DateTimeField(verbose_name='Removidas Até')),
+            ],
+            options={
+                'verbose_name': 'Limite de retenção',
+                'verbose_name_plural': 'Limites de retenção',
+            },
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='Rótulo do modelo (ex.: certifications.certification)', max_length=100, verbose_name='Modelo')),
+                ('object_id', models.BigIntegerField(verbose_name='ID do Registro')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Data de Exclusão')),
+            ],
+            options={
+                'verbose_name': 'Exclusão registada',
+                'verbose_name_plural': 'Exclusões registadas',
+                'indexes': [models.Index(fields=['model', 'deleted_at', 'object_id'], name='changes_tombstone_cursor')],
+            },
+        ),
+    ]
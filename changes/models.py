@@ -0,0 +1,58 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    Registro da exclusão de uma linha, entregue pelo feed de alterações.
+
+    Gravado pelo ``post_delete`` dos modelos registados (ver ``changes/feed.py``)
+    e removido pelo comando ``prune_tombstones`` após a retenção.
+    """
+    model = models.CharField(
+        max_length=100,
+        verbose_name="Modelo",
+        help_text="Rótulo do modelo (ex.: certifications.certification)"
+    )
+    object_id = models.BigIntegerField(
+        verbose_name="ID do Registro"
+    )
+    deleted_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Data de Exclusão"
+    )
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} ({self.deleted_at:%d/%m/%Y %H:%M})"
+
+    class Meta:
+        verbose_name = "Exclusão registada"
+        verbose_name_plural = "Exclusões registadas"
+        indexes = [
+            # Cursor do feed: (deleted_at, object_id) por modelo
+            models.Index(fields=['model', 'deleted_at', 'object_id'], name='changes_tombstone_cursor'),
+        ]
+
+
+class PruneWatermark(models.Model):
+    """
+    Até onde as exclusões de um modelo já foram removidas por ``prune_tombstones``.
+
+    Cursores anteriores a este momento podem ter perdido exclusões e recebem
+    410: o cliente tem de voltar a sincronizar a lista completa.
+    """
+    model = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Modelo"
+    )
+    pruned_until = models.DateTimeField(
+        verbose_name="Removidas Até"
+    )
+
+    def __str__(self):
+        return f"{self.model} ({self.pruned_until:%d/%m/%Y %H:%M})"
+
+    class Meta:
+        verbose_name = "Limite de retenção"
+        verbose_name_plural = "Limites de retenção"
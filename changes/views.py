@@ -0,0 +1,121 @@
+import logging
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.response import Response
+
+from backend.renderers import FastJSONRenderer
+
+from .feed import Cursor, upper_bound
+
+logger = logging.getLogger(__name__)
+
+# Alterações por página (JSON) e por consulta no streaming (NDJSON)
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+# Tamanho aproximado de cada bloco enviado ao cliente no streaming
+FLUSH_SIZE = 64 * 1024
+
+_renderer = FastJSONRenderer()
+
+
+def parse_position(params):
+    """Cursor de ``cursor`` ou de ``updated_since`` (ISO 8601); ``None`` = desde o início"""
+    if params.get('cursor'):
+        return Cursor.decode(params['cursor'])
+    value = params.get('updated_since')
+    if not value:
+        return None
+    timestamp = parse_datetime(value)
+    if timestamp is None:
+        raise ValueError("updated_since inválido (use ISO 8601, ex.: 2025-01-31T12:00:00Z)")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return Cursor.since(timestamp)
+
+
+def parse_limit(params):
+    value = params.get('limit')
+    if not value:
+        return PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit deve ser um número inteiro")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit deve estar entre 1 e {MAX_PAGE_SIZE}")
+    return limit
+
+
+def change_feed_response(request, feed):
+    """
+    Resposta de ``GET .../changes/``: alterações depois de ``cursor`` (ou desde
+    ``updated_since``), como ``{"results", "cursor", "has_more"}``.
+
+    Cada resultado é ``{"op": "upsert", "id", "updated_at", "data"}`` ou
+    ``{"op": "delete", "id", "deleted_at"}``. O cliente guarda o ``cursor``
+    devolvido e repete enquanto ``has_more``. Com ``?formato=ndjson`` todas as
+    alterações seguem num só pedido, uma por linha, terminando com
+    ``{"op": "end", "cursor"}``.
+    """
+    params = request.query_params
+    try:
+        cursor = parse_position(params)
+        limit = parse_limit(params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if feed.is_expired(cursor):
+        return Response(
+            {"error": "Cursor expirado: as exclusões já não estão guardadas. Sincronize a lista completa"},
+            status=status.HTTP_410_GONE
+        )
+
+    upper = upper_bound()
+    if params.get('formato') == 'ndjson':
+        response = StreamingHttpResponse(stream_ndjson(feed, cursor, upper), content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    try:
+        entries, cursor, has_more = feed.page(cursor, upper, limit)
+    except Exception as e:
+        logger.error(f"Erro ao ler alterações de {feed.label}: {str(e)}")
+        return Response(
+            {"error": "Erro ao ler alterações"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return Response({
+        'results': entries,
+        'cursor': cursor.encode() if cursor else None,
+        'has_more': has_more,
+    })
+
+
+def stream_ndjson(feed, cursor, upper):
+    """
+    Gera o NDJSON em blocos de bytes.
+
+    Numa falha a meio o fluxo termina sem a linha ``end``: o cliente retoma
+    com ``updated_since`` igual ao momento da última alteração que aplicou.
+    """
+    chunks, size = [], 0
+    try:
+        for entries, cursor in feed.batches(cursor, upper, STREAM_BATCH_SIZE):
+            for entry in entries:
+                line = _renderer.render(entry) + b'\n'
+                chunks.append(line)
+                size += len(line)
+                if size >= FLUSH_SIZE:
+                    yield b''.join(chunks)
+                    chunks, size = [], 0
+    except Exception as e:
+        logger.error(f"Erro no streaming de alterações de {feed.label}: {str(e)}")
+        yield b''.join(chunks)
+        return
+    chunks.append(_renderer.render({'op': 'end', 'cursor': cursor.encode() if cursor else None}) + b'\n')
+    yield b''.join(chunks)
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class FacetsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'facets'
+    verbose_name = 'Facetas'
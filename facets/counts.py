@@ -0,0 +1,140 @@
+"""
+Contagens por valor (facetas) mantidas de forma incremental.
+
+Cada modelo registado com ``register(model, fields)`` tem, em ``FacetCount``,
+uma linha por campo e valor com a quantidade de registros. Os signals de
+gravação/remoção ajustam as linhas afetadas (``F('count') + delta``), por isso
+filtros do admin e o endpoint ``facets/`` leem uma tabela pequena e indexada
+em vez de agrupar a tabela inteira.
+
+Para modelos com namespace em ``backend/caching.py`` as contagens lidas ficam
+no cache compartilhado até a próxima gravação do modelo. Valores nulos não
+são contados. Gravações que não disparam signals
+(``bulk_create``, ``QuerySet.update``) devem chamar ``add_instances`` ou
+``rebuild``; o comando ``rebuild_facets`` corrige qualquer divergência.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_save
+
+from backend import caching, snapshots
+
+from .models import FacetCount
+
+# Campos com facetas, por modelo
+registry = {}
+
+
+def label(model):
+    return model._meta.label_lower
+
+
+def to_value(value):
+    """Representação guardada na tabela (``None`` não é contado)"""
+    return None if value is None else str(value)
+
+
+def apply_deltas(model, deltas):
+    """Aplica ``{(campo, valor): delta}`` às contagens do modelo"""
+    for (field, value), delta in deltas.items():
+        if value is None or not delta:
+            continue
+        rows = FacetCount.objects.filter(model=label(model), field=field, value=value)
+        if rows.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                FacetCount.objects.create(model=label(model), field=field, value=value, count=delta)
+        except IntegrityError:
+            # Criada por outro processo entre o update e o create
+            rows.update(count=F('count') + delta)
+
+
+def add_instances(model, instances, sign=1):
+    """Conta (ou desconta, ``sign=-1``) instâncias gravadas sem signals"""
+    deltas = Counter()
+    for instance in instances:
+        for field in registry[model]:
+            deltas[(field, to_value(getattr(instance, field)))] += sign
+    apply_deltas(model, deltas)
+
+
+def rebuild(model):
+    """Recalcula do zero as contagens do modelo"""
+    rows = [
+        FacetCount(model=label(model), field=field, value=str(row[field]), count=row['total'])
+        for field in registry[model]
+        for row in model._default_manager.exclude(**{f'{field}__isnull': True})
+        .order_by().values(field).annotate(total=Count('pk'))
+    ]
+    with transaction.atomic():
+        FacetCount.objects.filter(model=label(model)).delete()
+        FacetCount.objects.bulk_create(rows)
+    return len(rows)
+
+
+def _load(model):
+    result = {field: {} for field in registry[model]}
+    rows = (
+        FacetCount.objects.filter(model=label(model), field__in=registry[model], count__gt=0)
+        .order_by('field', 'value').values_list('field', 'value', 'count')
+    )
+    for field, value, count in rows:
+        result[field][value] = count
+    return result
+
+
+def counts(model, fields=None):
+    """
+    Contagens atuais como ``{campo: {valor: quantidade}}``, valores ordenados.
+
+    Uma única consulta à tabela de facetas (nenhuma quando está no cache).
+    """
+    if model in caching.registered_models:
+        cache = caching.get_cache()
+        key = caching.versioned_key((model,), 'facets')
+        result = cache.get(key)
+        if result is None:
+            result = _load(model)
+            cache.set(key, result, settings.LIST_CACHE_TIMEOUT)
+    else:
+        result = _load(model)
+    return {field: result[field] for field in fields or registry[model]}
+
+
+def _count_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Valores anteriores lidos pelo pre_save compartilhado (backend/snapshots.py)
+    previous = snapshots.previous(instance)
+    deltas = Counter()
+    for field in registry[sender]:
+        current = to_value(getattr(instance, field))
+        if previous is None and not created:
+            # Gravação com pk mas sem linha anterior (ex.: save() com pk explícito)
+            deltas[(field, current)] += 1
+            continue
+        if not created and field not in previous:
+            # Fora de ``update_fields``: o valor não mudou
+            continue
+        old = None if created else to_value(previous[field])
+        if old != current:
+            deltas[(field, old)] -= 1
+            deltas[(field, current)] += 1
+    apply_deltas(sender, deltas)
+
+
+def _count_deleted(sender, instance, **kwargs):
+    add_instances(sender, [instance], sign=-1)
+
+
+def register(model, fields):
+    """Mantém as contagens de ``fields`` do modelo pelos signals"""
+    registry[model] = tuple(fields)
+    uid = f"facets-{label(model)}"
+    snapshots.track(model, fields)
+    post_save.connect(_count_saved, sender=model, dispatch_uid=uid)
+    post_delete.connect(_count_deleted, sender=model, dispatch_uid=uid)
@@ -0,0 +1,54 @@
+"""
+Filtro do admin com os valores e as quantidades da tabela de facetas.
+
+Substitui o ``SELECT DISTINCT`` sobre a tabela inteira feito pelo
+``AllValuesFieldListFilter`` a cada carregamento da changelist.
+"""
+from django.contrib.admin import AllValuesFieldListFilter
+from django.contrib.admin.utils import reverse_field_path
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from . import counts
+
+
+class FacetFieldListFilter(AllValuesFieldListFilter):
+    """
+    Opções lidas de ``FacetCount``. As quantidades só aparecem quando o campo
+    é do próprio modelo da changelist (em ``certification__curso`` numa lista
+    de módulos elas contariam certificações, não módulos).
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.facet_model = reverse_field_path(model, field_path)[0]
+        self.show_counts = self.facet_model is model
+        self.facets = None
+        if field.name in counts.registry.get(self.facet_model, ()):
+            self.facets = counts.counts(self.facet_model, [field.name])[field.name]
+            self.lookup_choices = list(self.facets)
+
+    def value_label(self, value):
+        if isinstance(self.field, models.BooleanField):
+            return _('Yes') if value == 'True' else _('No')
+        return dict((str(key), label) for key, label in self.field.flatchoices).get(value, value)
+
+    def choices(self, changelist):
+        if self.facets is None:
+            yield from super().choices(changelist)
+            return
+
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg, self.lookup_kwarg_isnull]),
+            'display': _('All'),
+        }
+        for value, count in self.facets.items():
+            display = self.value_label(value)
+            yield {
+                'selected': self.lookup_val is not None and value in self.lookup_val,
+                'query_string': changelist.get_query_string(
+                    {self.lookup_kwarg: value}, [self.lookup_kwarg_isnull]
+                ),
+                'display': f"{display} ({count})" if self.show_counts else display,
+            }
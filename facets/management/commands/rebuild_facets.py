@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from backend import caching
+from facets import counts
+
+
+class Command(BaseCommand):
+    help = "Recalcula as contagens das facetas a partir das tabelas"
+
+    def handle(self, *args, **options):
+        for model in counts.registry:
+            rows = counts.rebuild(model)
+            caching.bump_namespace(model)
+            self.stdout.write(f"{model._meta.label}: {rows} valores")
+        self.stdout.write(self.style.SUCCESS("Facetas recalculadas"))
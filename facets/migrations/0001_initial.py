@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Campos com facetas no momento desta migração (ver facets.counts.register)
+FACETS = {
+    ('certifications', 'Certification'): ('status', 'ano', 'curso'),
+    ('submissions', 'Submission'): ('service', 'consent'),
+}
+
+
+def populate_counts(apps, schema_editor):
+    FacetCount = apps.get_model('facets', 'FacetCount')
+    rows = []
+    for (app_label, model_name), fields in FACETS.items():
+        model = apps.get_model(app_label, model_name)
+        for field in fields:
+            values = (
+                model.objects.exclude(**{f'{field}__isnull': True})
+                .order_by().values(field).annotate(total=Count('pk'))
+            )
+            rows += [
+                FacetCount(model=model._meta.label_lower, field=field, value=str(row[field]), count=row['total'])
+                for row in values
+            ]
+    FacetCount.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('certifications', '0017_certification_search_index'),
+        ('submissions', '0005_submission_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='Rótulo do modelo (ex.: certifications.certification)', max_length=100, verbose_name='Modelo')),
+                ('field', models.CharField(max_length=100, verbose_name='Campo')),
+                ('value', models.CharField(max_length=255, verbose_name='Valor')),
+                ('count', models.IntegerField(default=0, verbose_name='Quantidade')),
+            ],
+            options={
+                'verbose_name': 'Contagem de faceta',
+                'verbose_name_plural': 'Contagens de facetas',
+                'constraints': [models.UniqueConstraint(fields=('model', 'field', 'value'), name='facets_unique_value')],
+            },
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
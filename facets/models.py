@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class FacetCount(models.Model):
+    """
+    Quantidade de registros de um modelo com um dado valor num campo.
+
+    Mantida de forma incremental pelos signals (ver ``facets/counts.py``); o
+    comando ``rebuild_facets`` recalcula tudo a partir das tabelas.
+    """
+    model = models.CharField(
+        max_length=100,
+        verbose_name="Modelo",
+        help_text="Rótulo do modelo (ex.: certifications.certification)"
+    )
+    field = models.CharField(
+        max_length=100,
+        verbose_name="Campo"
+    )
+    value = models.CharField(
+        max_length=255,
+        verbose_name="Valor"
+    )
+    count = models.IntegerField(
+        default=0,
+        verbose_name="Quantidade"
+    )
+
+    def __str__(self):
+        return f"{self.model}.{self.field}={self.value} ({self.count})"
+
+    class Meta:
+        verbose_name = "Contagem de faceta"
+        verbose_name_plural = "Contagens de facetas"
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'field', 'value'], name='facets_unique_value'),
+        ]
@@ -0,0 +1,36 @@
+import logging
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import counts
+
+logger = logging.getLogger(__name__)
+
+
+def facets_response(request, model):
+    """
+    Resposta de ``GET .../facets/``: ``{campo: {valor: quantidade}}``.
+
+    ``?facets=status,curso`` restringe os campos. As contagens são globais
+    (não consideram os filtros da listagem).
+    """
+    available = counts.registry[model]
+    requested = request.query_params.get('facets')
+    fields = available
+    if requested:
+        fields = tuple(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+        unknown = [name for name in fields if name not in available]
+        if unknown or not fields:
+            return Response({
+                "facets": f"Facetas desconhecidas: {', '.join(unknown)}" if unknown else "Nenhuma faceta informada"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return Response(counts.counts(model, fields))
+    except Exception as e:
+        logger.error(f"Erro ao calcular facetas de {model._meta.label}: {str(e)}")
+        return Response(
+            {"error": "Erro ao calcular facetas"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
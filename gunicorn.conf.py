@@ -0,0 +1,41 @@
+"""
+Configuração do gunicorn (carregada automaticamente a partir da raiz do projeto).
+
+Os valores da linha de comando (Procfile) têm prioridade sobre os daqui.
+
+Modo ASGI (com ``ASYNC_VIEWS=True``)::
+
+    GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn backend.asgi
+"""
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 3))
+# Mantém as conexões HTTP do proxy abertas entre pedidos
+keepalive = 5
+
+if os.environ.get('GUNICORN_WORKER_CLASS'):
+    worker_class = os.environ['GUNICORN_WORKER_CLASS']
+
+
+def post_worker_init(worker):
+    """
+    Aquece cada worker logo após o fork.
+
+    Usa ``post_worker_init`` em vez de ``post_fork``: só aqui a aplicação Django
+    já foi carregada no worker (sem ``--preload``).
+    """
+    from backend.warmup import warm_up
+    from submissions import queue
+
+    warm_up()
+    # Modo 'queue': o journal está no disco deste serviço e é drenado aqui
+    queue.start_drainer()
+
+
+def worker_exit(server, worker):
+    """Grava as submissões ainda na fila e conclui as tarefas pendentes antes de o worker terminar"""
+    from backend import background
+    from submissions import queue
+
+    queue.stop_drainer()
+    background.flush_all()
@@ -1,8 +1,10 @@
 from django.contrib import admin
-from django.http import HttpResponse
 from django.utils.html import format_html
-import csv
 import datetime
+from analytics import rollups
+from backend.admin_tools import EstimatedCountPaginator
+from facets.filters import FacetFieldListFilter
+from .exports import export_response
 from .models import Submission
 
 @admin.register(Submission)
@@ -18,8 +20,8 @@ class SubmissionAdmin(admin.ModelAdmin):
     
     list_filter = (
         ('created_at', admin.DateFieldListFilter),
-        'service', 
-        'consent'
+        ('service', FacetFieldListFilter),
+        ('consent', FacetFieldListFilter)
     )
     
     search_fields = ('name', 'email', 'phone', 'service', 'message')
@@ -30,8 +32,11 @@ class SubmissionAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     list_per_page = 50
     date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    # Evita um segundo COUNT(*) da tabela inteira quando há filtros
+    show_full_result_count = False
     
-    actions = ['export_to_csv']
+    actions = ['export_to_csv', 'export_to_csv_gzip', 'export_to_xlsx']
     
     fieldsets = (
         ('Informações Pessoais', {
@@ -51,6 +56,11 @@ class SubmissionAdmin(admin.ModelAdmin):
         }),
     )
     
+    def changelist_view(self, request, extra_context=None):
+        """Painel de totais lido das tabelas de agregados (sem varrer as submissões)"""
+        extra_context = {**rollups.submission_dashboard(), **(extra_context or {})}
+        return super().changelist_view(request, extra_context)
+
     # Desabilita a edição de submissões
     def has_add_permission(self, request):
         """Desabilita adição manual de submissões"""
@@ -175,30 +185,23 @@ class SubmissionAdmin(admin.ModelAdmin):
 
     # Ações personalizadas
     def export_to_csv(self, request, queryset):
-        """Exporta submissões selecionadas para CSV"""
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = f'attachment; filename="submissions_{datetime.date.today()}.csv"'
-        response.write('\ufeff')  # BOM para Excel
-        
-        writer = csv.writer(response)
-        writer.writerow(['Nome', 'Email', 'Telefone', 'Serviço', 'Mensagem', 'Data', 'Consentimento'])
-        
-        for submission in queryset:
-            writer.writerow([
-                submission.name,
-                submission.email,
-                submission.phone,
-                submission.service,
-                submission.message,
-                submission.created_at.strftime('%d/%m/%Y %H:%M'),
-                'Sim' if submission.consent else 'Não'
-            ])
-        
-        self.message_user(request, f'{queryset.count()} submissões exportadas com sucesso!', 'success')
-        return response
-    
+        """Exporta submissões selecionadas para CSV (em streaming)"""
+        return export_response(queryset, 'csv')
+
     export_to_csv.short_description = "📥 Exportar para CSV"
 
+    def export_to_csv_gzip(self, request, queryset):
+        """Exporta submissões selecionadas para CSV comprimido (gzip)"""
+        return export_response(queryset, 'csv', compress=True)
+
+    export_to_csv_gzip.short_description = "🗜️ Exportar para CSV (gzip)"
+
+    def export_to_xlsx(self, request, queryset):
+        """Exporta submissões selecionadas para Excel (XLSX)"""
+        return export_response(queryset, 'xlsx')
+
+    export_to_xlsx.short_description = "📊 Exportar para Excel (XLSX)"
+
     class Media:
         css = {
             'all': ('admin/css/custom_admin.css',)
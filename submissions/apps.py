@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class SubmissionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'submissions'
+
+    def ready(self):
+        from backend import caching
+        from changes import feed as changes
+        from facets import counts as facets
+        from .models import Submission
+
+        # Facetas antes do namespace: a versão muda com as contagens já ajustadas
+        facets.register(Submission, ('service', 'consent'))
+        changes.register(Submission)
+        caching.register(Submission)
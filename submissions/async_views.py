@@ -0,0 +1,94 @@
+"""
+Versão assíncrona da criação de submissões (modo ASGI, ``ASYNC_VIEWS = True``).
+
+Mesmo contrato que ``SubmissionCreateView``: ``Idempotency-Key``, modo fila
+(202) e as mesmas mensagens de erro, com ``afirst``/``acreate`` do ORM assíncrono.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+
+from backend.async_support import drf_request, json_response, parse_error_response, throttled_response
+
+from . import queue as submission_queue
+from .models import Submission
+from .serializers import SubmissionSerializer
+from .views import SubmissionCreateView
+
+logger = logging.getLogger(__name__)
+
+
+def _duplicate_response(submission):
+    """Resposta a um reenvio de uma submissão já gravada"""
+    return json_response({
+        'message': 'Submissão recebida com sucesso!',
+        'data': SubmissionSerializer(submission).data
+    }, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@require_POST
+async def submission_create(request):
+    """Cria uma submissão (ver ``SubmissionCreateView``)"""
+    request = drf_request(request, SubmissionCreateView)
+    throttled = await throttled_response(request, SubmissionCreateView, 'create')
+    if throttled is not None:
+        return throttled
+
+    idempotency_key = request.headers.get('Idempotency-Key', '').strip()[:64] or None
+    try:
+        if idempotency_key and not submission_queue.is_enabled():
+            existing = await Submission.objects.filter(idempotency_key=idempotency_key).afirst()
+            if existing:
+                return _duplicate_response(existing)
+
+        serializer = SubmissionSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning(f"Erro na validação dos dados: {serializer.errors}")
+            return json_response({
+                'message': 'Erro na validação dos dados.',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if submission_queue.is_enabled():
+            key, created = await sync_to_async(submission_queue.enqueue)(
+                serializer.validated_data, idempotency_key
+            )
+            if created:
+                logger.info(f"Submissão enfileirada: {serializer.validated_data.get('email')}")
+            return json_response({
+                'message': 'Submissão recebida com sucesso!',
+                'data': serializer.data,
+                'idempotency_key': key
+            }, status=status.HTTP_202_ACCEPTED)
+
+        submission = await Submission.objects.acreate(
+            **serializer.validated_data, idempotency_key=idempotency_key
+        )
+        data = SubmissionSerializer(submission).data
+        logger.info(f"Submissão criada com sucesso: {data.get('email')}")
+        return json_response({
+            'message': 'Submissão recebida com sucesso!',
+            'data': data
+        }, status=status.HTTP_201_CREATED)
+
+    except ParseError as e:
+        return parse_error_response(e)
+
+    except Exception as e:
+        # Reenvio concorrente com a mesma Idempotency-Key
+        existing = None
+        if isinstance(e, IntegrityError) and idempotency_key:
+            existing = await Submission.objects.filter(idempotency_key=idempotency_key).afirst()
+        if existing:
+            return _duplicate_response(existing)
+
+        logger.error(f"Erro ao criar submissão: {str(e)}")
+        return json_response({
+            'message': 'Erro ao processar submissão. Tente novamente mais tarde.'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,211 @@
+"""
+Exportação de submissões em streaming (CSV, CSV.gz e XLSX).
+
+As linhas são lidas com ``values_list(...).iterator()`` em blocos e escritas
+diretamente na resposta, sem montar o arquivo inteiro em memória.
+"""
+import csv
+import datetime
+import re
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+
+EXPORT_HEADER = ['Nome', 'Email', 'Telefone', 'Serviço', 'Mensagem', 'Data', 'Consentimento']
+EXPORT_FIELDS = ('name', 'email', 'phone', 'service', 'message', 'created_at', 'consent')
+
+FORMATS = ('csv', 'xlsx')
+
+# Linhas lidas do banco por vez
+CHUNK_SIZE = 2000
+
+# Tamanho aproximado de cada bloco enviado ao cliente
+FLUSH_SIZE = 64 * 1024
+
+# Caracteres de controle não permitidos em XML
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def filter_submissions(queryset, params):
+    """
+    Aplica os filtros da exportação: ``data_inicio``/``data_fim`` (AAAA-MM-DD,
+    inclusivos) e ``service`` (pode repetir). Datas inválidas levantam ``ValueError``.
+    """
+    start = params.get('data_inicio')
+    end = params.get('data_fim')
+    if start:
+        start_date = parse_date(start)
+        if start_date is None:
+            raise ValueError("data_inicio inválida (use AAAA-MM-DD)")
+        queryset = queryset.filter(created_at__date__gte=start_date)
+    if end:
+        end_date = parse_date(end)
+        if end_date is None:
+            raise ValueError("data_fim inválida (use AAAA-MM-DD)")
+        queryset = queryset.filter(created_at__date__lte=end_date)
+
+    services = [service for service in params.getlist('service') if service]
+    if services:
+        queryset = queryset.filter(service__in=services)
+    return queryset
+
+
+def iter_rows(queryset):
+    """Gera as linhas da exportação como listas de texto"""
+    rows = queryset.order_by('-created_at').values_list(*EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    for name, email, phone, service, message, created_at, consent in rows:
+        yield [
+            name,
+            email,
+            phone,
+            service,
+            message,
+            created_at.strftime('%d/%m/%Y %H:%M'),
+            'Sim' if consent else 'Não'
+        ]
+
+
+class _StreamBuffer:
+    """Buffer de escrita que acumula bytes até serem consumidos pelo gerador"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.chunks.append(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def stream_csv(queryset):
+    """Gera o CSV em blocos de bytes (com BOM para o Excel)"""
+    buffer = _StreamBuffer()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM para Excel
+    writer.writerow(EXPORT_HEADER)
+    for row in iter_rows(queryset):
+        writer.writerow(row)
+        if buffer.size >= FLUSH_SIZE:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def gzip_stream(chunks):
+    """Comprime um gerador de bytes em formato gzip, bloco a bloco"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Submissões" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_row(values):
+    cells = ''.join(
+        '<c t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>'
+        % escape(_ILLEGAL_XML_CHARS.sub('', value))
+        for value in values
+    )
+    return f'<row>{cells}</row>'
+
+
+def stream_xlsx(queryset):
+    """
+    Gera uma planilha XLSX mínima (strings inline) em blocos de bytes.
+
+    O ``zipfile`` escreve num buffer sem ``seek``, por isso usa descritores de
+    dados e o arquivo pode ser enviado enquanto é gerado.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_HEADER).encode('utf-8'))
+            for row in iter_rows(queryset):
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                if buffer.size >= FLUSH_SIZE:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+def export_response(queryset, fmt='csv', compress=False):
+    """Monta a ``StreamingHttpResponse`` da exportação no formato pedido"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato não suportado: {fmt}")
+
+    filename = f"submissions_{datetime.date.today()}.{fmt}"
+    if fmt == 'xlsx':
+        # XLSX já é um ZIP comprimido; gzip não traria ganho
+        content = stream_xlsx(queryset)
+        content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        content = stream_csv(queryset)
+        content_type = 'text/csv; charset=utf-8'
+        if compress:
+            content = gzip_stream(content)
+            content_type = 'application/gzip'
+            filename += '.gz'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
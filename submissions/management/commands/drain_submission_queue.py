@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from submissions import queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava no banco as submissões recebidas pela fila local (modo 'queue'). "
+        "Os workers web já drenam a fila; útil para esvaziá-la à mão"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Continua em execução, drenando a fila periodicamente"
+        )
+        parser.add_argument(
+            '--interval', type=float, default=queue.DRAIN_INTERVAL,
+            help="Segundos de espera quando a fila está vazia (padrão: 1)"
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Submissões gravadas por transação (padrão: SUBMISSION_QUEUE_BATCH_SIZE)"
+        )
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help="Devolve à fila as entradas que esgotaram as tentativas antes de drenar"
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f"{queue.retry_failed()} entradas falhadas devolvidas à fila")
+
+        if options['loop']:
+            total = queue.drain_loop(options['interval'], options['batch_size'])
+        else:
+            total = 0
+            while True:
+                close_old_connections()
+                drained = queue.drain(options['batch_size'])
+                if not drained:
+                    break
+                total += drained
+            queue.purge()
+
+        self.stdout.write(self.style.SUCCESS(f"{total} submissões processadas"))
+        failed = queue.failed_count()
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f"{failed} entradas falhadas na fila (ver last_error; --retry-failed para tentar de novo)"
+            ))
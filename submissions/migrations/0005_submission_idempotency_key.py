@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0004_alter_submission_options_alter_submission_consent_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, help_text='Chave enviada pelo cliente (Idempotency-Key) para evitar duplicados em reenvios', max_length=64, null=True, unique=True, verbose_name='Chave de Idempotência'),
+        ),
+    ]
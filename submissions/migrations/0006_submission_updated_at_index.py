@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0005_submission_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['updated_at', 'id'], name='submissions_updated_263c6d_idx'),
+        ),
+    ]
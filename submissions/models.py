@@ -41,6 +41,15 @@ class Submission(models.Model):
         verbose_name="Consentimento",
         help_text="Concordo em receber comunicações da CPTec Academy"
     )
+    idempotency_key = models.CharField(
+        max_length=64,
+        unique=True,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Chave de Idempotência",
+        help_text="Chave enviada pelo cliente (Idempotency-Key) para evitar duplicados em reenvios"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Data de Criação",
@@ -59,6 +68,8 @@ class Submission(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at', 'email']),
+            # Cursor do feed de alterações (ver changes/feed.py)
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
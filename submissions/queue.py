@@ -0,0 +1,351 @@
+"""
+Fila local e durável para ingestão assíncrona de submissões.
+
+No modo ``SUBMISSION_INGESTION_MODE = 'queue'`` a view apenas valida os dados e
+acrescenta a submissão a um journal SQLite próprio (``SUBMISSION_QUEUE_PATH``),
+respondendo 202 de imediato. Um thread em cada worker web (iniciado pelo
+``gunicorn.conf.py``) lê o journal em lotes e grava em ``Submission`` com
+``bulk_create``; o comando ``drain_submission_queue`` faz o mesmo à mão.
+
+O journal fica no disco local do serviço web, por isso é drenado no próprio
+serviço e não num processo ``worker`` separado (que noutro contentor não veria
+o arquivo). Ao terminar, cada worker drena o que ainda estiver pendente; para
+não perder submissões num reinício abrupto, ``SUBMISSION_QUEUE_PATH`` deve
+ficar num disco persistente.
+
+A ``idempotency_key`` (enviada pelo cliente no cabeçalho ``Idempotency-Key`` ou
+gerada na chegada) é única no journal e em ``Submission``, por isso reenvios do
+cliente e drenagens repetidas após uma falha não criam duplicados.
+
+Se o ``bulk_create`` de um lote for rejeitado pelos dados (``DataError`` ou
+``IntegrityError`` que não seja de conflito), o lote é regravado linha a linha
+e só as entradas que falham contam uma tentativa. Ao fim de
+``SUBMISSION_QUEUE_MAX_ATTEMPTS`` tentativas a entrada passa para o estado
+"falhada" (``failed_at``) e deixa de bloquear a fila; ``retry_failed`` (ou
+``drain_submission_queue --retry-failed``) devolve-as à fila. Falhas de
+conexão com o banco não contam tentativas: o lote fica pendente e é retomado
+na drenagem seguinte.
+"""
+import fcntl
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import (
+    DataError, IntegrityError, close_old_connections, connection as db_connection, transaction,
+)
+
+from backend import caching
+from facets import counts as facets
+
+from .models import Submission
+from .signals import submissions_bulk_created
+
+logger = logging.getLogger(__name__)
+
+# Campos validados guardados no journal
+QUEUED_FIELDS = ('name', 'email', 'phone', 'service', 'message', 'consent')
+
+# Espera quando a fila está vazia e intervalo entre limpezas do journal (segundos)
+DRAIN_INTERVAL = 1.0
+PURGE_INTERVAL = 60 * 60
+
+_local = threading.local()
+
+_drainer = None
+_stop = threading.Event()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submission_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    received_at REAL NOT NULL,
+    drained_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failed_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS submission_queue_pending ON submission_queue (drained_at, id);
+"""
+
+# Colunas acrescentadas depois da primeira versão do journal
+ADDED_COLUMNS = (
+    ('attempts', 'INTEGER NOT NULL DEFAULT 0'),
+    ('failed_at', 'REAL'),
+    ('last_error', 'TEXT'),
+)
+
+# Erros de uma linha concreta (e não do banco): contam uma tentativa da entrada
+ENTRY_ERRORS = (DataError, IntegrityError, TypeError, ValueError)
+
+
+def is_enabled():
+    """Indica se a ingestão assíncrona está ativa"""
+    return settings.SUBMISSION_INGESTION_MODE == 'queue'
+
+
+def get_connection():
+    """Conexão com o journal, uma por thread"""
+    connection = getattr(_local, 'connection', None)
+    path = str(settings.SUBMISSION_QUEUE_PATH)
+    if connection is None or getattr(_local, 'path', None) != path:
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # FULL: a submissão só é confirmada ao cliente depois de estar no disco
+        connection.execute("PRAGMA synchronous=FULL")
+        connection.executescript(SCHEMA)
+        _upgrade(connection)
+        _local.connection = connection
+        _local.path = path
+    return connection
+
+
+def _upgrade(connection):
+    """Acrescenta a um journal antigo as colunas que lhe faltam"""
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(submission_queue)")}
+    for name, definition in ADDED_COLUMNS:
+        if name not in columns:
+            connection.execute(f"ALTER TABLE submission_queue ADD COLUMN {name} {definition}")
+
+
+def enqueue(data, idempotency_key=None):
+    """
+    Acrescenta uma submissão validada ao journal.
+
+    Retorna ``(idempotency_key, created)``; ``created`` é falso quando a chave já
+    estava na fila (reenvio do cliente).
+    """
+    key = idempotency_key or uuid.uuid4().hex
+    payload = json.dumps({field: data.get(field) for field in QUEUED_FIELDS})
+    connection = get_connection()
+    try:
+        connection.execute(
+            "INSERT INTO submission_queue (idempotency_key, payload, received_at) VALUES (?, ?, ?)",
+            (key, payload, time.time()),
+        )
+    except sqlite3.IntegrityError:
+        return key, False
+    return key, True
+
+
+def pending_count():
+    """Quantidade de submissões ainda não gravadas no banco"""
+    row = get_connection().execute(
+        "SELECT COUNT(*) FROM submission_queue WHERE drained_at IS NULL AND failed_at IS NULL"
+    ).fetchone()
+    return row[0]
+
+
+def failed_count():
+    """Quantidade de entradas que esgotaram as tentativas"""
+    row = get_connection().execute(
+        "SELECT COUNT(*) FROM submission_queue WHERE drained_at IS NULL AND failed_at IS NOT NULL"
+    ).fetchone()
+    return row[0]
+
+
+def retry_failed():
+    """Devolve à fila as entradas falhadas (ex.: depois de corrigir a causa)"""
+    cursor = get_connection().execute(
+        "UPDATE submission_queue SET attempts = 0, failed_at = NULL "
+        "WHERE drained_at IS NULL AND failed_at IS NOT NULL"
+    )
+    return cursor.rowcount
+
+
+@contextmanager
+def _drain_lock():
+    """Lock exclusivo entre os processos que drenam o mesmo journal"""
+    with open(f"{settings.SUBMISSION_QUEUE_PATH}.lock", 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _save(submissions):
+    """
+    Grava ``{idempotency_key: Submission}`` numa transação.
+
+    Devolve ``(inseridas, rejeitadas)``: as instâncias inseridas agora (com
+    ``pk``) e as chaves que não foram gravadas nem já existiam. No SQLite o
+    ``INSERT OR IGNORE`` descarta também linhas que violam ``NOT NULL``, sem
+    erro; essas entradas contam uma tentativa como as rejeitadas com exceção.
+    """
+    with transaction.atomic():
+        # Entradas já gravadas numa drenagem interrompida não são regravadas
+        existing = set(Submission.objects.filter(
+            idempotency_key__in=list(submissions)
+        ).values_list('idempotency_key', flat=True))
+        Submission.objects.bulk_create(
+            [submission for key, submission in submissions.items() if key not in existing],
+            ignore_conflicts=True
+        )
+        # Só as linhas inseridas agora entram nas facetas e nos agregados
+        # (bulk_create não dispara post_save nem devolve as chaves ignoradas)
+        inserted = []
+        for pk, key in Submission.objects.filter(
+            idempotency_key__in=list(submissions)
+        ).exclude(idempotency_key__in=existing).values_list('pk', 'idempotency_key'):
+            submissions[key].pk = pk
+            inserted.append(submissions[key])
+        facets.add_instances(Submission, inserted)
+    rejected = set(submissions) - existing - {submission.idempotency_key for submission in inserted}
+    return inserted, rejected
+
+
+def _record_failures(connection, failures):
+    """Conta uma tentativa de cada entrada; devolve quantas passaram a falhadas"""
+    now = time.time()
+    failed = 0
+    for entry_id, attempts, error in failures:
+        attempts += 1
+        exhausted = attempts >= settings.SUBMISSION_QUEUE_MAX_ATTEMPTS
+        connection.execute(
+            "UPDATE submission_queue SET attempts = ?, last_error = ?, failed_at = ? WHERE id = ?",
+            (attempts, str(error), now if exhausted else None, entry_id),
+        )
+        if exhausted:
+            failed += 1
+            logger.error(f"Entrada {entry_id} da fila de submissões falhou {attempts} vezes: {str(error)}")
+        else:
+            logger.warning(f"Entrada {entry_id} da fila de submissões não gravada (tentativa {attempts}): {str(error)}")
+    return failed
+
+
+def drain(batch_size=None):
+    """
+    Grava no banco um lote de submissões pendentes.
+
+    Retorna a quantidade de entradas resolvidas no lote (gravadas ou passadas
+    a falhadas). As drenagens do mesmo journal são feitas uma de cada vez (um
+    thread por worker). Erros de conexão com o banco são propagados sem
+    contar tentativas.
+    """
+    batch_size = batch_size or settings.SUBMISSION_QUEUE_BATCH_SIZE
+    connection = get_connection()
+    with _drain_lock():
+        rows = connection.execute(
+            "SELECT id, idempotency_key, payload, attempts FROM submission_queue "
+            "WHERE drained_at IS NULL AND failed_at IS NULL ORDER BY id LIMIT ?",
+            (batch_size,),
+        ).fetchall()
+        if not rows:
+            return 0
+
+        submissions, entries, failures = {}, {}, []
+        for entry_id, key, payload, attempts in rows:
+            try:
+                submissions[key] = Submission(idempotency_key=key, **json.loads(payload))
+                entries[key] = (entry_id, attempts)
+            except ENTRY_ERRORS as e:
+                failures.append((entry_id, attempts, e))
+
+        try:
+            inserted, rejected = _save(submissions)
+        except ENTRY_ERRORS as e:
+            # Uma linha inválida não bloqueia as outras: regrava uma a uma
+            logger.warning(f"Lote da fila de submissões rejeitado, gravando uma a uma: {str(e)}")
+            inserted, rejected = [], set()
+            for key, submission in submissions.items():
+                try:
+                    saved, dropped = _save({key: submission})
+                    inserted.extend(saved)
+                    rejected |= dropped
+                except ENTRY_ERRORS as e:
+                    entry_id, attempts = entries.pop(key)
+                    failures.append((entry_id, attempts, e))
+        for key in rejected:
+            entry_id, attempts = entries.pop(key)
+            failures.append((entry_id, attempts, "Linha rejeitada pelo banco"))
+        drained = [entry_id for entry_id, _ in entries.values()]
+
+        if inserted:
+            submissions_bulk_created.send(sender=Submission, instances=inserted)
+            caching.bump_namespace(Submission)
+
+        connection.executemany(
+            "UPDATE submission_queue SET drained_at = ? WHERE id = ?",
+            [(time.time(), entry_id) for entry_id in drained],
+        )
+        failed = _record_failures(connection, failures)
+    logger.info(f"Fila de submissões: {len(inserted)} gravadas no banco ({len(rows)} processadas, {len(failures)} com erro)")
+    return len(drained) + failed
+
+
+def purge(max_age=None):
+    """Remove do journal entradas já gravadas há mais de ``max_age`` segundos"""
+    max_age = settings.SUBMISSION_QUEUE_RETENTION if max_age is None else max_age
+    cursor = get_connection().execute(
+        "DELETE FROM submission_queue WHERE drained_at IS NOT NULL AND drained_at < ?",
+        (time.time() - max_age,),
+    )
+    return cursor.rowcount
+
+
+def drain_loop(interval=DRAIN_INTERVAL, batch_size=None, stop=None):
+    """
+    Drena a fila até ``stop`` (um ``threading.Event``) ser ativado.
+
+    Sem ``stop`` continua indefinidamente. Retorna o total gravado.
+    """
+    total = 0
+    last_purge = 0
+    while stop is None or not stop.is_set():
+        # Processo de longa duração: descarta conexões expiradas
+        close_old_connections()
+        try:
+            drained = drain(batch_size)
+            if time.time() - last_purge > PURGE_INTERVAL:
+                purge()
+                last_purge = time.time()
+        except Exception as e:
+            # Uma falha do banco não deve parar a drenagem; as entradas continuam
+            # pendentes, sem contar tentativas, e a próxima volta espera ``interval``
+            logger.error(f"Erro ao drenar a fila de submissões: {str(e)}")
+            drained = 0
+
+        total += drained
+        if not drained:
+            if stop is None:
+                time.sleep(interval)
+            else:
+                stop.wait(interval)
+    return total
+
+
+def _drain_in_background():
+    try:
+        drain_loop(stop=_stop)
+    finally:
+        # A conexão deste thread não é fechada pelo ciclo de pedidos do Django
+        db_connection.close()
+
+
+def start_drainer():
+    """Inicia o thread que drena a fila no processo atual (só no modo 'queue')"""
+    global _drainer
+    if not is_enabled() or _drainer is not None:
+        return
+    _stop.clear()
+    _drainer = threading.Thread(target=_drain_in_background, name='fila-submissoes', daemon=True)
+    _drainer.start()
+
+
+def stop_drainer(timeout=10):
+    """Para o thread de drenagem e grava o que ainda estiver pendente"""
+    global _drainer
+    if _drainer is None:
+        return
+    _stop.set()
+    _drainer.join(timeout)
+    _drainer = None
+    try:
+        while drain():
+            pass
+    except Exception as e:
+        logger.error(f"Erro ao drenar a fila de submissões ao terminar: {str(e)}")
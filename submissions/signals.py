@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Enviado após gravações com bulk_create (drenagem da fila), que não disparam
+# post_save. Argumentos: instances (lista de Submission gravadas)
+submissions_bulk_created = Signal()
@@ -1,3 +1,377 @@
-from django.test import TestCase
+import codecs
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import zipfile
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from facets.models import FacetCount
+
+from . import exports, queue
+from .models import Submission
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'submissions-tests'},
+    'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'submissions-throttle'},
+}
+
+
+def submission_data(index=1, **kwargs):
+    data = {
+        'name': f"Cliente {index}",
+        'email': f"cliente{index}@exemplo.co.mz",
+        'phone': '+258840000000',
+        'service': 'Consultoria',
+        'message': 'Gostaria de receber mais informações.',
+        'consent': True,
+    }
+    data.update(kwargs)
+    return data
+
+
+def facet_count(field, value):
+    row = FacetCount.objects.filter(model='submissions.submission', field=field, value=value).first()
+    return row.count if row else 0
+
+
+class SubmissionTestCase(TestCase):
+    """Cache em memória e fila num diretório temporário"""
+
+    @classmethod
+    def setUpClass(cls):
+        root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(
+            CACHES=TEST_CACHES,
+            SUBMISSION_QUEUE_PATH=os.path.join(root, 'queue.sqlite3'),
+        ))
+        super().setUpClass()
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+
+@override_settings(SUBMISSION_INGESTION_MODE='queue')
+class QueuedIngestionTests(SubmissionTestCase):
+    """Modo 'queue': 202 na chegada e gravação pela drenagem"""
+
+    def setUp(self):
+        super().setUp()
+        # Cada teste começa com o journal vazio
+        queue.get_connection().execute("DELETE FROM submission_queue")
+
+    def post(self, data, key=None):
+        headers = {'Idempotency-Key': key} if key else {}
+        return self.client.post('/api/submissions/', data, content_type='application/json', headers=headers)
+
+    def drain(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return queue.drain()
+
+    def test_submission_is_queued_then_drained(self):
+        response = self.post(submission_data())
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json()['idempotency_key'])
+        self.assertEqual(Submission.objects.count(), 0)
+        self.assertEqual(queue.pending_count(), 1)
+
+        self.assertEqual(self.drain(), 1)
+        self.assertEqual(queue.pending_count(), 0)
+        submission = Submission.objects.get()
+        self.assertEqual(submission.idempotency_key, response.json()['idempotency_key'])
+        self.assertEqual(facet_count('service', 'Consultoria'), 1)
+        self.assertEqual(self.drain(), 0)
+
+    def test_resent_submission_is_queued_once(self):
+        self.assertEqual(self.post(submission_data(), key='formulario-1').status_code, 202)
+        self.assertEqual(self.post(submission_data(), key='formulario-1').status_code, 202)
+        self.assertEqual(queue.pending_count(), 1)
+        self.drain()
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_invalid_submission_is_not_queued(self):
+        response = self.post(submission_data(email='invalido'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(queue.pending_count(), 0)
+
+    def test_rows_already_saved_are_not_counted_again(self):
+        # Gravada por uma drenagem anterior interrompida antes de marcar o journal
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.create(idempotency_key='repetida', **submission_data(1))
+        queue.enqueue(submission_data(1), 'repetida')
+        queue.enqueue(submission_data(2), 'nova')
+        self.assertEqual(facet_count('service', 'Consultoria'), 1)
+
+        self.assertEqual(self.drain(), 2)
+        self.assertEqual(Submission.objects.count(), 2)
+        self.assertEqual(facet_count('service', 'Consultoria'), 2)
+        self.assertEqual(facet_count('consent', 'True'), 2)
+        self.assertEqual(queue.pending_count(), 0)
+
+    def attempts(self, key):
+        return queue.get_connection().execute(
+            "SELECT attempts FROM submission_queue WHERE idempotency_key = ?", (key,)
+        ).fetchone()[0]
+
+    @override_settings(SUBMISSION_QUEUE_MAX_ATTEMPTS=2)
+    def test_rejected_entry_does_not_block_the_batch(self):
+        queue.enqueue(submission_data(1), 'primeira')
+        # Rejeitada pelo banco (NOT NULL) no bulk_create e na gravação linha a linha
+        queue.enqueue(submission_data(2, name=None), 'invalida')
+        queue.enqueue(submission_data(3), 'terceira')
+
+        self.assertEqual(self.drain(), 2)
+        self.assertEqual(
+            set(Submission.objects.values_list('idempotency_key', flat=True)), {'primeira', 'terceira'}
+        )
+        self.assertEqual(facet_count('service', 'Consultoria'), 2)
+        self.assertEqual(queue.pending_count(), 1)
+        self.assertEqual(self.attempts('invalida'), 1)
+
+        # Esgotadas as tentativas a entrada sai da fila
+        self.assertEqual(self.drain(), 1)
+        self.assertEqual(queue.pending_count(), 0)
+        self.assertEqual(queue.failed_count(), 1)
+        self.assertEqual(self.drain(), 0)
+
+        self.assertEqual(queue.retry_failed(), 1)
+        self.assertEqual(queue.pending_count(), 1)
+        self.assertEqual(self.attempts('invalida'), 0)
+
+    def test_failed_batch_falls_back_to_row_by_row(self):
+        save = queue._save
+
+        def rejecting_save(submissions):
+            # Como o PostgreSQL: o lote inteiro falha por causa de uma linha
+            if 'invalida' in submissions:
+                raise IntegrityError("null value in column \"name\"")
+            return save(submissions)
+
+        for index, key in enumerate(('primeira', 'invalida', 'terceira'), start=1):
+            queue.enqueue(submission_data(index), key)
+        with mock.patch.object(queue, '_save', side_effect=rejecting_save):
+            self.assertEqual(self.drain(), 2)
+        self.assertEqual(Submission.objects.count(), 2)
+        self.assertEqual(self.attempts('invalida'), 1)
+        self.assertEqual(queue.pending_count(), 1)
+
+    def test_invalid_payload_counts_an_attempt(self):
+        queue.get_connection().execute(
+            "INSERT INTO submission_queue (idempotency_key, payload, received_at) VALUES (?, ?, 0)",
+            ('corrompida', json.dumps({'campo_desconhecido': 1})),
+        )
+        queue.enqueue(submission_data(1), 'valida')
+        self.assertEqual(self.drain(), 1)
+        self.assertEqual(self.attempts('corrompida'), 1)
+
+    def test_database_outage_does_not_count_attempts(self):
+        queue.enqueue(submission_data(1), 'pendente')
+        with mock.patch.object(queue, '_save', side_effect=OperationalError("banco indisponível")):
+            with self.assertRaises(OperationalError):
+                queue.drain()
+        self.assertEqual(self.attempts('pendente'), 0)
+        self.assertEqual(queue.pending_count(), 1)
+
+    def test_old_journal_is_upgraded(self):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'antiga.sqlite3')
+        old = sqlite3.connect(path)
+        old.execute(
+            "CREATE TABLE submission_queue (id INTEGER PRIMARY KEY AUTOINCREMENT, idempotency_key TEXT "
+            "NOT NULL UNIQUE, payload TEXT NOT NULL, received_at REAL NOT NULL, drained_at REAL)"
+        )
+        old.execute(
+            "INSERT INTO submission_queue (idempotency_key, payload, received_at) VALUES (?, ?, 0)",
+            ('antiga', json.dumps(submission_data(1))),
+        )
+        old.commit()
+        old.close()
+
+        with self.settings(SUBMISSION_QUEUE_PATH=path):
+            self.assertEqual(queue.pending_count(), 1)
+            self.assertEqual(self.drain(), 1)
+        self.assertTrue(Submission.objects.filter(idempotency_key='antiga').exists())
+
+    @override_settings(SUBMISSION_QUEUE_MAX_ATTEMPTS=1)
+    def test_command_reports_failed_entries(self):
+        queue.enqueue(submission_data(1, name=None), 'invalida')
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('drain_submission_queue', stdout=out)
+        self.assertIn('1 entradas falhadas', out.getvalue())
+
+        out = io.StringIO()
+        call_command('drain_submission_queue', '--retry-failed', stdout=out)
+        self.assertIn('1 entradas falhadas devolvidas', out.getvalue())
+
+
+@override_settings(CHANGES_SAFETY_LAG=0)
+class SubmissionChangesTests(SubmissionTestCase):
+    """Feed de alterações das submissões (somente staff)"""
+
+    url = '/api/submissions/changes/'
+
+    def test_requires_staff(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_delete_is_delivered_after_cursor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            submission = Submission.objects.create(**submission_data())
+        staff = get_user_model().objects.create_user('equipe', password='senha', is_staff=True)
+        self.client.force_login(staff)
+
+        data = self.client.get(self.url).json()
+        self.assertEqual([(entry['op'], entry['id']) for entry in data['results']], [('upsert', submission.pk)])
+
+        pk = submission.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            submission.delete()
+        data = self.client.get(self.url, {'cursor': data['cursor']}).json()
+        self.assertEqual([(entry['op'], entry['id']) for entry in data['results']], [('delete', pk)])
+
+
+class SubmissionFacetsTests(SubmissionTestCase):
+    """Contagens por serviço e consentimento (somente staff)"""
+
+    url = '/api/submissions/facets/'
+
+    def test_requires_staff(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_counts_for_staff(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.create(**submission_data(1))
+            Submission.objects.create(**submission_data(2, consent=False))
+        staff = get_user_model().objects.create_user('equipe', password='senha', is_staff=True)
+        self.client.force_login(staff)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'service': {'Consultoria': 2}, 'consent': {'False': 1, 'True': 1}})
+
+
+class SubmissionExportTests(SubmissionTestCase):
+    """Exportação em streaming (CSV, CSV.gz e XLSX)"""
+
+    url = '/api/submissions/export/'
+
+    def setUp(self):
+        super().setUp()
+        self.first = Submission.objects.create(**submission_data(1, name='José "Zé" Mãe'))
+        self.second = Submission.objects.create(**submission_data(
+            2, service='Auditoria', consent=False, message='Texto com\x01controle & <tags>, vírgula'
+        ))
+        Submission.objects.filter(pk=self.first.pk).update(
+            created_at=datetime.datetime(2025, 1, 10, 9, 30, tzinfo=datetime.timezone.utc)
+        )
+        Submission.objects.filter(pk=self.second.pk).update(
+            created_at=datetime.datetime(2025, 2, 20, 14, 0, tzinfo=datetime.timezone.utc)
+        )
+        staff = get_user_model().objects.create_user('equipe', password='senha', is_staff=True)
+        self.client.force_login(staff)
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def csv_rows(self, content):
+        self.assertTrue(content.startswith(codecs.BOM_UTF8))
+        return list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+
+    def test_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_csv(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(response['Content-Disposition'], r'attachment; filename="submissions_[\d-]+\.csv"')
+        rows = self.csv_rows(content)
+        self.assertEqual(rows[0], exports.EXPORT_HEADER)
+        # Mais recentes primeiro, com datas e consentimento formatados
+        self.assertEqual([row[0] for row in rows[1:]], ['Cliente 2', 'José "Zé" Mãe'])
+        self.assertEqual(rows[2][5:], ['10/01/2025 09:30', 'Sim'])
+        self.assertEqual(rows[1][6], 'Não')
+
+    def test_filters(self):
+        _, content = self.export(service='Auditoria')
+        self.assertEqual([row[0] for row in self.csv_rows(content)[1:]], ['Cliente 2'])
+        _, content = self.export(data_inicio='2025-01-01', data_fim='2025-01-31')
+        self.assertEqual([row[0] for row in self.csv_rows(content)[1:]], ['José "Zé" Mãe'])
+
+        self.assertEqual(self.client.get(self.url, {'data_inicio': '10/01/2025'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'formato': 'pdf'}).status_code, 400)
+
+    def test_gzip(self):
+        _, plain = self.export()
+        response, content = self.export(gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.csv.gz"', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(content), plain)
+
+    def test_xlsx(self):
+        response, content = self.export(formato='xlsx')
+        self.assertTrue(response['Content-Type'].startswith('application/vnd.openxmlformats'))
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        # XML válido: caracteres de controle removidos e texto escapado
+        root = ElementTree.fromstring(sheet)
+        namespace = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        rows = [
+            [cell.text or '' for cell in row.findall('s:c/s:is/s:t', namespace)]
+            for row in root.findall('s:sheetData/s:row', namespace)
+        ]
+        self.assertEqual(rows[0], exports.EXPORT_HEADER)
+        self.assertEqual(rows[1][4], 'Texto comcontrole & <tags>, vírgula')
+        self.assertEqual(rows[2][0], 'José "Zé" Mãe')
+
+    def test_large_export_is_streamed_in_chunks(self):
+        Submission.objects.bulk_create([
+            Submission(**submission_data(index)) for index in range(3, 203)
+        ])
+        with mock.patch.object(exports, 'FLUSH_SIZE', 1024):
+            response = self.client.get(self.url)
+            chunks = [chunk for chunk in response.streaming_content if chunk]
+        self.assertGreater(len(chunks), 5)
+        self.assertEqual(len(self.csv_rows(b''.join(chunks))), 203)
+
+
+class SubmissionAdminTests(SubmissionTestCase):
+    """Changelist do admin com número de consultas independente das linhas"""
+
+    url = '/admin/submissions/submission/'
+
+    def setUp(self):
+        super().setUp()
+        admin = get_user_model().objects.create_superuser('admin', 'admin@exemplo.co.mz', 'senha')
+        self.client.force_login(admin)
+
+    def count_queries(self, url):
+        caches['default'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for url in (self.url, f'{self.url}?service=Auditoria'):
+            Submission.objects.bulk_create([Submission(**submission_data(index)) for index in range(3)])
+            few = self.count_queries(url)
+            Submission.objects.bulk_create([
+                Submission(**submission_data(index, service='Auditoria')) for index in range(20)
+            ])
+            self.assertEqual(self.count_queries(url), few)
@@ -1,7 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from .views import SubmissionCreateView, SubmissionListView
+from . import async_views
+from .views import (
+    SubmissionChangesView, SubmissionCreateView, SubmissionExportView, SubmissionFacetsView, SubmissionListView,
+)
 
 urlpatterns = [
-    path('', SubmissionCreateView.as_view(), name="submission-create"),
+    path(
+        '',
+        async_views.submission_create if settings.ASYNC_VIEWS else SubmissionCreateView.as_view(),
+        name="submission-create"
+    ),
     path('list/', SubmissionListView.as_view(), name="submission-list"),
+    path('facets/', SubmissionFacetsView.as_view(), name="submission-facets"),
+    path('changes/', SubmissionChangesView.as_view(), name="submission-changes"),
+    path('export/', SubmissionExportView.as_view(), name="submission-export"),
 ]
@@ -1,29 +1,56 @@
 from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 import logging
 
+from backend.caching import NamespacedListCacheMixin
+from backend.fast_serializers import CompiledSerializer, FastListMixin
+from backend.throttling import EarlyThrottleMixin
+from changes.feed import ChangeFeed
+from changes.views import change_feed_response
+from facets.views import facets_response
+
+from . import queue as submission_queue
+from .exports import FORMATS, export_response, filter_submissions
 from .models import Submission
 from .serializers import SubmissionSerializer
 
 logger = logging.getLogger(__name__)
 
 @method_decorator(csrf_exempt, name='dispatch')
-class SubmissionCreateView(generics.CreateAPIView):
+class SubmissionCreateView(EarlyThrottleMixin, generics.CreateAPIView):
     """
     Cria submissões sem bloqueio CSRF, com logging e tratamento de erros.
+
+    Com ``SUBMISSION_INGESTION_MODE = 'queue'`` a submissão é validada,
+    gravada na fila local e respondida com 202; o thread de drenagem dos
+    workers (``submissions/queue.py``) grava-a depois no banco. O cabeçalho
+    ``Idempotency-Key`` evita duplicados quando o cliente reenvia o formulário.
     """
     queryset = Submission.objects.all()
     serializer_class = SubmissionSerializer
+    throttle_scope = 'submissoes'
 
     def create(self, request, *args, **kwargs):
         try:
+            idempotency_key = request.headers.get('Idempotency-Key', '').strip()[:64] or None
+            if idempotency_key and not submission_queue.is_enabled():
+                existing = Submission.objects.filter(idempotency_key=idempotency_key).first()
+                if existing:
+                    return self.duplicate_response(existing)
+
             serializer = self.get_serializer(data=request.data)
             
             if serializer.is_valid():
-                self.perform_create(serializer)
+                if submission_queue.is_enabled():
+                    return self.enqueue(serializer, idempotency_key)
+
+                self.perform_create(serializer, idempotency_key)
                 logger.info(f"Submissão criada com sucesso: {serializer.data.get('email')}")
                 return Response({
                     'message': 'Submissão recebida com sucesso!',
@@ -44,16 +71,89 @@ class SubmissionCreateView(generics.CreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
             
         except Exception as e:
+            # Reenvio concorrente com a mesma Idempotency-Key
+            existing = None
+            if isinstance(e, IntegrityError) and idempotency_key:
+                existing = Submission.objects.filter(idempotency_key=idempotency_key).first()
+            if existing:
+                return self.duplicate_response(existing)
+
             logger.error(f"Erro ao criar submissão: {str(e)}")
             return Response({
                 'message': 'Erro ao processar submissão. Tente novamente mais tarde.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class SubmissionListView(generics.ListAPIView):
+    def perform_create(self, serializer, idempotency_key=None):
+        serializer.save(idempotency_key=idempotency_key)
+
+    def enqueue(self, serializer, idempotency_key):
+        """Grava a submissão validada na fila local e responde 202"""
+        key, created = submission_queue.enqueue(serializer.validated_data, idempotency_key)
+        if created:
+            logger.info(f"Submissão enfileirada: {serializer.validated_data.get('email')}")
+        return Response({
+            'message': 'Submissão recebida com sucesso!',
+            'data': serializer.data,
+            'idempotency_key': key
+        }, status=status.HTTP_202_ACCEPTED)
+
+    def duplicate_response(self, submission):
+        """Resposta a um reenvio de uma submissão já gravada"""
+        return Response({
+            'message': 'Submissão recebida com sucesso!',
+            'data': self.get_serializer(submission).data
+        }, status=status.HTTP_200_OK)
+
+class SubmissionListView(NamespacedListCacheMixin, FastListMixin, generics.ListAPIView):
     """Lista todas as submissões com paginação"""
     queryset = Submission.objects.all()
     serializer_class = SubmissionSerializer
+    cache_models = (Submission,)
+    fast_serializer = CompiledSerializer(SubmissionSerializer)
     filterset_fields = ['service', 'consent']
     search_fields = ['name', 'email', 'service']
     ordering_fields = ['created_at', 'name']
     ordering = ['-created_at']
+
+
+class SubmissionFacetsView(APIView):
+    """Quantidade de submissões por serviço e consentimento (somente staff)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return facets_response(request, Submission)
+
+
+class SubmissionChangesView(APIView):
+    """Submissões gravadas ou excluídas desde um cursor (somente staff)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        feed = ChangeFeed(SubmissionListView.fast_serializer, context={'request': request})
+        return change_feed_response(request, feed)
+
+
+class SubmissionExportView(APIView):
+    """
+    Exporta submissões em streaming (CSV, CSV.gz ou XLSX).
+
+    Parâmetros: ``formato`` (csv|xlsx), ``gzip=1``, ``data_inicio``,
+    ``data_fim`` (AAAA-MM-DD) e ``service``.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.query_params.get('formato', 'csv')
+        if fmt not in FORMATS:
+            return Response({
+                'message': 'Formato não suportado. Use csv ou xlsx.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            queryset = filter_submissions(Submission.objects.all(), request.query_params)
+        except ValueError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        logger.info(f"Exportação de submissões ({fmt}) solicitada por {request.user}")
+        return export_response(queryset, fmt, compress=compress)